@@ -0,0 +1,150 @@
+import re
+import json
+from typing import Dict, List, Optional
+
+
+class QuotationProcessor:
+    """
+    Extracts the competing vendors and their quoted prices from a quotation
+    comparison document.
+    """
+    
+    def extract_data(self, file_path, file_name: Optional[str] = None) -> Dict:
+        try:
+            from .proforma_processor import ProformaProcessor
+            processor = ProformaProcessor()
+            text = processor._extract_text(file_path, file_name)
+            
+            if not text:
+                return {"error": "Could not extract text from quotation comparison"}
+            
+            data = self._extract_with_ai(text)
+            if not data or data.get('error'):
+                data = self._extract_with_rules(text)
+            
+            if processor.partial_text:
+                data['partial'] = True
+            return data
+        
+        except Exception as e:
+            return {"error": f"Quotation extraction failed: {str(e)}"}
+    
+    def _extract_with_ai(self, text: str) -> Dict:
+        try:
+            from openai import OpenAI
+            from django.conf import settings
+            
+            if not hasattr(settings, 'OPENAI_API_KEY') or not settings.OPENAI_API_KEY:
+                return {"error": "OpenAI not configured"}
+            
+            client = OpenAI(api_key=settings.OPENAI_API_KEY)
+            
+            prompt = f"""
+            Extract the compared quotations from this quotation comparison text:
+            
+            {text[:4000]}
+            
+            Return as JSON with these fields:
+            - vendors: array of objects with vendor_name, total_amount (number)
+            - selected_vendor: string (the recommended or chosen vendor, if stated)
+            
+            If any field cannot be found, use null.
+            """
+            
+            response = client.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=[
+                    {"role": "system", "content": "You are a procurement data extraction assistant. Extract structured data from quotation comparisons."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.1
+            )
+            
+            result = response.choices[0].message.content
+            return json.loads(result)
+        
+        except Exception as e:
+            return {"error": f"AI extraction failed: {str(e)}"}
+    
+    def _extract_with_rules(self, text: str) -> Dict:
+        data = {
+            "vendors": self._extract_vendors(text),
+            "selected_vendor": self._extract_selected_vendor(text),
+        }
+        
+        return {k: v for k, v in data.items() if v is not None}
+    
+    def _extract_vendors(self, text: str) -> List[Dict]:
+        vendors = []
+        
+        for line in text.split('\n'):
+            # "Acme Supplies    $1,250.00" or "Acme Supplies: 1250"
+            vendor_match = re.search(
+                r'^\s*(?:Vendor|Supplier)?\s*:?\s*([A-Za-z][A-Za-z0-9\s&.,\-]*?)\s*[:\-|]?\s*[\$]?\s*([0-9][0-9,]*\.?[0-9]*)\s*(?:USD|EUR|GBP)?\s*$',
+                line,
+                re.IGNORECASE
+            )
+            if not vendor_match or len(vendor_match.group(1).strip()) < 3:
+                continue
+            
+            vendor_name = vendor_match.group(1).strip(' .,-')
+            if re.match(r'^(?:sub\s*total|total|tax|vat|amount|qty|quantity)\b', vendor_name, re.IGNORECASE):
+                continue
+            
+            try:
+                total_amount = float(vendor_match.group(2).replace(',', ''))
+            except ValueError:
+                continue
+            
+            vendors.append({"vendor_name": vendor_name, "total_amount": total_amount})
+        
+        return vendors
+    
+    def _extract_selected_vendor(self, text: str) -> Optional[str]:
+        match = re.search(
+            r"(?:Selected|Recommended|Preferred|Chosen)\s*(?:Vendor|Supplier)?:?\s*([A-Za-z0-9\s&.,]+)(?:\n|$)",
+            text,
+            re.IGNORECASE
+        )
+        if match:
+            return match.group(1).strip()
+        return None
+
+
+class SpecificationProcessor:
+    """
+    Keeps the text of a specification sheet, plus any "Name: value" lines
+    as a dictionary of specifications.
+    """
+    # Longest text stored on the request
+    MAX_TEXT_LENGTH = 50000
+    
+    def extract_data(self, file_path, file_name: Optional[str] = None) -> Dict:
+        try:
+            from .proforma_processor import ProformaProcessor
+            processor = ProformaProcessor()
+            text = processor._extract_text(file_path, file_name)
+            
+            if not text:
+                return {"error": "Could not extract text from specification sheet"}
+            
+            data = {
+                "text": text[:self.MAX_TEXT_LENGTH],
+                "specifications": self._extract_specifications(text),
+            }
+            if processor.partial_text or len(text) > self.MAX_TEXT_LENGTH:
+                data['partial'] = True
+            return data
+        
+        except Exception as e:
+            return {"error": f"Specification extraction failed: {str(e)}"}
+    
+    def _extract_specifications(self, text: str) -> Dict:
+        specifications = {}
+        
+        for line in text.split('\n'):
+            spec_match = re.match(r'^\s*([A-Za-z][A-Za-z0-9\s/()\-]{1,60}?)\s*:\s*(\S.*?)\s*$', line)
+            if spec_match and spec_match.group(1) not in specifications:
+                specifications[spec_match.group(1)] = spec_match.group(2)
+        
+        return specifications
@@ -0,0 +1,84 @@
+import zipfile
+from xml.etree.ElementTree import iterparse
+
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+DOCUMENT_PART = 'word/document.xml'
+
+# Run-level elements that stand for characters of their own. The same tags
+# appear in paragraph properties (w:pPr/w:tabs holds w:tab stop
+# definitions), so they only count inside a run.
+_SPECIAL_CHARACTERS = {
+    W + 'tab': '\t',
+    W + 'br': '\n',
+    W + 'cr': '\n',
+    W + 'noBreakHyphen': '-',
+}
+
+
+def iter_docx_blocks(source):
+    """
+    Yield the body of a .docx in document order: one string per paragraph
+    and one per table row, with the row's cells separated by tabs.
+    
+    Only word/document.xml is read, incrementally, so embedded images and
+    other media parts are never loaded. `source` is a path or a binary file
+    object.
+    """
+    with zipfile.ZipFile(source) as archive:
+        with archive.open(DOCUMENT_PART) as document:
+            yield from _iter_blocks(document)
+
+
+def _iter_blocks(document):
+    # One entry per open table row (tables can be nested in cells); each
+    # holds the finished cells of that row.
+    rows = []
+    # Text of the cell being read, per open row
+    cells = []
+    paragraph = []
+    # Depth of open w:r elements
+    run_depth = 0
+    
+    for event, element in iterparse(document, events=('start', 'end')):
+        tag = element.tag
+        
+        if event == 'start':
+            if tag == W + 'tr':
+                rows.append([])
+            elif tag == W + 'tc':
+                cells.append([])
+            elif tag == W + 'p':
+                paragraph = []
+            elif tag == W + 'r':
+                run_depth += 1
+            continue
+        
+        if tag == W + 't':
+            paragraph.append(element.text or '')
+        elif tag == W + 'r':
+            run_depth -= 1
+        elif tag in _SPECIAL_CHARACTERS:
+            if run_depth:
+                paragraph.append(_SPECIAL_CHARACTERS[tag])
+        elif tag == W + 'p':
+            text = ''.join(paragraph)
+            if cells:
+                cells[-1].append(text)
+            elif text:
+                yield text
+            element.clear()
+        elif tag == W + 'tc':
+            rows[-1].append(' '.join(text for text in cells.pop() if text))
+            element.clear()
+        elif tag == W + 'tr':
+            row = rows.pop()
+            line = '\t'.join(row)
+            if cells:
+                # A row of a nested table becomes part of the outer cell
+                cells[-1].append(line)
+            elif line.strip():
+                yield line
+            element.clear()
+        elif tag in (W + 'tbl', W + 'body'):
+            element.clear()
@@ -0,0 +1,321 @@
+import math
+import re
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+# "M8x20", "2x4" -> "M8 x 20", "2 x 4"
+DIMENSION_RE = re.compile(r'(?<=\d)x(?=\d)')
+STOPWORDS = {'a', 'an', 'and', 'the', 'of', 'for', 'with', 'x', 'pc', 'pcs', 'ea', 'each', 'unit', 'units'}
+
+# Pairs scoring below this are not considered the same line
+MIN_SCORE = 0.35
+# Candidates scored exactly per receipt line and round, best shared tokens
+# first. Lines whose candidates were all taken get the next ones in
+# another round.
+MAX_CANDIDATES = 20
+# Blocks larger than this are only used for lines that have nothing rarer
+MAX_BLOCK_SIZE = 200
+
+# Similarity of two tokens where one abbreviates the other ("scrw", "stl")
+ABBREVIATION_SIMILARITY = 0.8
+
+
+def match_items(po_items: List[Dict], receipt_items: List[Dict],
+                quantity_tolerance: float = 0.0, price_tolerance: float = 0.01) -> Dict:
+    """
+    Pair receipt lines with purchase order lines by description and report
+    the differences.
+    
+    Lines with the same words are paired first, without any scoring.
+    The remaining descriptions are tokenized and indexed by token "block"
+    (the start of the token's consonant skeleton), so each receipt line is
+    only scored against PO lines sharing a block, never against every PO
+    line. Scored pairs are then assigned best first, each line used once,
+    which keeps the whole match at O(n log n) for n lines.
+    
+    Tolerances are relative: 0.01 allows a 1% difference.
+    """
+    po_lines = [_Line(item) for item in po_items]
+    receipt_lines = [_Line(item) for item in receipt_items]
+    weights = _token_weights(po_lines + receipt_lines)
+    for line in po_lines + receipt_lines:
+        line.weights = [weights[_block(skeleton)] for skeleton in line.skeletons]
+        line.total_weight = sum(line.weights)
+    
+    matched_po, matched_receipt, matches = set(), set(), []
+    _match_same_words(po_lines, receipt_lines, matched_po, matched_receipt, matches)
+    
+    blocks = defaultdict(list)
+    for index, line in enumerate(po_lines):
+        if index not in matched_po:
+            for block in line.blocks:
+                blocks[block].append(index)
+    
+    pending = [index for index in range(len(receipt_lines)) if index not in matched_receipt]
+    while pending:
+        # Lines with the same words share one candidate list, long enough for
+        # all of them, and each line is paired with its own window of it
+        groups = defaultdict(list)
+        for receipt_index in pending:
+            groups[frozenset(receipt_lines[receipt_index].token_set)].append(receipt_index)
+        
+        pairs, truncated = [], []
+        for receipt_indexes in groups.values():
+            first_line = receipt_lines[receipt_indexes[0]]
+            candidates, complete = _candidates(
+                first_line, blocks, weights, matched_po, MAX_CANDIDATES + len(receipt_indexes) - 1
+            )
+            scored = [(_score(po_lines[po_index], first_line), po_index) for po_index in candidates]
+            # Best first, in the order the assignment breaks ties
+            scored = sorted(
+                (item for item in scored if item[0] >= MIN_SCORE),
+                key=lambda item: (-item[0], item[1])
+            )
+            if not complete or len(scored) > MAX_CANDIDATES:
+                truncated.extend(receipt_indexes)
+            for offset, receipt_index in enumerate(receipt_indexes):
+                receipt_line = receipt_lines[receipt_index]
+                for score, po_index in scored[offset:offset + MAX_CANDIDATES]:
+                    # Among equal descriptions prefer the line with the same quantity and price
+                    closeness = -_difference(po_lines[po_index].quantity, receipt_line.quantity) \
+                        - _difference(po_lines[po_index].unit_price, receipt_line.unit_price)
+                    pairs.append((score, closeness, -po_index, -receipt_index))
+        
+        if not _assign(pairs, matched_po, matched_receipt, matches):
+            break
+        # Only lines that were not shown every candidate can still match
+        pending = [index for index in truncated if index not in matched_receipt]
+        for block, indexes in blocks.items():
+            blocks[block] = [index for index in indexes if index not in matched_po]
+    matches.sort()
+    
+    report = {
+        "matched": [],
+        "unmatched_po": [po_items[index] for index in range(len(po_items)) if index not in matched_po],
+        "unmatched_receipt": [
+            receipt_items[index] for index in range(len(receipt_items)) if index not in matched_receipt
+        ],
+        "quantity_mismatches": [],
+        "price_mismatches": [],
+    }
+    
+    for po_index, receipt_index, score in matches:
+        po_line, receipt_line = po_lines[po_index], receipt_lines[receipt_index]
+        pair = {
+            "po_item": po_items[po_index],
+            "receipt_item": receipt_items[receipt_index],
+            "score": round(score, 3),
+        }
+        report["matched"].append(pair)
+        
+        if _difference(po_line.quantity, receipt_line.quantity) > quantity_tolerance:
+            report["quantity_mismatches"].append(pair)
+        if _difference(po_line.unit_price, receipt_line.unit_price) > price_tolerance:
+            report["price_mismatches"].append(pair)
+    
+    return report
+
+
+class _Line:
+    __slots__ = (
+        'tokens', 'token_set', 'words', 'skeletons', 'blocks', 'weights', 'total_weight', 'quantity', 'unit_price'
+    )
+    
+    def __init__(self, item):
+        item = item if isinstance(item, dict) else {}
+        self.tokens = _tokenize(str(item.get('description') or ''))
+        self.token_set = set(self.tokens)
+        # Only tokens without digits can be abbreviated
+        self.words = [token for token in self.tokens if token.isalpha()]
+        self.skeletons = [_skeleton(token) for token in self.tokens]
+        self.blocks = {_block(skeleton) for skeleton in self.skeletons}
+        self.quantity = _number(item.get('quantity'))
+        self.unit_price = _number(item.get('unit_price'))
+        if self.unit_price is None and self.quantity:
+            total_price = _number(item.get('total_price'))
+            if total_price is not None:
+                self.unit_price = total_price / self.quantity
+
+
+def _match_same_words(po_lines, receipt_lines, matched_po, matched_receipt, matches):
+    """
+    Pair lines whose descriptions have exactly the same words, however many
+    repeats there are. No other pair can score higher, so this is what the
+    best-first assignment would do, at O(n).
+    """
+    po_by_words = defaultdict(list)
+    for index, line in enumerate(po_lines):
+        if line.token_set:
+            po_by_words[frozenset(line.token_set)].append(index)
+    
+    receipt_by_words = defaultdict(list)
+    for index, line in enumerate(receipt_lines):
+        if line.token_set and frozenset(line.token_set) in po_by_words:
+            receipt_by_words[frozenset(line.token_set)].append(index)
+    
+    for words, receipt_indexes in receipt_by_words.items():
+        po_indexes = po_by_words[words]
+        # Same quantity and price first, then in order
+        by_terms = defaultdict(list)
+        for po_index in po_indexes:
+            by_terms[(po_lines[po_index].quantity, po_lines[po_index].unit_price)].append(po_index)
+        
+        remaining = []
+        for receipt_index in receipt_indexes:
+            line = receipt_lines[receipt_index]
+            same_terms = by_terms.get((line.quantity, line.unit_price))
+            if same_terms:
+                _pair(same_terms.pop(0), receipt_index, 1.0, matched_po, matched_receipt, matches)
+            else:
+                remaining.append(receipt_index)
+        
+        free_po = [po_index for po_index in po_indexes if po_index not in matched_po]
+        for po_index, receipt_index in zip(free_po, remaining):
+            _pair(po_index, receipt_index, 1.0, matched_po, matched_receipt, matches)
+
+
+def _assign(pairs, matched_po, matched_receipt, matches):
+    """
+    Take scored pairs best first, each line once. Returns how many were
+    taken.
+    """
+    pairs.sort(reverse=True)
+    taken = 0
+    for score, _, po_index, receipt_index in pairs:
+        po_index, receipt_index = -po_index, -receipt_index
+        if po_index in matched_po or receipt_index in matched_receipt:
+            continue
+        _pair(po_index, receipt_index, score, matched_po, matched_receipt, matches)
+        taken += 1
+    return taken
+
+
+def _pair(po_index, receipt_index, score, matched_po, matched_receipt, matches):
+    matched_po.add(po_index)
+    matched_receipt.add(receipt_index)
+    matches.append((po_index, receipt_index, score))
+
+
+def _tokenize(description):
+    tokens = []
+    for token in TOKEN_RE.findall(DIMENSION_RE.sub(' x ', description.lower())):
+        if token not in STOPWORDS and token not in tokens:
+            tokens.append(token)
+    return tokens
+
+
+def _skeleton(token):
+    # Vowels after the first letter are what abbreviations usually drop
+    if token.isdigit() or len(token) < 3:
+        return token
+    return token[0] + re.sub(r'[aeiou]', '', token[1:])
+
+
+def _block(skeleton):
+    # Sizes and part numbers are only useful whole
+    if any(character.isdigit() for character in skeleton):
+        return skeleton
+    return skeleton[:3]
+
+
+def _token_weights(lines):
+    """
+    Inverse document frequency per block, so a shared part number counts for
+    more than a shared "steel".
+    """
+    frequency = defaultdict(int)
+    for line in lines:
+        for block in line.blocks:
+            frequency[block] += 1
+    return {block: math.log(1 + len(lines) / count) for block, count in frequency.items()}
+
+
+def _candidates(line, blocks, weights, matched_po, limit):
+    """
+    Up to `limit` PO lines not matched yet that share the most weight with
+    `line`, and whether those are all of them.
+    """
+    rare = [block for block in line.blocks if 0 < len(blocks.get(block, ())) <= MAX_BLOCK_SIZE]
+    # Lines made of common words only still get the common blocks, capped
+    used = rare or [block for block in line.blocks if block in blocks]
+    
+    complete = True
+    shared = defaultdict(float)
+    for block in used:
+        free = 0
+        for index in blocks[block]:
+            if index in matched_po:
+                continue
+            if free == MAX_BLOCK_SIZE * 10:
+                complete = False
+                break
+            shared[index] += weights[block]
+            free += 1
+    
+    if len(shared) <= limit:
+        return list(shared), complete
+    return sorted(shared, key=shared.get, reverse=True)[:limit], False
+
+
+@lru_cache(maxsize=65536)
+def _token_similarity(token, other_token):
+    if token == other_token:
+        return 1.0
+    if token[0] != other_token[0]:
+        return 0.0
+    
+    shorter, longer = sorted((token, other_token), key=len)
+    if len(shorter) >= 3 and longer.startswith(shorter):
+        return ABBREVIATION_SIMILARITY
+    
+    shorter, longer = sorted((_skeleton(token), _skeleton(other_token)), key=len)
+    if len(shorter) >= 2 and longer.startswith(shorter):
+        return ABBREVIATION_SIMILARITY
+    return 0.0
+
+
+def _score(po_line, receipt_line):
+    """
+    Weighted Dice coefficient over tokens, where abbreviations count as a
+    partial match.
+    """
+    if not po_line.tokens or not receipt_line.tokens:
+        return 0.0
+    
+    def matched_weight(line, other):
+        total = 0.0
+        for token, weight in zip(line.tokens, line.weights):
+            if token in other.token_set:
+                total += weight
+            elif other.words and token.isalpha():
+                total += weight * max(_token_similarity(token, other_word) for other_word in other.words)
+        return total
+    
+    return (
+        (matched_weight(po_line, receipt_line) + matched_weight(receipt_line, po_line))
+        / (po_line.total_weight + receipt_line.total_weight)
+    )
+
+
+def _number(value) -> Optional[float]:
+    if value is None or value == '':
+        return None
+    try:
+        number = float(str(value).replace(',', '').replace('$', '').strip())
+    except ValueError:
+        return None
+    return number if math.isfinite(number) else None
+
+
+def _difference(expected, actual):
+    """
+    Relative difference, or 0 when either side is unknown.
+    """
+    if expected is None or actual is None:
+        return 0.0
+    if expected == 0:
+        return 0.0 if actual == 0 else 1.0
+    return abs(actual - expected) / abs(expected)
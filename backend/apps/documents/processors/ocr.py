@@ -0,0 +1,152 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from PIL import Image, ImageOps
+
+
+# Longest side of an A4 page at 300 DPI, the resolution Tesseract is tuned
+# for. Larger photos are scaled down, tiny ones up.
+MAX_SIDE = 3508
+MIN_SIDE = 1200
+PDF_RENDER_DPI = 300
+
+INK_THRESHOLD = 128
+DESKEW_MAX_ANGLE = 10
+DESKEW_STEP = 0.5
+DESKEW_THUMBNAIL = 600
+CROP_MARGIN = 20
+
+# Tall images are cut into bands of about this many rows, at blank rows,
+# and the bands are recognised in parallel.
+BAND_HEIGHT = 900
+
+_INK_TABLE = [255 if value < INK_THRESHOLD else 0 for value in range(256)]
+
+
+def preprocess(image):
+    """
+    Prepare a photo or scan for OCR: upright, grayscale, ~300 DPI, deskewed
+    and cropped to the area that has text on it.
+    """
+    image = ImageOps.exif_transpose(image).convert('L')
+    image = _rescale(image)
+    image = _deskew(image)
+    return _crop_to_text(image)
+
+
+def ocr_image(image):
+    """
+    Recognise the text of one image, OCRing its bands concurrently.
+    """
+    bands = _split_bands(preprocess(image))
+    if len(bands) == 1:
+        return _ocr_band(bands[0])
+    return "\n".join(_get_executor().map(_ocr_band, bands))
+
+
+def ocr_pdf_page(page):
+    """
+    Render a pdfplumber page that has no text layer and OCR it.
+    """
+    return ocr_image(page.to_image(resolution=PDF_RENDER_DPI).original)
+
+
+def _ocr_band(image):
+    import pytesseract
+    return pytesseract.image_to_string(image)
+
+
+def _ink(image):
+    return image.point(_INK_TABLE)
+
+
+def _row_profile(ink_image):
+    return list(ink_image.resize((1, ink_image.height), Image.BOX).getdata())
+
+
+def _rescale(image):
+    longest = max(image.size)
+    if longest > MAX_SIDE:
+        scale = MAX_SIDE / longest
+    elif longest < MIN_SIDE:
+        scale = MIN_SIDE / longest
+    else:
+        return image
+    
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    return image.resize(size, Image.LANCZOS)
+
+
+def _deskew(image):
+    """
+    Rotate by the angle whose horizontal projection is sharpest, i.e. where
+    text lines and the gaps between them line up with pixel rows.
+    """
+    thumbnail = _ink(image)
+    thumbnail.thumbnail((DESKEW_THUMBNAIL, DESKEW_THUMBNAIL))
+    
+    best_angle, best_score = 0, None
+    steps = int(DESKEW_MAX_ANGLE / DESKEW_STEP)
+    for step in range(-steps, steps + 1):
+        angle = step * DESKEW_STEP
+        profile = _row_profile(thumbnail.rotate(angle, expand=True))
+        mean = sum(profile) / len(profile)
+        score = sum((value - mean) ** 2 for value in profile)
+        if best_score is None or score > best_score:
+            best_angle, best_score = angle, score
+    
+    if best_angle == 0:
+        return image
+    return image.rotate(best_angle, resample=Image.BICUBIC, expand=True, fillcolor=255)
+
+
+def _crop_to_text(image):
+    box = _ink(image).getbbox()
+    if not box:
+        return image
+    
+    left, top, right, bottom = box
+    return image.crop((
+        max(0, left - CROP_MARGIN),
+        max(0, top - CROP_MARGIN),
+        min(image.width, right + CROP_MARGIN),
+        min(image.height, bottom + CROP_MARGIN),
+    ))
+
+
+def _split_bands(image):
+    if image.height < BAND_HEIGHT * 1.5:
+        return [image]
+    
+    profile = _row_profile(_ink(image))
+    window = BAND_HEIGHT // 4
+    cuts = [0]
+    target = BAND_HEIGHT
+    while target < image.height - BAND_HEIGHT // 2:
+        # Cut at the emptiest row near the target so no text line is split
+        low, high = max(cuts[-1] + 1, target - window), min(image.height - 1, target + window)
+        cut = min(range(low, high), key=lambda row: profile[row])
+        cuts.append(cut)
+        target = cut + BAND_HEIGHT
+    cuts.append(image.height)
+    
+    return [image.crop((0, top, image.width, bottom)) for top, bottom in zip(cuts, cuts[1:])]
+
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor, _executor_pid
+    
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.OCR_WORKERS or os.cpu_count(),
+                thread_name_prefix='ocr'
+            )
+            _executor_pid = os.getpid()
+        return _executor
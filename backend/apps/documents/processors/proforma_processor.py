@@ -1,5 +1,4 @@
 import pdfplumber
-import docx
 import re
 import json
 from typing import Dict, List, Optional
@@ -12,80 +11,156 @@ class ProformaProcessor:
         self.openai_client = None
         if hasattr(settings, 'OPENAI_API_KEY') and settings.OPENAI_API_KEY:
             self.openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        # Set when the parser sandbox stopped before reading the whole file
+        self.partial_text = False
+        # Set when every sandbox slot stayed busy and the file wasn't parsed
+        self.parser_busy = False
     
-    def extract_data(self, file_path: str) -> Dict:
+    @staticmethod
+    def upload_source(uploaded_file):
+        """
+        Return something the extractors can read without copying the upload:
+        the temp file path for uploads Django spooled to disk, otherwise the
+        in-memory file object rewound to the start.
+        """
+        if hasattr(uploaded_file, 'temporary_file_path'):
+            return uploaded_file.temporary_file_path()
+        
+        uploaded_file.seek(0)
+        return uploaded_file.file
+    
+    def extract_data(self, file_path, file_name: Optional[str] = None) -> Dict:
         try:
-            text = self._extract_text(file_path)
+            text = self._extract_text(file_path, file_name)
+            if not text and self.parser_busy:
+                return {"error": "Document parser is busy, try again later", "retryable": True}
             if not text:
                 return {"error": "Could not extract text from document"}
             
+            data = None
             if self.openai_client:
                 ai_data = self._extract_with_ai(text)
                 if ai_data and not ai_data.get('error'):
-                    return ai_data
+                    data = ai_data
+            
+            if data is None:
+                data = self._extract_with_rules(text)
             
-            return self._extract_with_rules(text)
+            if self.partial_text:
+                data['partial'] = True
+            return data
             
         except Exception as e:
             return {"error": f"Extraction failed: {str(e)}"}
     
-    def _extract_text(self, file_path: str) -> str:
-        file_extension = file_path.lower().split('.')[-1]
+    def _extract_text(self, file_path, file_name: Optional[str] = None) -> str:
+        # file_path may also be a binary file object; file_name then
+        # provides the extension.
+        from .sandbox import get_parser_pool
+        
+        pool = get_parser_pool()
+        if pool is None:
+            return ''.join(self._iter_text(file_path, file_name))
+        
+        result = pool.extract_text(file_path, file_name or file_path)
+        if result.error:
+            print(f"Sandboxed extraction error: {result.error}")
+        self.partial_text = not result.complete
+        self.parser_busy = result.retryable
+        return result.text
+    
+    def _iter_text(self, file_path, file_name: Optional[str] = None):
+        """
+        Yield the document text in pieces (one per page for PDFs), so a
+        parser that is stopped part-way still has something to return.
+        MemoryError is not swallowed, so the sandbox retires the worker.
+        """
+        file_extension = (file_name or file_path).lower().split('.')[-1]
         
         if file_extension == 'pdf':
-            return self._extract_from_pdf(file_path)
+            yield from self._iter_pdf_pages(file_path)
         elif file_extension in ['doc', 'docx']:
-            return self._extract_from_word(file_path)
+            yield from self._iter_word_blocks(file_path)
         elif file_extension == 'txt':
-            return self._extract_from_text(file_path)
+            yield self._extract_from_text(file_path)
         elif file_extension in ['jpg', 'jpeg', 'png', 'gif', 'bmp', 'webp']:
-            return self._extract_from_image(file_path)
-        else:
-            return ""
+            yield self._extract_from_image(file_path)
     
-    def _extract_from_text(self, file_path: str) -> str:
+    def _extract_from_text(self, file_path) -> str:
         try:
+            if hasattr(file_path, 'getbuffer'):
+                return str(file_path.getbuffer(), 'utf-8')
+            if hasattr(file_path, 'read'):
+                return file_path.read().decode('utf-8')
             with open(file_path, 'r', encoding='utf-8') as file:
                 return file.read()
+        except MemoryError:
+            raise
         except Exception as e:
             print(f"Text file reading error: {e}")
             return ""
     
-    def _extract_from_image(self, file_path: str) -> str:
+    def _extract_from_image(self, file_path) -> str:
         try:
-            import pytesseract
             from PIL import Image
+            from .ocr import ocr_image
             
-            image = Image.open(file_path)
-            text = pytesseract.image_to_string(image)
-            return text
+            with Image.open(file_path) as image:
+                return ocr_image(image)
         except ImportError:
             print("OCR libraries not installed. Install pytesseract and Pillow.")
             return "[Image file - OCR not available. Manual review required.]"
+        except MemoryError:
+            raise
         except Exception as e:
             print(f"Image extraction error: {e}")
             return "[Image file - extraction failed. Manual review required.]"
         
-    def _extract_from_pdf(self, file_path: str) -> str:
-        text = ""
+    def _extract_from_pdf(self, file_path) -> str:
+        return ''.join(self._iter_pdf_pages(file_path))
+    
+    def _iter_pdf_pages(self, file_path):
         try:
             with pdfplumber.open(file_path) as pdf:
                 for page in pdf.pages:
                     page_text = page.extract_text()
+                    if not page_text and page.images:
+                        page_text = self._ocr_pdf_page(page)
                     if page_text:
-                        text += page_text + "\n"
+                        yield page_text + "\n"
+        except MemoryError:
+            raise
         except Exception as e:
             print(f"PDF extraction error: {e}")
-        return text
     
-    def _extract_from_word(self, file_path: str) -> str:
+    def _ocr_pdf_page(self, page) -> str:
+        # Scanned pages have images but no text layer
+        try:
+            from .ocr import ocr_pdf_page
+            return ocr_pdf_page(page)
+        except ImportError:
+            print("OCR libraries not installed. Install pytesseract and Pillow.")
+            return ""
+        except MemoryError:
+            raise
+        except Exception as e:
+            print(f"Scanned page OCR error: {e}")
+            return ""
+    
+    def _extract_from_word(self, file_path) -> str:
+        return ''.join(self._iter_word_blocks(file_path))
+    
+    def _iter_word_blocks(self, file_path):
+        # Paragraphs and table rows (cells tab-separated) in document order
+        from .docx_stream import iter_docx_blocks
+        
         try:
-            doc = docx.Document(file_path)
-            text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
-            return text
+            for block in iter_docx_blocks(file_path):
+                yield block + "\n"
+        except MemoryError:
+            raise
         except Exception as e:
             print(f"Word extraction error: {e}")
-            return ""
     
     def _extract_with_ai(self, text: str) -> Dict:
         if not self.openai_client:
@@ -2,14 +2,34 @@ import re
 import json
 from typing import Dict, List, Optional
 from django.core.files.base import ContentFile
-from apps.purchases.models import PurchaseRequest, PurchaseOrder
+from apps.purchases.models import PurchaseRequest, PurchaseOrder, LineItem
+from apps.purchases.vendors import same_vendor
+
+
+# Receipt lines that carry totals rather than goods
+SUMMARY_LINE_RE = re.compile(
+    r'^\s*(?:sub\s*-?\s*total|grand\s+total|total|tax|vat|gst|sales\s+tax|'
+    r'amount\s+due|balance\s+due|change\s+due|discount)\b',
+    re.IGNORECASE
+)
 
 
 class ReceiptValidator:
-    def __init__(self):
-        pass
+    def __init__(self, amount_tolerance: Optional[float] = None, amount_high_tolerance: Optional[float] = None,
+                 quantity_tolerance: Optional[float] = None, price_tolerance: Optional[float] = None):
+        # Relative differences allowed before a discrepancy is reported
+        from django.conf import settings
+        
+        self.amount_tolerance = settings.RECEIPT_AMOUNT_TOLERANCE if amount_tolerance is None else amount_tolerance
+        self.amount_high_tolerance = (
+            settings.RECEIPT_AMOUNT_HIGH_TOLERANCE if amount_high_tolerance is None else amount_high_tolerance
+        )
+        self.quantity_tolerance = (
+            settings.RECEIPT_ITEM_QUANTITY_TOLERANCE if quantity_tolerance is None else quantity_tolerance
+        )
+        self.price_tolerance = settings.RECEIPT_ITEM_PRICE_TOLERANCE if price_tolerance is None else price_tolerance
     
-    def validate_receipt(self, purchase_request_id: int, receipt_file_path: str) -> Dict:
+    def validate_receipt(self, purchase_request_id: int, receipt_file_path, file_name: Optional[str] = None) -> Dict:
         try:
             purchase_request = PurchaseRequest.objects.get(id=purchase_request_id)
             
@@ -21,7 +41,7 @@ class ReceiptValidator:
             
             po_data = self._get_po_data(purchase_request)
             
-            receipt_data = self._extract_receipt_data(receipt_file_path)
+            receipt_data = self._extract_receipt_data(receipt_file_path, file_name)
             
             if receipt_data.get('error'):
                 return {
@@ -29,6 +49,8 @@ class ReceiptValidator:
                     "error": receipt_data['error']
                 }
             
+            LineItem.replace(purchase_request, LineItem.Source.RECEIPT, receipt_data.get('items'))
+            
             validation_result = self._compare_po_receipt(po_data, receipt_data)
             
             return validation_result
@@ -46,29 +68,26 @@ class ReceiptValidator:
     
     def _get_po_data(self, purchase_request: PurchaseRequest) -> Dict:
         po = purchase_request.purchase_order_doc
-        
-        if po.po_data_file:
-            return {
-                'vendor_name': po.po_data_file.get('vendor_name', po.vendor_name),
-                'total_amount': float(po.po_data_file.get('total_amount', po.total_amount)),
-                'items': po.po_data_file.get('items', []),
-                'po_number': po.po_number,
-                'has_detailed_items': False
-            }
+        # Read through .all() so a prefetched batch needs no extra query
+        items = [
+            line_item.as_dict()
+            for line_item in purchase_request.line_items.all()
+            if line_item.source == LineItem.Source.PURCHASE_ORDER
+        ]
         
         return {
             'vendor_name': po.vendor_name,
             'total_amount': float(po.total_amount),
-            'items': [],
+            'items': items,
             'po_number': po.po_number,
-            'has_detailed_items': False
+            'has_detailed_items': bool(items)
         }
     
-    def _extract_receipt_data(self, file_path: str) -> Dict:
+    def _extract_receipt_data(self, file_path, file_name: Optional[str] = None) -> Dict:
         try:
             from .proforma_processor import ProformaProcessor
             processor = ProformaProcessor()
-            text = processor._extract_text(file_path)
+            text = processor._extract_text(file_path, file_name)
             
             if not text:
                 return {"error": "Could not extract text from receipt"}
@@ -164,7 +183,8 @@ class ReceiptValidator:
         
         for line in lines:
             item_match = re.search(r'([A-Za-z\s]+)\s+[\$]?(\d+\.?\d*)', line)
-            if item_match and len(item_match.group(1).strip()) > 3:
+            if item_match and len(item_match.group(1).strip()) > 3 \
+                    and not SUMMARY_LINE_RE.match(item_match.group(1)):
                 items.append({
                     "description": item_match.group(1).strip(),
                     "quantity": 1,
@@ -178,7 +198,7 @@ class ReceiptValidator:
         discrepancies = []
         
         if (po_data.get('vendor_name') and receipt_data.get('vendor_name') and
-            po_data['vendor_name'].lower() != receipt_data['vendor_name'].lower()):
+            not same_vendor(po_data['vendor_name'], receipt_data['vendor_name'])):
             discrepancies.append({
                 "field": "vendor_name",
                 "po_value": po_data['vendor_name'],
@@ -191,29 +211,23 @@ class ReceiptValidator:
             po_amount = po_data['total_amount']
             receipt_amount = receipt_data['total_amount']
             difference = abs(po_amount - receipt_amount)
-            tolerance = po_amount * 0.10
+            tolerance = po_amount * self.amount_tolerance
             
             if difference > tolerance:
                 discrepancies.append({
                     "field": "total_amount",
                     "po_value": f"${po_amount:.2f}",
                     "receipt_value": f"${receipt_amount:.2f}",
-                    "severity": "high" if difference > po_amount * 0.20 else "medium",
+                    "severity": "high" if difference > po_amount * self.amount_high_tolerance else "medium",
                     "message": f"Amount difference: ${difference:.2f} (${po_amount:.2f} vs ${receipt_amount:.2f})"
                 })
         
         po_items = po_data.get('items', [])
         receipt_items = receipt_data.get('items', [])
         
+        item_matching = None
         if po_data.get('has_detailed_items') and po_items and receipt_items:
-            if len(po_items) != len(receipt_items):
-                discrepancies.append({
-                    "field": "item_count",
-                    "po_value": len(po_items),
-                    "receipt_value": len(receipt_items),
-                    "severity": "medium",
-                    "message": f"Item count mismatch: PO has {len(po_items)} items, receipt has {len(receipt_items)}"
-                })
+            item_matching = self._compare_items(po_items, receipt_items, discrepancies)
         
         is_valid = len([d for d in discrepancies if d['severity'] == 'high']) == 0
         
@@ -229,5 +243,69 @@ class ReceiptValidator:
                 "vendor_name": receipt_data.get('vendor_name'),
                 "total_amount": receipt_data.get('total_amount'),
                 "items_count": len(receipt_data.get('items', []))
-            }
+            },
+            "item_matching": item_matching
+        }
+    
+    def _compare_items(self, po_items: List[Dict], receipt_items: List[Dict], discrepancies: List[Dict]) -> Dict:
+        from .item_matching import match_items
+        
+        # AI extraction can list totals and tax as lines too
+        receipt_items = [
+            item for item in receipt_items
+            if not (isinstance(item, dict) and SUMMARY_LINE_RE.match(str(item.get('description') or '')))
+        ]
+        report = match_items(
+            po_items,
+            receipt_items,
+            quantity_tolerance=self.quantity_tolerance,
+            price_tolerance=self.price_tolerance
+        )
+        
+        for item in report['unmatched_po']:
+            discrepancies.append({
+                "field": "item_missing",
+                "po_value": item.get('description'),
+                "receipt_value": None,
+                "severity": "medium",
+                "message": f"PO item not found on receipt: {item.get('description')}"
+            })
+        
+        for item in report['unmatched_receipt']:
+            discrepancies.append({
+                "field": "item_unexpected",
+                "po_value": None,
+                "receipt_value": item.get('description'),
+                "severity": "medium",
+                "message": f"Receipt item not on purchase order: {item.get('description')}"
+            })
+        
+        for pair in report['quantity_mismatches']:
+            po_item, receipt_item = pair['po_item'], pair['receipt_item']
+            discrepancies.append({
+                "field": "item_quantity",
+                "po_value": po_item.get('quantity'),
+                "receipt_value": receipt_item.get('quantity'),
+                "severity": "medium",
+                "message": f"Quantity differs for {po_item.get('description')}: "
+                           f"{po_item.get('quantity')} ordered, {receipt_item.get('quantity')} on receipt"
+            })
+        
+        for pair in report['price_mismatches']:
+            po_item, receipt_item = pair['po_item'], pair['receipt_item']
+            discrepancies.append({
+                "field": "item_price",
+                "po_value": po_item.get('unit_price'),
+                "receipt_value": receipt_item.get('unit_price'),
+                "severity": "medium",
+                "message": f"Unit price differs for {po_item.get('description')}: "
+                           f"{po_item.get('unit_price')} on PO, {receipt_item.get('unit_price')} on receipt"
+            })
+        
+        return {
+            "matched": len(report['matched']),
+            "unmatched_po": len(report['unmatched_po']),
+            "unmatched_receipt": len(report['unmatched_receipt']),
+            "quantity_mismatches": len(report['quantity_mismatches']),
+            "price_mismatches": len(report['price_mismatches'])
         }
\ No newline at end of file
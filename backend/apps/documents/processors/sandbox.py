@@ -0,0 +1,207 @@
+import io
+import math
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+from django.conf import settings
+
+
+@dataclass
+class SandboxResult:
+    text: str
+    complete: bool = True
+    error: Optional[str] = None
+    # The document was not parsed at all and can be tried again later
+    retryable: bool = False
+
+
+def _worker_main(conn, memory_limit, cpu_seconds):
+    """
+    Parser subprocess loop. Receives (source, file_name) tasks and streams
+    text back piece by piece, so whatever was parsed survives a kill.
+    A resource-limit failure is reported as 'fatal' and ends the loop.
+    """
+    import resource
+    from .proforma_processor import ProformaProcessor
+    
+    processor = ProformaProcessor()
+    if memory_limit:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        
+        source, file_name = task
+        if isinstance(source, bytes):
+            source = io.BytesIO(source)
+        
+        # RLIMIT_CPU counts the whole process lifetime, so give each task its
+        # own budget on top of what earlier tasks used. Only the soft limit
+        # moves (SIGXCPU kills the worker); a lowered hard limit could not be
+        # raised again for the next task.
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        cpu_limit = math.ceil(usage.ru_utime + usage.ru_stime) + cpu_seconds
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_limit, resource.getrlimit(resource.RLIMIT_CPU)[1]))
+        
+        try:
+            for text in processor._iter_text(source, file_name):
+                conn.send(('text', text))
+            conn.send(('done', None))
+        except MemoryError:
+            conn.send(('fatal', "Document parser ran out of memory"))
+            return
+        except Exception as e:
+            conn.send(('error', str(e)))
+
+
+class _Worker:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.tasks = 0
+    
+    def stop(self):
+        self.conn.close()
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(1)
+
+
+class ParserPool:
+    """
+    Pool of recyclable parser subprocesses with address space and CPU
+    limits. Each document gets a hard deadline; when a worker overruns it or
+    dies, it is killed and the text received so far is returned as a partial
+    result.
+    """
+    
+    def __init__(self, size, timeout, memory_limit_mb, cpu_seconds, max_tasks):
+        self.timeout = timeout
+        self.memory_limit = memory_limit_mb * 1024 * 1024
+        self.cpu_seconds = cpu_seconds
+        self.max_tasks = max_tasks
+        self._context = multiprocessing.get_context('forkserver')
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+    
+    def _spawn(self):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, self.memory_limit, self.cpu_seconds),
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        return _Worker(process, parent_conn)
+    
+    def extract_text(self, source, file_name):
+        if not self._slots.acquire(timeout=self.timeout):
+            return SandboxResult('', complete=False, error="Document parser pool is busy", retryable=True)
+        
+        try:
+            worker = self._checkout()
+            
+            result, reusable = self._run(worker, source, file_name)
+            
+            if reusable and worker.tasks < self.max_tasks:
+                self._idle.put(worker)
+            else:
+                worker.stop()
+            return result
+        finally:
+            self._slots.release()
+    
+    def _checkout(self):
+        """
+        An idle worker that is still running, or a new one. A worker can die
+        while idle, e.g. from a CPU limit signal arriving after its last
+        result was sent.
+        """
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                return self._spawn()
+            if worker.process.is_alive():
+                return worker
+            worker.stop()
+    
+    def _run(self, worker, source, file_name):
+        if isinstance(source, str):
+            payload = source
+        elif hasattr(source, 'getbuffer'):
+            payload = bytes(source.getbuffer())
+        else:
+            source.seek(0)
+            payload = source.read()
+        
+        try:
+            worker.conn.send((payload, file_name))
+        except (OSError, EOFError):
+            return SandboxResult('', complete=False, error="Document parser exited"), False
+        
+        deadline = time.monotonic() + self.timeout
+        parts = []
+        
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not worker.conn.poll(remaining):
+                return SandboxResult(
+                    ''.join(parts), complete=False, error="Document parsing timed out"
+                ), False
+            
+            try:
+                kind, value = worker.conn.recv()
+            except (OSError, EOFError):
+                return SandboxResult(
+                    ''.join(parts), complete=False, error="Document parser exceeded its resource limits"
+                ), False
+            
+            if kind == 'text':
+                parts.append(value)
+                continue
+            
+            worker.tasks += 1
+            if kind == 'done':
+                return SandboxResult(''.join(parts)), True
+            # After a resource-limit failure the worker is exiting, but may
+            # still look alive; it is never handed out again
+            return SandboxResult(''.join(parts), complete=False, error=value), kind == 'error'
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_parser_pool():
+    """
+    The process-wide parser pool, or None when DOCUMENT_PARSER_WORKERS is 0.
+    A new pool is created after a fork so workers are never shared.
+    """
+    global _pool, _pool_pid
+    
+    if settings.DOCUMENT_PARSER_WORKERS <= 0:
+        return None
+    
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ParserPool(
+                size=settings.DOCUMENT_PARSER_WORKERS,
+                timeout=settings.DOCUMENT_PARSER_TIMEOUT,
+                memory_limit_mb=settings.DOCUMENT_PARSER_MEMORY_LIMIT_MB,
+                cpu_seconds=settings.DOCUMENT_PARSER_CPU_SECONDS,
+                max_tasks=settings.DOCUMENT_PARSER_MAX_TASKS
+            )
+            _pool_pid = os.getpid()
+        return _pool
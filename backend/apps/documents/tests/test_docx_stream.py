@@ -0,0 +1,41 @@
+import io
+import zipfile
+from django.test import SimpleTestCase
+from apps.documents.processors.docx_stream import iter_docx_blocks, DOCUMENT_PART
+
+
+def make_docx(body):
+    document = (
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f'<w:body>{body}</w:body></w:document>'
+    )
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w') as docx:
+        docx.writestr(DOCUMENT_PART, document)
+    archive.seek(0)
+    return archive
+
+
+class IterDocxBlocksTests(SimpleTestCase):
+    def test_tab_stop_definitions_are_not_text(self):
+        source = make_docx(
+            '<w:p><w:pPr><w:tabs><w:tab w:val="left" w:pos="720"/><w:tab w:val="right" w:pos="9000"/></w:tabs></w:pPr>'
+            '<w:r><w:t>Total</w:t></w:r><w:r><w:tab/><w:t>300.00</w:t></w:r></w:p>'
+        )
+        
+        self.assertEqual(list(iter_docx_blocks(source)), ['Total\t300.00'])
+    
+    def test_breaks_inside_runs_are_kept(self):
+        source = make_docx('<w:p><w:r><w:t>Line one</w:t><w:br/><w:t>Line two</w:t></w:r></w:p>')
+        
+        self.assertEqual(list(iter_docx_blocks(source)), ['Line one\nLine two'])
+    
+    def test_table_rows_join_cells_with_tabs(self):
+        source = make_docx(
+            '<w:tbl><w:tr>'
+            '<w:tc><w:p><w:r><w:t>Item</w:t></w:r></w:p></w:tc>'
+            '<w:tc><w:p><w:pPr><w:tabs><w:tab w:pos="720"/></w:tabs></w:pPr><w:r><w:t>2</w:t></w:r></w:p></w:tc>'
+            '</w:tr></w:tbl>'
+        )
+        
+        self.assertEqual(list(iter_docx_blocks(source)), ['Item\t2'])
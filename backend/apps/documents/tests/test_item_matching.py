@@ -0,0 +1,53 @@
+from django.test import SimpleTestCase
+from apps.documents.processors.item_matching import match_items, MAX_CANDIDATES
+
+
+class MatchItemsTests(SimpleTestCase):
+    def test_identical_lines_beyond_candidate_limit_all_match(self):
+        count = MAX_CANDIDATES * 3 + 7
+        items = [{"description": "A4 copy paper 80gsm", "quantity": 10, "unit_price": 5}] * count
+        
+        report = match_items(items, list(items))
+        
+        self.assertEqual(len(report["matched"]), count)
+        self.assertEqual(report["unmatched_po"], [])
+        self.assertEqual(report["unmatched_receipt"], [])
+    
+    def test_similar_lines_beyond_candidate_limit_all_match(self):
+        count = MAX_CANDIDATES * 5
+        po_items = [{"description": "Office chair ergonomic mesh", "quantity": 1}] * count
+        receipt_items = [{"description": "Office chair ergonomic mesh black", "quantity": 1}] * count
+        
+        report = match_items(po_items, receipt_items)
+        
+        self.assertEqual(len(report["matched"]), count)
+        self.assertEqual(report["unmatched_receipt"], [])
+    
+    def test_variants_match_their_own_line(self):
+        colours = ["black", "cyan", "magenta", "yellow"]
+        po_items = [
+            {"description": f"Toner cartridge {model} {colour}", "quantity": 1, "unit_price": 50}
+            for model in [f"CF{number}A" for number in range(200, 250)]
+            for colour in colours
+        ]
+        receipt_items = [
+            {**item, "description": item["description"].replace("cartridge", "cartrdg")}
+            for item in reversed(po_items)
+        ]
+        
+        report = match_items(po_items, receipt_items)
+        
+        self.assertEqual(len(report["matched"]), len(po_items))
+        for pair in report["matched"]:
+            self.assertEqual(
+                pair["po_item"]["description"],
+                pair["receipt_item"]["description"].replace("cartrdg", "cartridge")
+            )
+    
+    def test_identical_lines_prefer_same_quantity(self):
+        po_items = [{"description": "Paper", "quantity": quantity} for quantity in (1, 2, 3)]
+        receipt_items = [{"description": "paper", "quantity": quantity} for quantity in (3, 1, 2)]
+        
+        report = match_items(po_items, receipt_items)
+        
+        self.assertEqual(report["quantity_mismatches"], [])
@@ -1,19 +1,40 @@
-from rest_framework import viewsets, status, permissions
+from rest_framework import viewsets, status, permissions, mixins
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.conf import settings
 from django.db import transaction
-from django.db.models import Count, Q
+from django.http import Http404
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiResponse, inline_serializer
 from rest_framework import serializers
 import os
+import csv
 import json
-from .models import PurchaseRequest, Approval
+from datetime import timedelta, timezone as dt_timezone
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from .models import (
+    PurchaseRequest, Approval, PurchaseOrder, DeletedPurchaseRequest, StagedUpload,
+    ReceiptValidation, ReceiptDiscrepancy
+)
 from .serializers import (
     PurchaseRequestSerializer, 
     PurchaseRequestCreateSerializer,
-    ApprovalSerializer
+    ApprovalSerializer,
+    ApprovalChangeSerializer,
+    BulkDecisionSerializer,
+    BulkProformaDefaultsSerializer,
+    PurchaseOrderSerializer,
+    DeletedPurchaseRequestSerializer,
+    StagedUploadSerializer,
+    StagedUploadFinalizeSerializer,
+    ReceiptDiscrepancySerializer,
+    VendorSerializer
 )
 from .permissions import IsStaffUser, IsApproverUser, IsFinanceUser, IsOwnerOrApprover
+from . import cache as list_cache
 
 
 @extend_schema_view(
@@ -25,6 +46,12 @@ from .permissions import IsStaffUser, IsApproverUser, IsFinanceUser, IsOwnerOrAp
                     '- Approver L1: Requests from their direct reports\n'
                     '- Approver L2: All requests\n'
                     '- Finance: Only fully approved requests',
+        parameters=[
+            OpenApiParameter(name='status', required=False, type=str),
+            OpenApiParameter(name='urgency', required=False, type=str),
+            OpenApiParameter(name='created_after', description='ISO-8601 datetime', required=False, type=str),
+            OpenApiParameter(name='created_before', description='ISO-8601 datetime', required=False, type=str),
+        ],
     ),
     create=extend_schema(
         tags=['Purchase Requests'],
@@ -40,7 +67,8 @@ from .permissions import IsStaffUser, IsApproverUser, IsFinanceUser, IsOwnerOrAp
     update=extend_schema(
         tags=['Purchase Requests'],
         summary='Update purchase request',
-        description='Update an existing purchase request. Only the creator can update, and only while status is pending.',
+        description='Update an existing purchase request. Only the creator can update, and only while status is pending. '
+                    'The proforma cannot be replaced; create a new request for a different proforma.',
     ),
     partial_update=extend_schema(
         tags=['Purchase Requests'],
@@ -56,6 +84,18 @@ from .permissions import IsStaffUser, IsApproverUser, IsFinanceUser, IsOwnerOrAp
 class PurchaseRequestViewSet(viewsets.ModelViewSet):
     queryset = PurchaseRequest.objects.all()
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrApprover]
+    change_feed_page_size = 500
+    export_chunk_size = 2000
+    document_fields = [
+        'proforma', 'quotation_comparison', 'specification_sheet',
+        'purchase_order', 'receipt', 'po_document'
+    ]
+    export_fields = [
+        'id', 'title', 'description', 'amount', 'status', 'urgency',
+        'vendor_name', 'vendor_contact', 'vendor_address', 'requested_delivery_date',
+        'cost_center', 'gl_account', 'budget_code', 'project_code',
+        'business_justification', 'created_by__username', 'created_at', 'updated_at'
+    ]
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -66,11 +106,11 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
         user = self.request.user
         
         if user.is_staff_role:
-            return PurchaseRequest.objects.filter(created_by=user)
+            return PurchaseRequest.objects.filter(created_by_id=user.id)
         
         elif user.is_approver:
             if user.is_approver_level_1:
-                return PurchaseRequest.objects.filter(created_by__manager=user)
+                return PurchaseRequest.objects.filter(created_by__manager_id=user.id)
             else:
                 return PurchaseRequest.objects.all()
         
@@ -83,16 +123,81 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
         
         return PurchaseRequest.objects.none()
     
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        params = self.request.query_params
+        
+        if params.get('status'):
+            queryset = queryset.filter(status=params['status'])
+        if params.get('urgency'):
+            queryset = queryset.filter(urgency=params['urgency'])
+        
+        for param, lookup in (('created_after', 'created_at__gte'), ('created_before', 'created_at__lt')):
+            if params.get(param):
+                value = parse_datetime(params[param])
+                if value is None:
+                    raise serializers.ValidationError({param: "Invalid ISO-8601 datetime."})
+                if timezone.is_naive(value):
+                    value = timezone.make_aware(value)
+                queryset = queryset.filter(**{lookup: value})
+        
+        return queryset
+    
+    def get_tombstone_queryset(self):
+        user = self.request.user
+        
+        if user.is_staff_role:
+            return DeletedPurchaseRequest.objects.filter(created_by_id=user.id)
+        
+        elif user.is_approver:
+            if user.is_approver_level_1:
+                return DeletedPurchaseRequest.objects.filter(created_by__manager_id=user.id)
+            else:
+                return DeletedPurchaseRequest.objects.all()
+        
+        elif user.is_finance:
+            return DeletedPurchaseRequest.objects.filter(
+                status=PurchaseRequest.Status.APPROVED
+            )
+        
+        return DeletedPurchaseRequest.objects.none()
+    
+    def list(self, request, *args, **kwargs):
+        cache_key = list_cache.build_response_key(request, 'list')
+        cached_data = list_cache.get_cached_response(cache_key)
+        if cached_data is not None:
+            return Response(cached_data)
+        
+        response = super().list(request, *args, **kwargs)
+        list_cache.set_cached_response(cache_key, response.data)
+        return response
+    
+    def perform_update(self, serializer):
+        serializer.save()
+        list_cache.invalidate_request(serializer.instance)
+    
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            DeletedPurchaseRequest.objects.create(
+                request_id=instance.id,
+                created_by=instance.created_by,
+                status=instance.status
+            )
+            instance.delete()
+            # Bumped on commit, once the row is gone for every reader
+            list_cache.invalidate_request(instance)
+    
     def perform_create(self, serializer):
         if not self.request.user.is_staff_role:
             raise permissions.PermissionDenied("Only staff users can create purchase requests.")
         serializer.save()
+        list_cache.invalidate_request(serializer.instance)
     
     def update(self, request, *args, **kwargs):
         purchase_request = self.get_object()
         user = request.user
         
-        if not user.is_staff_role or purchase_request.created_by != user:
+        if not user.is_staff_role or purchase_request.created_by_id != user.id:
             return Response(
                 {"error": "Only the staff member who created this request can update it."},
                 status=status.HTTP_403_FORBIDDEN
@@ -110,7 +215,7 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
         purchase_request = self.get_object()
         user = request.user
         
-        if not user.is_staff_role or purchase_request.created_by != user:
+        if not user.is_staff_role or purchase_request.created_by_id != user.id:
             return Response(
                 {"error": "Only the staff member who created this request can update it."},
                 status=status.HTTP_403_FORBIDDEN
@@ -124,6 +229,206 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
         
         return super().partial_update(request, *args, **kwargs)
     
+    @extend_schema(
+        tags=['Purchase Requests'],
+        summary='Purchase request summary',
+        description='Count and total amount of the requests visible to the user, broken down by status.',
+        responses={
+            200: OpenApiResponse(description='Summary of visible requests'),
+        }
+    )
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        cache_key = list_cache.build_response_key(request, 'summary')
+        cached_data = list_cache.get_cached_response(cache_key)
+        if cached_data is not None:
+            return Response(cached_data)
+        
+        rows = PurchaseRequest.objects.filter(
+            id__in=self.get_queryset().values('id')
+        ).order_by().values('status').annotate(
+            count=Count('id'),
+            total_amount=Sum('amount')
+        )
+        
+        by_status = {
+            choice: {"count": 0, "total_amount": "0.00"}
+            for choice in PurchaseRequest.Status.values
+        }
+        for row in rows:
+            by_status[row['status']] = {
+                "count": row['count'],
+                "total_amount": str(row['total_amount'])
+            }
+        
+        response_data = {
+            "total": sum(row['count'] for row in by_status.values()),
+            "by_status": by_status
+        }
+        list_cache.set_cached_response(cache_key, response_data)
+        return Response(response_data)
+    
+    @extend_schema(
+        tags=['Purchase Requests'],
+        summary='Export purchase requests',
+        description='Stream every request visible to the user as CSV or NDJSON. '
+                    'Accepts the same filters as the list endpoint.',
+        parameters=[
+            OpenApiParameter(name='export_format', description='`csv` (default) or `ndjson`', required=False, type=str),
+            OpenApiParameter(name='status', required=False, type=str),
+            OpenApiParameter(name='urgency', required=False, type=str),
+            OpenApiParameter(name='created_after', description='ISO-8601 datetime', required=False, type=str),
+            OpenApiParameter(name='created_before', description='ISO-8601 datetime', required=False, type=str),
+        ],
+        responses={
+            200: OpenApiResponse(description='CSV or NDJSON file download'),
+            400: OpenApiResponse(description='Unknown export format or invalid filter'),
+        }
+    )
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        export_format = request.query_params.get('export_format', 'csv')
+        if export_format not in ('csv', 'ndjson'):
+            return Response(
+                {"error": "export_format must be 'csv' or 'ndjson'."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # .iterator() reads through a server-side cursor, so memory stays
+        # flat regardless of how many rows are exported.
+        rows = self.filter_queryset(self.get_queryset()).order_by('id').values_list(
+            *self.export_fields
+        ).iterator(chunk_size=self.export_chunk_size)
+        columns = [field.replace('__', '_') for field in self.export_fields]
+        
+        if export_format == 'csv':
+            content = self._stream_csv(columns, rows)
+            content_type = 'text/csv'
+        else:
+            content = self._stream_ndjson(columns, rows)
+            content_type = 'application/x-ndjson'
+        
+        response = StreamingHttpResponse(content, content_type=content_type)
+        filename = f"purchase_requests_{timezone.now().strftime('%Y%m%d')}.{export_format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+    
+    @staticmethod
+    def _stream_csv(columns, rows):
+        class Echo:
+            def write(self, value):
+                return value
+        
+        writer = csv.writer(Echo())
+        yield writer.writerow(columns)
+        for row in rows:
+            yield writer.writerow(row)
+    
+    @staticmethod
+    def _stream_ndjson(columns, rows):
+        for row in rows:
+            yield json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + '\n'
+    
+    @extend_schema(
+        tags=['Purchase Requests'],
+        summary='Incremental change feed',
+        description='Return requests changed, approvals and purchase orders created, and requests deleted '
+                    'after the given cursor, scoped by role like the list endpoint. Omit `updated_since` '
+                    'for a full sync, then pass the returned `next_cursor` on the following call. '
+                    'When `has_more` is true, call again immediately with `next_cursor`. '
+                    'Changes are returned once they are `CHANGE_FEED_SAFETY_LAG` seconds old.',
+        parameters=[
+            OpenApiParameter(
+                name='updated_since',
+                description='Cursor returned as `next_cursor` by the previous call (ISO-8601 timestamp).',
+                required=False,
+                type=str
+            ),
+        ],
+        responses={
+            200: OpenApiResponse(description='Changes since the cursor'),
+            400: OpenApiResponse(description='Invalid cursor'),
+        }
+    )
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        since = None
+        cursor = request.query_params.get('updated_since')
+        if cursor:
+            since = parse_datetime(cursor)
+            if since is None:
+                return Response(
+                    {"error": "Invalid updated_since cursor."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+        
+        scope = self.get_queryset()
+        scope_ids = scope.values('id')
+        streams = {
+            'requests': (
+                scope.select_related('created_by').prefetch_related('approvals__approver'),
+                'updated_at',
+                PurchaseRequestSerializer
+            ),
+            'approvals': (
+                Approval.objects.filter(purchase_request__in=scope_ids).select_related('approver'),
+                'created_at',
+                ApprovalChangeSerializer
+            ),
+            'purchase_orders': (
+                PurchaseOrder.objects.filter(purchase_request__in=scope_ids),
+                'updated_at',
+                PurchaseOrderSerializer
+            ),
+            'deleted': (
+                self.get_tombstone_queryset(),
+                'deleted_at',
+                DeletedPurchaseRequestSerializer
+            ),
+        }
+        
+        # Every stream is read over the same (since, until] window. If any
+        # stream has more than a page of changes, the window is cut at that
+        # stream's last row (ties included) so the cursor never skips rows.
+        # The window ends CHANGE_FEED_SAFETY_LAG seconds ago: a timestamp is
+        # taken before its transaction commits, so a row stamped just before
+        # now may not be visible yet and would fall behind the cursor.
+        until = timezone.now() - timedelta(seconds=settings.CHANGE_FEED_SAFETY_LAG)
+        if since and until < since:
+            until = since
+        has_more = False
+        limit = self.change_feed_page_size
+        windowed = {}
+        for name, (queryset, field, _) in streams.items():
+            if since:
+                queryset = queryset.filter(**{f'{field}__gt': since})
+            windowed[name] = queryset.order_by(field, 'id')
+            
+            boundary = list(
+                windowed[name].filter(**{f'{field}__lte': until})
+                .values_list(field, flat=True)[limit - 1:limit + 1]
+            )
+            if len(boundary) == 2:
+                until = boundary[0]
+                has_more = True
+        
+        response_data = {}
+        context = self.get_serializer_context()
+        for name, queryset in windowed.items():
+            _, field, serializer_class = streams[name]
+            response_data[name] = serializer_class(
+                queryset.filter(**{f'{field}__lte': until}),
+                many=True,
+                context=context
+            ).data
+        
+        response_data['next_cursor'] = until.astimezone(dt_timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+        response_data['has_more'] = has_more
+        return Response(response_data)
+    
     @extend_schema(
         tags=['Approvals'],
         summary='Approve purchase request',
@@ -162,48 +467,36 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
         return self._handle_approval(request, pk, approved=False)
     
     def _handle_approval(self, request, pk, approved):
-        purchase_request = self.get_object()
-        user = request.user
+        from .services import ApprovalWorkflow, PurchaseOrderGenerator
         
-        if not user.can_approve_request(purchase_request):
-            return Response(
-                {"error": "You don't have permission to approve this request."},
-                status=status.HTTP_403_FORBIDDEN
-            )
+        try:
+            pk = int(pk)
+        except (TypeError, ValueError):
+            raise Http404
         
-        if purchase_request.status != PurchaseRequest.Status.PENDING:
-            return Response(
-                {"error": "This request has already been processed."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        result = ApprovalWorkflow.record_decision(
+            self.get_queryset(),
+            pk,
+            request.user,
+            approved,
+            comments=request.data.get('comments', '')
+        )
         
-        po_info = None
+        if result.error_code == ApprovalWorkflow.NOT_FOUND:
+            raise Http404
         
-        with transaction.atomic():
-            approval_level = user.get_approval_level()
-            Approval.objects.create(
-                purchase_request=purchase_request,
-                approver=user,
-                approval_level=approval_level,
-                approved=approved,
-                comments=request.data.get('comments', '')
-            )
-            
-            if not approved:
-                purchase_request.status = PurchaseRequest.Status.REJECTED
-                purchase_request.save()
-            else:
-                approved_count = Approval.objects.filter(
-                    purchase_request=purchase_request,
-                    approved=True
-                ).count()
-                
-                if approved_count == 2:
-                    purchase_request.status = PurchaseRequest.Status.APPROVED
-                    purchase_request.save()
+        if result.error_code:
+            error_status = {
+                ApprovalWorkflow.FORBIDDEN: status.HTTP_403_FORBIDDEN,
+                ApprovalWorkflow.ALREADY_PROCESSED: status.HTTP_400_BAD_REQUEST,
+                ApprovalWorkflow.LEVEL_DECIDED: status.HTTP_400_BAD_REQUEST,
+            }[result.error_code]
+            return Response({"error": result.error}, status=error_status)
+        
+        purchase_request = result.purchase_request
+        po_info = None
         
-        if approved and purchase_request.status == PurchaseRequest.Status.APPROVED:
-            from .services import PurchaseOrderGenerator
+        if result.fully_approved:
             po, message = PurchaseOrderGenerator.generate_po(purchase_request.id)
             if po:
                 po_info = {
@@ -229,13 +522,128 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
         
         return Response(response_data)
     
+    @extend_schema(
+        tags=['Approvals'],
+        summary='Approve or reject many purchase requests',
+        description='Record approval or rejection decisions for up to 500 requests in one call. '
+                    'Each decision is validated on its own, so some may fail while the rest are recorded. '
+                    'Purchase Orders for requests that become fully approved are generated as one batch.',
+        request=BulkDecisionSerializer,
+        responses={
+            200: OpenApiResponse(description='Per-request results'),
+            400: OpenApiResponse(description='Invalid payload'),
+            403: OpenApiResponse(description='Permission denied'),
+        }
+    )
+    @action(detail=False, methods=['post'], permission_classes=[IsApproverUser])
+    def bulk_decide(self, request):
+        from .services import ApprovalWorkflow, PurchaseOrderGenerator
+        
+        serializer = BulkDecisionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        decisions = serializer.validated_data['decisions']
+        
+        results = ApprovalWorkflow.record_decisions(self.get_queryset(), request.user, decisions)
+        
+        po_results = PurchaseOrderGenerator.generate_pos([
+            purchase_request_id
+            for purchase_request_id, result in results.items()
+            if result.fully_approved
+        ])
+        
+        items = []
+        for decision in decisions:
+            result = results[decision['id']]
+            if result.error_code:
+                items.append({
+                    "id": decision['id'],
+                    "recorded": False,
+                    "error": result.error
+                })
+                continue
+            
+            item = {
+                "id": decision['id'],
+                "recorded": True,
+                "status": result.purchase_request.status
+            }
+            if decision['id'] in po_results:
+                po, message = po_results[decision['id']]
+                item["po_generated"] = po is not None
+                item["po_message"] = message
+                if po:
+                    item["po_number"] = po.po_number
+            items.append(item)
+        
+        recorded = sum(1 for item in items if item["recorded"])
+        return Response({
+            "recorded": recorded,
+            "failed": len(items) - recorded,
+            "results": items
+        })
+    
+    @extend_schema(
+        tags=['Purchase Requests'],
+        summary='Bulk create requests from proformas',
+        description='Upload many proforma documents (and/or zip archives of them) as `files`. '
+                    'Each document is extracted concurrently and every complete result becomes a '
+                    'purchase request. Other form fields (business_justification, urgency, cost_center, ...) '
+                    'are applied to all created requests. Returns a per-file report; files marked '
+                    '`retryable` were not processed (parser busy or time limit reached) and can be sent again.',
+        request={'multipart/form-data': {'type': 'object', 'properties': {
+            'files': {'type': 'array', 'items': {'type': 'string', 'format': 'binary'}},
+            'business_justification': {'type': 'string'},
+            'urgency': {'type': 'string'},
+        }}},
+        responses={
+            200: OpenApiResponse(description='Per-file ingestion report'),
+            400: OpenApiResponse(description='No files or invalid shared fields'),
+            403: OpenApiResponse(description='Permission denied'),
+        }
+    )
+    @action(detail=False, methods=['post'], permission_classes=[IsStaffUser])
+    def bulk_ingest(self, request):
+        from .ingestion import BulkProformaIngestor
+        
+        files = request.FILES.getlist('files')
+        if not files:
+            return Response(
+                {"error": "At least one file is required."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        defaults_serializer = BulkProformaDefaultsSerializer(data=request.data)
+        defaults_serializer.is_valid(raise_exception=True)
+        
+        # Documents not started within PROFORMA_INGEST_TIME_LIMIT are returned
+        # as retryable, so the response arrives before nginx's 60s read timeout
+        with BulkProformaIngestor(
+            request.user,
+            defaults=defaults_serializer.validated_data,
+            time_limit=settings.PROFORMA_INGEST_TIME_LIMIT
+        ) as ingestor:
+            for uploaded_file in files:
+                ingestor.add_file(uploaded_file.name, uploaded_file)
+            report = ingestor.run()
+        
+        created = sum(1 for entry in report if entry["created"])
+        return Response({
+            "created": created,
+            "failed": len(report) - created,
+            "retryable": sum(1 for entry in report if entry.get("retryable")),
+            "results": report
+        })
+    
     @extend_schema(
         tags=['Purchase Requests'],
         summary='Submit receipt',
         description='Submit a receipt for an approved purchase request. '
                     'The system will validate the receipt against the Purchase Order using AI '
                     'and flag any discrepancies in vendor, items, or amounts.',
-        request={'multipart/form-data': {'type': 'object', 'properties': {'receipt': {'type': 'string', 'format': 'binary'}}}},
+        request={'multipart/form-data': {'type': 'object', 'properties': {
+            'receipt': {'type': 'string', 'format': 'binary'},
+            'receipt_key': {'type': 'string', 'description': 'Key of a receipt staged through /api/uploads/'},
+        }}},
         responses={
             200: OpenApiResponse(description='Receipt submitted with validation results'),
             400: OpenApiResponse(description='Invalid request or file type'),
@@ -246,7 +654,7 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
     def submit_receipt(self, request, pk=None):
         purchase_request = self.get_object()
         
-        if purchase_request.created_by != request.user:
+        if purchase_request.created_by_id != request.user.id:
             return Response(
                 {"error": "You can only submit receipts for your own requests."},
                 status=status.HTTP_403_FORBIDDEN
@@ -258,7 +666,19 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        from .staging import open_staged, release
+        
         receipt_file = request.FILES.get('receipt')
+        staged = False
+        if not receipt_file and request.data.get('receipt_key'):
+            receipt_file = open_staged(request.data['receipt_key'], request.user)
+            staged = receipt_file is not None
+            if not staged:
+                return Response(
+                    {"error": "No staged upload found for this receipt_key."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
         if not receipt_file:
             return Response(
                 {"error": "Receipt file is required."},
@@ -273,19 +693,22 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        import tempfile
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as tmp_file:
-            for chunk in receipt_file.chunks():
-                tmp_file.write(chunk)
-            tmp_path = tmp_file.name
-        
         try:
+            from apps.documents.processors.proforma_processor import ProformaProcessor
             from apps.documents.processors.receipt_validator import ReceiptValidator
             validator = ReceiptValidator()
-            validation_result = validator.validate_receipt(purchase_request.id, tmp_path)
+            validation_result = validator.validate_receipt(
+                purchase_request.id,
+                ProformaProcessor.upload_source(receipt_file),
+                receipt_file.name
+            )
+            ReceiptValidation.record(purchase_request, validation_result)
             
             purchase_request.receipt = receipt_file
             purchase_request.save()
+            list_cache.invalidate_request(purchase_request)
+            if staged:
+                release(receipt_file)
             
             serializer = self.get_serializer(purchase_request)
             response_data = {
@@ -304,20 +727,23 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
         except Exception as e:
             purchase_request.receipt = receipt_file
             purchase_request.save()
+            list_cache.invalidate_request(purchase_request)
+            if staged:
+                release(receipt_file)
+            
+            validation_result = {
+                "valid": False,
+                "error": f"Validation error: {str(e)}",
+                "discrepancies": []
+            }
+            ReceiptValidation.record(purchase_request, validation_result)
             
             serializer = self.get_serializer(purchase_request)
             return Response({
                 "message": "Receipt submitted but validation failed",
                 "request": serializer.data,
-                "validation": {
-                    "valid": False,
-                    "error": f"Validation error: {str(e)}",
-                    "discrepancies": []
-                }
+                "validation": validation_result
             })
-        finally:
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
     
     @extend_schema(
         tags=['Purchase Requests'],
@@ -338,20 +764,106 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        from django.http import FileResponse
+        from .downloads import document_response
         po = purchase_request.purchase_order_doc
         
         try:
-            pdf_file = po.po_document.open('rb')
-            response = FileResponse(pdf_file, content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="{po.po_document.name}"'
-            return response
+            return document_response(request, po.po_document)
         except Exception as e:
             return Response(
                 {"error": f"Failed to retrieve PO document: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @extend_schema(
+        tags=['Purchase Requests'],
+        summary='Download a request document',
+        description='Download one of the files attached to a purchase request: proforma, quotation_comparison, '
+                    'specification_sheet, purchase_order, receipt, or po_document (the generated PO). '
+                    'Responses carry a content-hash ETag and support byte ranges.',
+        responses={
+            200: OpenApiResponse(description='File download'),
+            206: OpenApiResponse(description='Partial file download'),
+            304: OpenApiResponse(description='Not modified'),
+            404: OpenApiResponse(description='Document not found'),
+        }
+    )
+    @action(detail=True, methods=['get'], url_path=r'documents/(?P<field>[a-z_]+)')
+    def document(self, request, pk=None, field=None):
+        from .downloads import document_response
+        
+        if field not in self.document_fields:
+            return Response(
+                {"error": f"Unknown document. Choose one of: {', '.join(self.document_fields)}"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        purchase_request = self.get_object()
+        
+        if field == 'po_document':
+            po = getattr(purchase_request, 'purchase_order_doc', None)
+            field_file = po.po_document if po else None
+        else:
+            field_file = getattr(purchase_request, field)
+        
+        if not field_file:
+            return Response(
+                {"error": "Document not uploaded"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        try:
+            return document_response(request, field_file)
+        except FileNotFoundError:
+            return Response(
+                {"error": "Document file is missing from storage"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+    
+    @extend_schema(
+        tags=['Purchase Requests'],
+        summary='Download purchase orders as a zip',
+        description='Stream a zip of every generated Purchase Order PDF issued in the given date range. '
+                    'Finance only. Accepts the same request filters as the list endpoint.',
+        parameters=[
+            OpenApiParameter(name='issued_after', description='First issue date (YYYY-MM-DD), inclusive', required=False, type=str),
+            OpenApiParameter(name='issued_before', description='Last issue date (YYYY-MM-DD), inclusive', required=False, type=str),
+        ],
+        responses={
+            200: OpenApiResponse(description='Zip file download'),
+            400: OpenApiResponse(description='Invalid date'),
+            403: OpenApiResponse(description='Permission denied'),
+        }
+    )
+    @action(detail=False, methods=['get'], permission_classes=[IsFinanceUser])
+    def purchase_orders_zip(self, request):
+        from .zipstream import stream_zip
+        
+        purchase_orders = PurchaseOrder.objects.filter(
+            purchase_request__in=self.filter_queryset(self.get_queryset()).values('id')
+        ).exclude(po_document='').exclude(po_document__isnull=True)
+        
+        for param, lookup in (('issued_after', 'issue_date__gte'), ('issued_before', 'issue_date__lte')):
+            if request.query_params.get(param):
+                value = parse_date(request.query_params[param])
+                if value is None:
+                    return Response(
+                        {"error": f"Invalid {param} date. Use YYYY-MM-DD."},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                purchase_orders = purchase_orders.filter(**{lookup: value})
+        
+        entries = (
+            (f"{po.po_number}.pdf", po.po_document)
+            for po in purchase_orders.only('po_number', 'po_document').order_by('issue_date', 'id').iterator()
+        )
+        
+        response = StreamingHttpResponse(stream_zip(entries), content_type='application/zip')
+        filename = f"purchase_orders_{timezone.now().strftime('%Y%m%d')}.zip"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+    
     @extend_schema(
         tags=['Purchase Requests'],
         summary='Get purchase order data',
@@ -369,4 +881,308 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
         else:
             po_data['po_number'] = "Pending Generation"
         
-        return Response(po_data)
\ No newline at end of file
+        return Response(po_data)
+
+class StagedUploadViewSet(viewsets.GenericViewSet):
+    """
+    Two-step uploads. The client asks for a signed URL, PUTs the file to it
+    (nginx writes the body to the staging area and only asks Django to check
+    the signature), then passes the returned key as `proforma_key` or
+    `receipt_key`.
+    
+    Large files can instead be sent in chunks to `chunk/?offset=N` and
+    finalized with their SHA-256; an interrupted upload resumes from the
+    `received` count returned by retrieve.
+    """
+    serializer_class = StagedUploadSerializer
+    permission_classes = [IsStaffUser]
+    lookup_field = 'key'
+    lookup_value_regex = r'[0-9a-f]{32}(?:\.[a-z0-9]{1,10})?'
+    
+    def get_queryset(self):
+        return StagedUpload.objects.filter(
+            created_by_id=self.request.user.id,
+            expires_at__gt=timezone.now()
+        )
+    
+    @extend_schema(
+        tags=['Uploads'],
+        summary='Start a staged upload',
+        description='Reserve a key and get a short-lived signed URL. PUT the raw file bytes to `upload_url`, '
+                    'then reference the key as `proforma_key` when creating a request or `receipt_key` when '
+                    'submitting a receipt.',
+        responses={
+            201: StagedUploadSerializer,
+            400: OpenApiResponse(description='Unsupported file type'),
+        }
+    )
+    def create(self, request):
+        from .staging import create_upload
+        
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        staged = create_upload(
+            request.user,
+            serializer.validated_data['file_name'],
+            serializer.validated_data.get('size')
+        )
+        return Response(self.get_serializer(staged).data, status=status.HTTP_201_CREATED)
+    
+    @extend_schema(
+        tags=['Uploads'],
+        summary='Get staged upload progress',
+        description='Returns how many bytes of a resumable upload have been received, so an interrupted '
+                    'client knows which offset to continue from.',
+        responses={200: StagedUploadSerializer, 404: OpenApiResponse(description='Upload not found')}
+    )
+    def retrieve(self, request, key=None):
+        return Response(self.get_serializer(self.get_object()).data)
+    
+    @extend_schema(
+        tags=['Uploads'],
+        summary='Upload a chunk',
+        description='Append raw bytes to a resumable upload. `offset` must equal the number of bytes received '
+                    'so far; otherwise the response is 409 with the current `received` count.',
+        parameters=[
+            OpenApiParameter(name='offset', description='Byte offset of this chunk', required=True, type=int),
+        ],
+        request={'application/octet-stream': {'type': 'string', 'format': 'binary'}},
+        responses={
+            200: StagedUploadSerializer,
+            400: OpenApiResponse(description='Missing offset or upload already finalized'),
+            409: OpenApiResponse(description='Offset does not match the bytes received'),
+            413: OpenApiResponse(description='Upload exceeds its declared size'),
+        }
+    )
+    @action(detail=True, methods=['put'], parser_classes=[])
+    def chunk(self, request, key=None):
+        from .staging import spool_chunk, append_chunk
+        
+        try:
+            offset = int(request.query_params.get('offset', ''))
+        except ValueError:
+            return Response({"error": "offset is required."}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Checked again under the lock; this only avoids reading a body that
+        # would be refused
+        staged = self.get_object()
+        error = self.check_chunk_offset(staged, offset)
+        if error:
+            return error
+        
+        # The body is read before locking, so a slow client doesn't hold
+        # the row lock
+        try:
+            spool_path = spool_chunk(staged, offset, request.stream)
+        except ValueError as e:
+            return Response(
+                {"error": str(e), "received": staged.received},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        
+        try:
+            with transaction.atomic():
+                staged = self.get_object_for_update(key)
+                error = self.check_chunk_offset(staged, offset)
+                if error:
+                    return error
+                
+                try:
+                    append_chunk(staged, spool_path)
+                except ValueError as e:
+                    return Response(
+                        {"error": str(e), "received": staged.received},
+                        status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+                    )
+        finally:
+            os.unlink(spool_path)
+        
+        return Response(self.get_serializer(staged).data)
+    
+    @extend_schema(
+        tags=['Uploads'],
+        summary='Finalize a chunked upload',
+        description='Check the assembled file against its SHA-256 and make the key usable as `proforma_key` '
+                    'or `receipt_key`. On a checksum mismatch the received bytes are discarded.',
+        request=StagedUploadFinalizeSerializer,
+        responses={
+            200: StagedUploadSerializer,
+            400: OpenApiResponse(description='Incomplete upload or checksum mismatch'),
+        }
+    )
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, key=None):
+        from .staging import finalize_chunks
+        
+        serializer = StagedUploadFinalizeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        with transaction.atomic():
+            staged = self.get_object_for_update(key)
+            
+            if not staged.completed_at:
+                try:
+                    finalize_chunks(staged, serializer.validated_data['sha256'])
+                except ValueError as e:
+                    return Response(
+                        {"error": str(e), "received": staged.received},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+        
+        return Response(self.get_serializer(staged).data)
+    
+    def check_chunk_offset(self, staged, offset):
+        if staged.completed_at:
+            return Response({"error": "Upload is already finalized."}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if offset != staged.received:
+            return Response(
+                {"error": "Offset does not match the bytes received.", "received": staged.received},
+                status=status.HTTP_409_CONFLICT
+            )
+        return None
+    
+    def get_object_for_update(self, key):
+        try:
+            return self.get_queryset().select_for_update().get(key=key)
+        except StagedUpload.DoesNotExist:
+            raise Http404
+    
+    @extend_schema(
+        tags=['Uploads'],
+        summary='Upload staged file bytes',
+        description='PUT the raw file to the signed URL returned when the upload was started. '
+                    'Behind nginx this request is handled by nginx itself.',
+        request={'application/octet-stream': {'type': 'string', 'format': 'binary'}},
+        responses={
+            201: OpenApiResponse(description='File staged'),
+            403: OpenApiResponse(description='Invalid or expired upload URL'),
+            413: OpenApiResponse(description='File too large'),
+        }
+    )
+    @action(
+        detail=False,
+        methods=['put'],
+        url_path=r'staging/(?P<key>[0-9a-f]{32}(?:\.[a-z0-9]{1,10})?)',
+        authentication_classes=[],
+        permission_classes=[permissions.AllowAny],
+        parser_classes=[]
+    )
+    def staging(self, request, key=None):
+        from .staging import check_token, receive
+        
+        if not check_token(key, request.query_params.get('token', '')):
+            return Response({"error": "Invalid or expired upload URL."}, status=status.HTTP_403_FORBIDDEN)
+        
+        try:
+            size = receive(key, request.stream)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        
+        return Response({"key": key, "size": size}, status=status.HTTP_201_CREATED)
+    
+    @extend_schema(exclude=True)
+    @action(detail=False, methods=['get'], authentication_classes=[], permission_classes=[permissions.AllowAny])
+    def authorize(self, request):
+        """
+        nginx auth_request target for PUTs to the staging location.
+        """
+        from urllib.parse import parse_qs, urlsplit
+        from .staging import check_token
+        
+        original_uri = urlsplit(request.headers.get('X-Original-URI', ''))
+        key = original_uri.path.rstrip('/').rsplit('/', 1)[-1]
+        token = parse_qs(original_uri.query).get('token', [''])[0]
+        
+        if not check_token(key, token):
+            return Response(status=status.HTTP_403_FORBIDDEN)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@extend_schema_view(
+    list=extend_schema(
+        tags=['Receipt Validation'],
+        summary='List receipt discrepancies',
+        description='Discrepancies found when receipts were validated against their purchase orders, newest first. '
+                    'Finance only. Comma-separated values are accepted for `severity` and `field`.',
+        parameters=[
+            OpenApiParameter(name='severity', description='low, medium or high', required=False, type=str),
+            OpenApiParameter(name='field', description='e.g. total_amount, vendor_name, item_price', required=False, type=str),
+            OpenApiParameter(name='purchase_request', required=False, type=int),
+            OpenApiParameter(name='latest', description='Only the latest validation of each receipt', required=False, type=bool),
+            OpenApiParameter(name='created_after', description='ISO-8601 datetime', required=False, type=str),
+            OpenApiParameter(name='created_before', description='ISO-8601 datetime', required=False, type=str),
+        ],
+    ),
+)
+class ReceiptDiscrepancyViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Audit view over stored receipt validation results.
+    """
+    serializer_class = ReceiptDiscrepancySerializer
+    permission_classes = [IsFinanceUser]
+    
+    def get_queryset(self):
+        return ReceiptDiscrepancy.objects.select_related('validation', 'purchase_request')
+    
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        params = self.request.query_params
+        
+        if params.get('severity'):
+            severities = params['severity'].split(',')
+            if not set(severities) <= set(ReceiptDiscrepancy.Severity.values):
+                raise serializers.ValidationError({"severity": "Must be low, medium or high."})
+            queryset = queryset.filter(severity__in=severities)
+        if params.get('field'):
+            queryset = queryset.filter(field__in=params['field'].split(','))
+        if params.get('purchase_request'):
+            if not params['purchase_request'].isdigit():
+                raise serializers.ValidationError({"purchase_request": "Must be a request id."})
+            queryset = queryset.filter(purchase_request_id=params['purchase_request'])
+        if params.get('latest', '').lower() in ('1', 'true'):
+            queryset = queryset.filter(validation__is_latest=True)
+        
+        for param, lookup in (('created_after', 'created_at__gte'), ('created_before', 'created_at__lt')):
+            if params.get(param):
+                value = parse_datetime(params[param])
+                if value is None:
+                    raise serializers.ValidationError({param: "Invalid ISO-8601 datetime."})
+                if timezone.is_naive(value):
+                    value = timezone.make_aware(value)
+                queryset = queryset.filter(**{lookup: value})
+        
+        return queryset
+
+
+class VendorViewSet(viewsets.GenericViewSet):
+    """
+    Vendor lookup for the request form.
+    """
+    serializer_class = VendorSerializer
+    # Autocomplete returns a short ranked list, not pages
+    pagination_class = None
+    
+    MAX_LIMIT = 20
+    
+    @extend_schema(
+        tags=['Vendors'],
+        summary='Autocomplete vendors',
+        description='Known vendors matching `q`, best match first, with the spelling that matched. '
+                    'Name case, punctuation and legal suffixes such as "Ltd" are ignored; queries of three '
+                    'or more characters also match misspellings.',
+        parameters=[
+            OpenApiParameter(name='q', description='Start of, or approximate, vendor name', required=True, type=str),
+            OpenApiParameter(name='limit', description=f'Results to return (default 10, max {MAX_LIMIT})', required=False, type=int),
+        ],
+        responses={200: VendorSerializer(many=True)},
+    )
+    def list(self, request):
+        from .vendors import search_vendors
+        
+        limit = request.query_params.get('limit', '10')
+        if not limit.isdigit() or not 1 <= int(limit) <= self.MAX_LIMIT:
+            raise serializers.ValidationError({"limit": f"Must be between 1 and {self.MAX_LIMIT}."})
+        
+        vendors = search_vendors(request.query_params.get('q', ''), limit=int(limit))
+        return Response(self.get_serializer(vendors, many=True).data)
@@ -0,0 +1,116 @@
+"""
+Versioned cache for role-scoped purchase request list and summary responses.
+
+Every role scope (a staff member's own requests, an L1 approver's direct
+reports, or the global view shared by L2 approvers and finance) has a version
+counter. Cached responses are keyed by the current version of their scope, so
+a write only has to bump the counters it touches; stale entries are never
+looked up again and simply expire.
+
+Versions only work when every worker sees the same counters, so nothing is
+cached with a per-process backend such as LocMemCache.
+"""
+import hashlib
+import secrets
+import time
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+
+GLOBAL_SCOPE = 'global'
+
+
+def get_user_scope(user):
+    """
+    Return the scope whose data the user's list and summary responses depend on
+    """
+    if user.is_staff_role:
+        return f'user:{user.id}'
+    if user.is_approver_level_1:
+        return f'manager:{user.id}'
+    return GLOBAL_SCOPE
+
+
+def get_request_scopes(purchase_request):
+    """
+    Return every scope a purchase request is visible in
+    """
+    created_by = purchase_request.created_by
+    scopes = [f'user:{created_by.id}', GLOBAL_SCOPE]
+    if created_by.manager_id:
+        scopes.append(f'manager:{created_by.manager_id}')
+    return scopes
+
+
+def get_scope_version(scope):
+    key = _version_key(scope)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock rather than 1 so a counter that was evicted
+        # never comes back at a version that still has entries cached.
+        cache.add(key, _fresh_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_scope_version(scope):
+    # A new unique version rather than incr(), which is not atomic on the
+    # file and database backends: of two concurrent bumps one may win, but
+    # either way the old version is never read again.
+    cache.set(_version_key(scope), _fresh_version(), timeout=None)
+
+
+def invalidate_scopes(scopes):
+    """
+    Bump the given scopes once the current transaction commits, so a reader
+    can't repopulate the new version with uncommitted data
+    """
+    scopes = set(scopes)
+    transaction.on_commit(lambda: [bump_scope_version(scope) for scope in scopes])
+
+
+def invalidate_request(purchase_request):
+    invalidate_scopes(get_request_scopes(purchase_request))
+
+
+def build_response_key(request, name):
+    """
+    Cache key for a list-style response of the requesting user's scope
+    """
+    user = request.user
+    scope = get_user_scope(user)
+    version = get_scope_version(scope)
+    # Serialized file fields are absolute URLs, so the host is part of the key.
+    digest = hashlib.md5(
+        f'{request.get_host()}{request.get_full_path()}'.encode()
+    ).hexdigest()
+    return f'purchases:{name}:{user.role}:{scope}:v{version}:{digest}'
+
+
+def is_shared_cache():
+    """
+    Whether the default cache is seen by every worker process
+    """
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def get_cached_response(key):
+    if not is_shared_cache():
+        return None
+    return cache.get(key)
+
+
+def set_cached_response(key, data):
+    if is_shared_cache():
+        cache.set(key, data, settings.PURCHASE_LIST_CACHE_TIMEOUT)
+
+
+def _version_key(scope):
+    return f'purchases:version:{scope}'
+
+
+def _fresh_version():
+    return f'{time.time_ns():x}{secrets.token_hex(4)}'
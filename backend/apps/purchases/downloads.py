@@ -0,0 +1,134 @@
+import hashlib
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import content_disposition_header, parse_etags, quote_etag
+
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+# A document URL serves whatever file the field holds now (a resubmitted
+# receipt, a replaced proforma), so browsers must revalidate every time;
+# the content-hash ETag makes that a 304 while the file is unchanged.
+# `private` keeps shared caches out of it.
+CACHE_CONTROL = 'private, no-cache'
+
+
+def get_content_hash(field_file):
+    """
+    SHA-256 of the stored file, cached by name, size and modification time so
+    the file is only read once.
+    """
+    storage = field_file.storage
+    modified = storage.get_modified_time(field_file.name).timestamp()
+    key = "document_hash:" + hashlib.md5(
+        f"{field_file.name}:{field_file.size}:{modified}".encode()
+    ).hexdigest()
+    
+    content_hash = cache.get(key)
+    if content_hash is None:
+        digest = hashlib.sha256()
+        with storage.open(field_file.name, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+        content_hash = digest.hexdigest()
+        cache.set(key, content_hash, None)
+    
+    return content_hash
+
+
+def document_response(request, field_file, as_attachment=True):
+    """
+    Serve a stored document with a content-hash ETag.
+    
+    With DOCUMENT_ACCEL_REDIRECT_PREFIX set, the body is left to nginx via
+    X-Accel-Redirect (sendfile and range requests included). Otherwise the
+    file is streamed from Django, honouring a single byte range.
+    """
+    etag = quote_etag(get_content_hash(field_file))
+    filename = os.path.basename(field_file.name)
+    
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        response['Cache-Control'] = CACHE_CONTROL
+        return response
+    
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    
+    if settings.DOCUMENT_ACCEL_REDIRECT_PREFIX:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.DOCUMENT_ACCEL_REDIRECT_PREFIX + quote(field_file.name)
+    else:
+        response = _stream_file(request, field_file, etag, content_type)
+    
+    response['ETag'] = etag
+    response['Cache-Control'] = CACHE_CONTROL
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+    return response
+
+
+def _stream_file(request, field_file, etag, content_type):
+    size = field_file.size
+    start, end = 0, size - 1
+    byte_range = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    
+    if byte_range and (not if_range or if_range == etag):
+        parsed = _parse_range(byte_range, size)
+        if parsed is None:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        start, end = parsed
+    
+    response = StreamingHttpResponse(
+        _read_range(field_file, start, end - start + 1),
+        content_type=content_type,
+    )
+    response['Content-Length'] = str(end - start + 1)
+    
+    if (start, end) != (0, size - 1):
+        response.status_code = 206
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    
+    return response
+
+
+def _parse_range(header, size):
+    """
+    Parse a single `bytes=` range into inclusive offsets, or None when it
+    cannot be satisfied. Multi-range and malformed headers get the whole file.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return 0, size - 1
+    
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start = max(size - int(last), 0)
+        end = size - 1
+    
+    if start > end or start >= size:
+        return None
+    return start, end
+
+
+def _read_range(field_file, start, length):
+    with field_file.storage.open(field_file.name, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
@@ -0,0 +1,151 @@
+import hashlib
+import math
+import random
+import re
+from datetime import timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.utils import timezone
+from .models import PurchaseRequest
+
+
+WORD_RE = re.compile(r'\w+')
+STOPWORDS = {
+    'a', 'an', 'and', 'the', 'of', 'for', 'with', 'to', 'in', 'on', 'at', 'by', 'from', 'or',
+    'pc', 'pcs', 'ea', 'each', 'unit', 'units', 'qty', 'x',
+}
+
+# MinHash over the set of words: the share of equal values between two
+# signatures estimates the Jaccard similarity of the texts. Stored values,
+# so these constants cannot change without recomputing every request.
+NUM_PERMUTATIONS = 64
+MERSENNE_PRIME = (1 << 61) - 1
+_random = random.Random(8191)
+_PERMUTATIONS = [
+    (_random.randrange(1, MERSENNE_PRIME), _random.randrange(0, MERSENNE_PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+# LSH: 16 bands of 4 values. Texts sharing at least one band key are
+# candidates; at 0.6 similarity that is ~89% of pairs, at 0.8 nearly all.
+BAND_ROWS = 4
+
+# Amounts are bucketed on a log scale, 10% per bucket, so any two amounts
+# within DUPLICATE_AMOUNT_TOLERANCE (at most 10%) are in adjacent buckets
+AMOUNT_BUCKET_RATIO = 1.1
+
+# Candidates from the index that are compared in full
+MAX_CANDIDATES = 50
+
+
+def amount_bucket(amount):
+    if amount is None or amount <= 0:
+        return None
+    return math.floor(math.log(float(amount)) / math.log(AMOUNT_BUCKET_RATIO))
+
+
+def minhash_signature(text):
+    words = {
+        word for word in WORD_RE.findall(str(text or '').casefold())
+        if len(word) > 1 and word not in STOPWORDS
+    }
+    if not words:
+        return []
+    
+    hashes = [int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest(), 'big') for word in words]
+    return [
+        min((a * value + b) % MERSENNE_PRIME for value in hashes)
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def signature_bands(signature):
+    bands = []
+    for band, start in enumerate(range(0, len(signature), BAND_ROWS)):
+        rows = ','.join(str(value) for value in signature[start:start + BAND_ROWS])
+        # The band number is part of the key, so equal rows in different
+        # bands do not collide
+        digest = hashlib.blake2b(f"{band}:{rows}".encode(), digest_size=8).digest()
+        bands.append(int.from_bytes(digest, 'big', signed=True))
+    return bands
+
+
+def signature_similarity(signature, other_signature):
+    if not signature or len(signature) != len(other_signature):
+        return 0.0
+    return sum(value == other_value for value, other_value in zip(signature, other_signature)) / len(signature)
+
+
+def set_duplicate_keys(purchase_request, items=None):
+    """
+    Fill the request's amount bucket and text signatures from its amount,
+    description and extracted line item descriptions. Does not save.
+    """
+    text = '\n'.join(
+        [purchase_request.description or '']
+        + [str(item.get('description') or '') for item in items or [] if isinstance(item, dict)]
+    )
+    purchase_request.amount_bucket = amount_bucket(purchase_request.amount)
+    purchase_request.text_signature = minhash_signature(text)
+    purchase_request.signature_bands = signature_bands(purchase_request.text_signature)
+
+
+def find_duplicates(purchase_request, limit=5):
+    """
+    Earlier requests that are likely the same purchase: same vendor, amount
+    within DUPLICATE_AMOUNT_TOLERANCE, created within
+    DUPLICATE_WINDOW_DAYS, and description similarity of at least
+    DUPLICATE_TEXT_SIMILARITY. Most similar first.
+    
+    The (vendor, amount_bucket, created_at) index narrows the search to a
+    few rows and the shared LSH band filters those, so the cost does not
+    grow with the number of requests.
+    """
+    if not purchase_request.vendor_id or purchase_request.amount_bucket is None \
+            or not purchase_request.signature_bands:
+        return []
+    
+    bucket = purchase_request.amount_bucket
+    created_at = purchase_request.created_at or timezone.now()
+    candidates = (
+        PurchaseRequest.objects.filter(
+            vendor_id=purchase_request.vendor_id,
+            amount_bucket__in=[bucket - 1, bucket, bucket + 1],
+            created_at__gte=created_at - timedelta(days=settings.DUPLICATE_WINDOW_DAYS),
+            created_at__lte=created_at,
+            signature_bands__overlap=purchase_request.signature_bands
+        )
+        .exclude(id=purchase_request.id)
+        .only('id', 'title', 'amount', 'status', 'created_at', 'text_signature')
+        .order_by('-created_at')[:MAX_CANDIDATES]
+    )
+    
+    amount = Decimal(str(purchase_request.amount))
+    duplicates = []
+    for candidate in candidates:
+        if abs(candidate.amount - amount) > amount * Decimal(str(settings.DUPLICATE_AMOUNT_TOLERANCE)):
+            continue
+        
+        similarity = signature_similarity(purchase_request.text_signature, candidate.text_signature)
+        if similarity >= settings.DUPLICATE_TEXT_SIMILARITY:
+            duplicates.append({
+                "request_id": candidate.id,
+                "title": candidate.title,
+                "amount": candidate.amount,
+                "status": candidate.status,
+                "created_at": candidate.created_at,
+                "similarity": round(similarity, 2),
+            })
+    
+    duplicates.sort(key=lambda duplicate: duplicate["similarity"], reverse=True)
+    return duplicates[:limit]
+
+
+def duplicate_warnings(purchase_request):
+    """
+    find_duplicates() as warning messages for an API response.
+    """
+    return [
+        {**duplicate, "message": f"Possible duplicate of request #{duplicate['request_id']} \"{duplicate['title']}\""}
+        for duplicate in find_duplicates(purchase_request)
+    ]
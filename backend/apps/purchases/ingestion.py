@@ -0,0 +1,248 @@
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from .models import PurchaseRequest, LineItem
+from .serializers import PurchaseRequestCreateSerializer
+from .vendors import resolve_vendor_ids
+from .duplicates import set_duplicate_keys, duplicate_warnings
+from . import cache as list_cache
+
+
+class BulkProformaIngestor:
+    """
+    Create purchase requests from a batch of proforma documents.
+    
+    Files (or the members of zip archives) are spooled to a private temp
+    directory, extracted concurrently with ProformaProcessor, and every
+    complete result is inserted with a single bulk_create. `run()` returns a
+    report with one entry per document.
+    
+    Documents that could not be parsed because the parser was busy, or
+    were not started within `time_limit` seconds, are reported with
+    `retryable` so they can be sent again.
+    
+    Use as a context manager so the temp directory is always removed.
+    """
+    ALLOWED_EXTENSIONS = ['.pdf', '.doc', '.docx', '.txt']
+    
+    def __init__(self, user, defaults=None, max_workers=None, time_limit=None):
+        self.user = user
+        self.defaults = defaults or {}
+        self.max_workers = max_workers or settings.PROFORMA_INGEST_WORKERS
+        if settings.DOCUMENT_PARSER_WORKERS > 0:
+            # More threads than sandbox slots would only queue on the pool
+            # and fail once its busy timeout runs out
+            self.max_workers = min(self.max_workers, settings.DOCUMENT_PARSER_WORKERS)
+        self.time_limit = time_limit
+        self._deadline = None
+        self.documents = []
+        self.report = []
+        self._workdir = tempfile.mkdtemp(prefix='proforma_ingest_')
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.cleanup()
+    
+    def cleanup(self):
+        shutil.rmtree(self._workdir, ignore_errors=True)
+    
+    def add_file(self, name, fileobj, in_archive=False):
+        """
+        Queue one uploaded or local file. Zip archives are expanded; archives
+        inside archives are not.
+        """
+        extension = os.path.splitext(name)[1].lower()
+        
+        if extension == '.zip' and in_archive:
+            self.report.append({
+                "file": name,
+                "created": False,
+                "error": "Archives inside archives are not supported."
+            })
+        elif extension == '.zip':
+            self._add_archive(name, fileobj)
+        elif extension in self.ALLOWED_EXTENSIONS:
+            self._spool(name, fileobj)
+        else:
+            self.report.append({
+                "file": name,
+                "created": False,
+                "error": f"Unsupported file format. Please upload: {', '.join(self.ALLOWED_EXTENSIONS + ['.zip'])}"
+            })
+    
+    def _add_archive(self, name, fileobj):
+        try:
+            with zipfile.ZipFile(fileobj) as archive:
+                for info in archive.infolist():
+                    if info.is_dir():
+                        continue
+                    
+                    member_name = f"{name}/{info.filename}"
+                    if info.file_size > settings.PROFORMA_INGEST_MAX_FILE_SIZE:
+                        self.report.append({
+                            "file": member_name,
+                            "created": False,
+                            "error": "File is too large."
+                        })
+                        continue
+                    
+                    with archive.open(info) as member:
+                        self.add_file(member_name, member, in_archive=True)
+        except zipfile.BadZipFile:
+            self.report.append({
+                "file": name,
+                "created": False,
+                "error": "Invalid zip archive."
+            })
+    
+    def _spool(self, name, fileobj):
+        if len(self.documents) >= settings.PROFORMA_INGEST_MAX_FILES:
+            self.report.append({
+                "file": name,
+                "created": False,
+                "error": f"Batch is limited to {settings.PROFORMA_INGEST_MAX_FILES} documents."
+            })
+            return
+        
+        extension = os.path.splitext(name)[1].lower()
+        path = os.path.join(self._workdir, f"{len(self.documents)}{extension}")
+        
+        with open(path, 'wb') as destination:
+            if hasattr(fileobj, 'chunks'):
+                for chunk in fileobj.chunks():
+                    destination.write(chunk)
+            else:
+                shutil.copyfileobj(fileobj, destination)
+        
+        self.documents.append({"file": name, "path": path})
+    
+    def run(self):
+        if not self.documents:
+            return self.report
+        
+        if self.time_limit:
+            self._deadline = time.monotonic() + self.time_limit
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            extracted = list(executor.map(self._extract, self.documents))
+        
+        pending = []
+        for document, extracted_data in zip(self.documents, extracted):
+            entry = {"file": document["file"], "created": False}
+            self.report.append(entry)
+            
+            if extracted_data.get('retryable'):
+                entry["error"] = extracted_data['error']
+                entry["retryable"] = True
+                continue
+            
+            if extracted_data.get('error'):
+                entry["error"] = f"Failed to extract data from document: {extracted_data['error']}"
+                continue
+            
+            data = self._build_request_data(document, extracted_data)
+            missing_fields = [
+                label
+                for field, label in PurchaseRequestCreateSerializer.PROFORMA_REQUIRED_FIELDS.items()
+                if not data.get(field)
+            ]
+            if missing_fields:
+                entry["missing_fields"] = missing_fields
+                continue
+            
+            try:
+                data['amount'] = Decimal(str(data['amount']))
+            except (InvalidOperation, ValueError):
+                entry["error"] = f"Invalid amount: {data['amount']}"
+                continue
+            
+            if data['amount'] <= 0:
+                entry["error"] = "Amount must be greater than 0."
+                continue
+            
+            pending.append((entry, document, data, extracted_data.get('items')))
+        
+        self._create_requests(pending)
+        return self.report
+    
+    def _extract(self, document):
+        from apps.documents.processors.proforma_processor import ProformaProcessor
+        
+        if self._deadline and time.monotonic() > self._deadline:
+            return {'error': "Batch ran out of time before this document, try again", 'retryable': True}
+        
+        try:
+            return ProformaProcessor().extract_data(document["path"])
+        except Exception as e:
+            return {'error': str(e)}
+    
+    def _build_request_data(self, document, extracted_data):
+        data = {key: value for key, value in self.defaults.items() if value}
+        
+        for extracted_field, model_field in PurchaseRequestCreateSerializer.EXTRACTED_FIELD_MAPPING.items():
+            if extracted_data.get(extracted_field) and not data.get(model_field):
+                data[model_field] = extracted_data[extracted_field]
+        
+        if not data.get('title'):
+            data['title'] = os.path.splitext(os.path.basename(document["file"]))[0][:200]
+        
+        if not data.get('description') and extracted_data.get('items'):
+            data['description'] = "\n".join(
+                str(item.get('description'))
+                for item in extracted_data['items']
+                if item.get('description')
+            )
+        
+        return data
+    
+    def _create_requests(self, pending):
+        if not pending:
+            return
+        
+        # One lookup for the vendors of the whole batch
+        vendor_ids = resolve_vendor_ids({data.get('vendor_name') for _, _, data, _ in pending}, create=True)
+        
+        handles = []
+        try:
+            purchase_requests = []
+            for entry, document, data, items in pending:
+                handle = open(document["path"], 'rb')
+                handles.append(handle)
+                purchase_request = PurchaseRequest(
+                    created_by_id=self.user.id,
+                    vendor_id=vendor_ids.get(data.get('vendor_name')),
+                    proforma=File(handle, name=os.path.basename(document["file"])),
+                    **data
+                )
+                set_duplicate_keys(purchase_request, items)
+                purchase_requests.append(purchase_request)
+            
+            # FileField.pre_save stores each proforma as the rows are inserted.
+            with transaction.atomic():
+                PurchaseRequest.objects.bulk_create(purchase_requests)
+                LineItem.objects.bulk_create([
+                    line_item
+                    for (_, _, _, items), purchase_request in zip(pending, purchase_requests)
+                    for line_item in LineItem.build(purchase_request, LineItem.Source.REQUEST, items)
+                ])
+                list_cache.invalidate_request(purchase_requests[0])
+        finally:
+            for handle in handles:
+                handle.close()
+        
+        for (entry, _, _, _), purchase_request in zip(pending, purchase_requests):
+            entry["created"] = True
+            entry["request_id"] = purchase_request.id
+            # Earlier documents of the same batch count as duplicates too
+            warnings = duplicate_warnings(purchase_request)
+            if warnings:
+                entry["duplicate_warnings"] = warnings
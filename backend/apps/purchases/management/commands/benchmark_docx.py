@@ -0,0 +1,95 @@
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+from django.core.management.base import BaseCommand
+from apps.documents.processors.docx_stream import iter_docx_blocks
+
+
+class Command(BaseCommand):
+    help = 'Compare the streaming DOCX extractor with python-docx on speed and peak memory'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help='Benchmark this .docx instead of a generated one')
+        parser.add_argument('--paragraphs', type=int, default=3000, help='Paragraphs in the generated document')
+        parser.add_argument('--table-rows', type=int, default=500, help='Line item table rows in the generated document')
+        parser.add_argument('--image-mb', type=int, default=20, help='Size of the image embedded in the generated document')
+        parser.add_argument('--runs', type=int, default=3, help='Timed runs per extractor; the fastest is reported')
+    
+    def handle(self, *args, **options):
+        if options['file']:
+            self.compare(options['file'], options['runs'])
+            return
+        
+        with tempfile.TemporaryDirectory() as workdir:
+            path = os.path.join(workdir, 'benchmark.docx')
+            self.generate(path, options['paragraphs'], options['table_rows'], options['image_mb'])
+            self.compare(path, options['runs'])
+    
+    def generate(self, path, paragraphs, table_rows, image_mb):
+        import docx
+        from docx.shared import Inches
+        from PIL import Image
+        
+        document = docx.Document()
+        for index in range(paragraphs):
+            document.add_paragraph(f"Paragraph {index}: terms, delivery notes and other proforma text.")
+        
+        table = document.add_table(rows=table_rows + 1, cols=3)
+        for cell, header in zip(table.rows[0].cells, ('Description', 'Qty', 'Unit price')):
+            cell.text = header
+        for index, row in enumerate(table.rows[1:]):
+            for cell, value in zip(row.cells, (f"Item {index}", str(index % 9 + 1), f"{index % 90 + 10}.00")):
+                cell.text = value
+        
+        if image_mb:
+            # Noise does not compress, so the PNG is about as large as asked
+            side = int((image_mb * 1024 * 1024 / 3) ** 0.5)
+            image = io.BytesIO()
+            Image.frombytes('RGB', (side, side), os.urandom(side * side * 3)).save(image, 'PNG')
+            image.seek(0)
+            document.add_picture(image, width=Inches(4))
+        
+        document.save(path)
+        self.stdout.write(
+            f"Generated {os.path.getsize(path) / (1024 * 1024):.1f}MB document with {paragraphs} paragraphs "
+            f"and {table_rows} table rows"
+        )
+    
+    def compare(self, path, runs):
+        extractors = {
+            'streaming (docx_stream)': lambda: '\n'.join(iter_docx_blocks(path)),
+            'python-docx paragraphs': lambda: self.python_docx_text(path, tables=False),
+            'python-docx paragraphs + tables': lambda: self.python_docx_text(path, tables=True),
+        }
+        
+        for name, extract in extractors.items():
+            # Timed without tracing, which slows allocation-heavy code
+            seconds = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                text = extract()
+                seconds.append(time.perf_counter() - started)
+            
+            tracemalloc.start()
+            extract()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            
+            self.stdout.write(
+                f"{name}: {min(seconds):.2f}s, {peak / (1024 * 1024):.1f}MB peak traced memory, "
+                f"{len(text):,} characters"
+            )
+    
+    @staticmethod
+    def python_docx_text(path, tables):
+        import docx
+        
+        document = docx.Document(path)
+        lines = [paragraph.text for paragraph in document.paragraphs]
+        if tables:
+            for table in document.tables:
+                for row in table.rows:
+                    lines.append('\t'.join(cell.text for cell in row.cells))
+        return '\n'.join(lines)
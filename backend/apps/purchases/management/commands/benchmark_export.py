@@ -0,0 +1,102 @@
+import os
+import resource
+import time
+from decimal import Decimal
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory, force_authenticate
+from apps.users.models import User
+from apps.purchases.api import PurchaseRequestViewSet
+from apps.purchases.models import PurchaseRequest
+
+BENCHMARK_TITLE = 'benchmark export row'
+
+
+def current_rss():
+    """
+    Resident set size in bytes. Read from /proc so that it can fall as well
+    as rise; elsewhere the process peak is the best available.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Command(BaseCommand):
+    help = 'Measure rows per second and memory of the streaming request export'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help='Username the export runs as (role scoping applies)')
+        parser.add_argument('--export-format', choices=['csv', 'ndjson'], default='csv')
+        parser.add_argument(
+            '--create',
+            type=int,
+            default=0,
+            help='Insert this many synthetic requests owned by the user first (export them as that user or a '
+                 'level 2 approver); they are deleted afterwards'
+        )
+        parser.add_argument('--runs', type=int, default=3, help='Times the export is read')
+    
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' does not exist")
+        
+        if settings.DEBUG:
+            self.stdout.write(self.style.WARNING("DEBUG is on: every query is kept in memory, so RSS is not meaningful"))
+        
+        try:
+            if options['create']:
+                self.create_rows(user, options['create'])
+            
+            for run in range(1, options['runs'] + 1):
+                rows, size, seconds, rss_start, rss_peak = self.export(user, options['export_format'])
+                self.stdout.write(
+                    f"run {run}: {rows} rows, {size / (1024 * 1024):.1f}MB in {seconds:.2f}s "
+                    f"({rows / seconds if seconds else 0:,.0f} rows/s), "
+                    f"RSS {rss_start / (1024 * 1024):.1f}MB -> peak {rss_peak / (1024 * 1024):.1f}MB"
+                )
+        finally:
+            if options['create']:
+                PurchaseRequest.objects.filter(created_by=user, title=BENCHMARK_TITLE).delete()
+    
+    def create_rows(self, user, count, batch_size=5000):
+        for start in range(0, count, batch_size):
+            PurchaseRequest.objects.bulk_create([
+                PurchaseRequest(
+                    title=BENCHMARK_TITLE,
+                    description=f"Synthetic request {start + offset} for export benchmarking",
+                    amount=Decimal(100 + (start + offset) % 900),
+                    vendor_name='Benchmark Supplies',
+                    created_by=user
+                )
+                for offset in range(min(batch_size, count - start))
+            ])
+        self.stdout.write(f"Created {count} synthetic requests")
+    
+    def export(self, user, export_format):
+        request = APIRequestFactory().get('/api/requests/export/', {'export_format': export_format})
+        force_authenticate(request, user=user)
+        view = PurchaseRequestViewSet.as_view({'get': 'export'})
+        
+        rss_start = rss_peak = current_rss()
+        started = time.perf_counter()
+        response = view(request)
+        if response.status_code != 200:
+            raise CommandError(f"Export failed with status {response.status_code}")
+        
+        lines = 0
+        size = 0
+        for index, chunk in enumerate(response.streaming_content):
+            lines += chunk.count(b'\n')
+            size += len(chunk)
+            if index % 10000 == 0:
+                rss_peak = max(rss_peak, current_rss())
+        seconds = time.perf_counter() - started
+        rss_peak = max(rss_peak, current_rss())
+        
+        rows = lines - 1 if export_format == 'csv' else lines
+        return rows, size, seconds, rss_start, rss_peak
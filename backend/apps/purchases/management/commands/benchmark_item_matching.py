@@ -0,0 +1,91 @@
+import random
+import re
+import time
+from django.core.management.base import BaseCommand
+from apps.documents.processors.item_matching import match_items
+
+MATERIALS = ['steel', 'stainless', 'galvanised', 'brass', 'nylon', 'aluminium', 'zinc plated', 'black oxide']
+PRODUCTS = [
+    'hex bolt', 'hex nut', 'washer', 'wood screw', 'machine screw', 'anchor bolt', 'cable tie',
+    'pipe clamp', 'hinge', 'bracket', 'threaded rod', 'rivet', 'toner cartridge', 'copy paper ream',
+]
+FINISHES = ['assembly', 'pack', 'box', 'set', 'kit']
+VOWEL_RE = re.compile(r'(?<=\w)[aeiou]')
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the match rate and time of PO-to-receipt line item matching on synthetic lines, '
+        'shuffled and partly abbreviated on the receipt side'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            default='1000,2000,5000',
+            help='Comma-separated numbers of lines per side'
+        )
+        parser.add_argument(
+            '--abbreviated',
+            type=float,
+            default=0.4,
+            help='Share of receipt lines whose words are reordered and abbreviated'
+        )
+        parser.add_argument('--runs', type=int, default=3, help='Runs per size; the fastest is reported')
+        parser.add_argument('--seed', type=int, default=42, help='Seed for the generated lines')
+    
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        
+        for size in [int(size) for size in options['sizes'].split(',')]:
+            po_items, receipt_items = self.make_lines(rng, size, options['abbreviated'])
+            
+            seconds = []
+            for _ in range(options['runs']):
+                started = time.perf_counter()
+                report = match_items(po_items, receipt_items)
+                seconds.append(time.perf_counter() - started)
+            
+            correct = sum(pair['po_item']['sku'] == pair['receipt_item']['sku'] for pair in report['matched'])
+            self.stdout.write(
+                f"{size} lines per side: {min(seconds):.2f}s, "
+                f"{len(report['matched']) / size:.1%} paired, {correct / size:.1%} paired correctly, "
+                f"{len(report['unmatched_po'])} PO and {len(report['unmatched_receipt'])} receipt lines unmatched"
+            )
+    
+    def make_lines(self, rng, size, abbreviated):
+        """
+        PO lines with distinct descriptions, and the same lines as a
+        receipt would list them: in another order and, for some, with
+        the words reordered and abbreviated and the part number left off
+        ("HX BLT STL M8x20 BX"). The `sku` key tells which PO line each
+        receipt line is.
+        """
+        po_items = []
+        for sku in range(size):
+            dimension = f"M{rng.choice([4, 5, 6, 8, 10, 12])}x{rng.randint(10, 120)}"
+            description = (
+                f"{rng.choice(MATERIALS)} {rng.choice(PRODUCTS)} {dimension} "
+                f"{rng.choice(FINISHES)} PN{rng.randint(10000, 99999)}-{sku}"
+            )
+            po_items.append({
+                'sku': sku,
+                'description': description,
+                'quantity': rng.randint(1, 500),
+                'unit_price': round(rng.uniform(0.05, 200), 2),
+            })
+        
+        receipt_items = []
+        for item in po_items:
+            description = item['description']
+            if rng.random() < abbreviated:
+                words = description.split()[:-1]
+                rng.shuffle(words)
+                description = ' '.join(
+                    VOWEL_RE.sub('', word) if word.isalpha() and rng.random() < 0.6 else word
+                    for word in words
+                ).upper()
+            receipt_items.append({**item, 'description': description})
+        rng.shuffle(receipt_items)
+        
+        return po_items, receipt_items
@@ -0,0 +1,235 @@
+import io
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from apps.documents.processors.docx_stream import DOCUMENT_PART
+from apps.documents.processors.sandbox import ParserPool
+from apps.purchases.management.commands.benchmark_export import current_rss
+
+W_NAMESPACE = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+DOCUMENT_START = f'<?xml version="1.0"?><w:document xmlns:w="{W_NAMESPACE}"><w:body>'
+DOCUMENT_END = '</w:body></w:document>'
+
+# What a web worker does between documents: build and serialise a page of results
+PROBE_ROWS = [
+    {"id": index, "title": f"Request {index}", "amount": "125.00", "status": "pending"}
+    for index in range(200)
+]
+PROBE_INTERVAL = 0.005
+
+
+class Command(BaseCommand):
+    help = (
+        'Feed pathological documents (zip and XML bombs, a huge and a corrupt PDF, an oversized image) '
+        'through the parser sandbox and measure the latency of work in this process meanwhile'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--bomb-mb', type=int, default=300, help='Uncompressed size of the DOCX zip bomb')
+        parser.add_argument('--pdf-pages', type=int, default=2000, help='Pages in the huge PDF')
+        parser.add_argument('--image-side', type=int, default=12000, help='Width and height of the oversized image')
+        parser.add_argument(
+            '--timeout',
+            type=int,
+            default=10,
+            help='Per-document deadline (DOCUMENT_PARSER_TIMEOUT is used in production)'
+        )
+        parser.add_argument(
+            '--rounds',
+            type=int,
+            default=2,
+            help='Times the corpus is parsed, to exercise worker reuse'
+        )
+        parser.add_argument('--baseline-seconds', type=float, default=3, help='How long to probe with no parsing')
+        parser.add_argument(
+            '--in-process',
+            action='store_true',
+            help='Also parse the corpus once in this process, as with DOCUMENT_PARSER_WORKERS=0. There is no '
+                 'deadline or memory limit there, so keep the corpus small'
+        )
+    
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as workdir:
+            corpus = self.make_corpus(workdir, options)
+            for path in corpus:
+                self.stdout.write(f"  {os.path.basename(path)}: {os.path.getsize(path) / (1024 * 1024):.1f}MB")
+            
+            pool = ParserPool(
+                size=max(1, settings.DOCUMENT_PARSER_WORKERS),
+                timeout=options['timeout'],
+                memory_limit_mb=settings.DOCUMENT_PARSER_MEMORY_LIMIT_MB,
+                cpu_seconds=settings.DOCUMENT_PARSER_CPU_SECONDS,
+                max_tasks=settings.DOCUMENT_PARSER_MAX_TASKS
+            )
+            # Start the forkserver before measuring, as a running web worker would have
+            pool.extract_text(io.BytesIO(b'warm up'), 'warm_up.txt')
+            
+            rss_before = current_rss()
+            baseline = self.probe(lambda: time.sleep(options['baseline_seconds']))
+            self.report('Web worker latency, idle', baseline)
+            
+            results = []
+            
+            def parse_corpus():
+                with ThreadPoolExecutor(max_workers=max(1, settings.DOCUMENT_PARSER_WORKERS)) as executor:
+                    for _ in range(options['rounds']):
+                        results.extend(executor.map(lambda path: self.parse(pool, path), corpus))
+            
+            loaded = self.probe(parse_corpus)
+            self.report('Web worker latency, parsing the corpus in the sandbox', loaded)
+            
+            for name, seconds, result in results:
+                outcome = 'complete' if result.complete else f"partial ({result.error})"
+                self.stdout.write(f"  {name}: {seconds:.2f}s, {len(result.text):,} characters, {outcome}")
+            self.stdout.write(
+                f"Web worker RSS {rss_before / (1024 * 1024):.1f}MB before, "
+                f"{current_rss() / (1024 * 1024):.1f}MB after"
+            )
+            
+            if options['in_process']:
+                self.parse_in_process(corpus)
+    
+    def parse_in_process(self, corpus):
+        from apps.documents.processors.proforma_processor import ProformaProcessor
+        
+        processor = ProformaProcessor()
+        timings = []
+        
+        def parse_corpus():
+            for path in corpus:
+                started = time.perf_counter()
+                text = ''.join(processor._iter_text(path))
+                timings.append((os.path.basename(path), time.perf_counter() - started, len(text)))
+        
+        rss_before = current_rss()
+        latencies = self.probe(parse_corpus)
+        self.report('Web worker latency, parsing the corpus in-process', latencies)
+        for name, seconds, characters in timings:
+            self.stdout.write(f"  {name}: {seconds:.2f}s, {characters:,} characters")
+        self.stdout.write(
+            f"Web worker RSS {rss_before / (1024 * 1024):.1f}MB before, "
+            f"{current_rss() / (1024 * 1024):.1f}MB after"
+        )
+    
+    @staticmethod
+    def parse(pool, path):
+        started = time.perf_counter()
+        result = pool.extract_text(path, path)
+        return os.path.basename(path), time.perf_counter() - started, result
+    
+    @staticmethod
+    def probe(workload):
+        """
+        Run `workload` while a thread repeatedly times a small request-sized
+        job in this process. Returns the job latencies in seconds.
+        """
+        latencies = []
+        stop = threading.Event()
+        
+        def run_probe():
+            while not stop.is_set():
+                started = time.perf_counter()
+                json.dumps(PROBE_ROWS)
+                latencies.append(time.perf_counter() - started)
+                time.sleep(PROBE_INTERVAL)
+        
+        thread = threading.Thread(target=run_probe)
+        thread.start()
+        try:
+            workload()
+        finally:
+            stop.set()
+            thread.join()
+        return latencies
+    
+    def report(self, label, latencies):
+        latencies = sorted(latencies)
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        self.stdout.write(
+            f"{label}: {len(latencies)} probes, p50 {statistics.median(latencies) * 1000:.2f}ms, "
+            f"p99 {p99 * 1000:.2f}ms, max {latencies[-1] * 1000:.2f}ms"
+        )
+    
+    def make_corpus(self, workdir, options):
+        self.stdout.write('Generating the corpus:')
+        return [
+            self.make_proforma(os.path.join(workdir, 'proforma.pdf'), pages=2),
+            self.make_zip_bomb(os.path.join(workdir, 'zip_bomb.docx'), options['bomb_mb']),
+            self.make_xml_bomb(os.path.join(workdir, 'xml_bomb.docx')),
+            self.make_proforma(os.path.join(workdir, 'huge.pdf'), pages=options['pdf_pages']),
+            self.make_corrupt_pdf(os.path.join(workdir, 'corrupt.pdf')),
+            self.make_oversized_image(os.path.join(workdir, 'oversized.png'), options['image_side']),
+        ]
+    
+    @staticmethod
+    def make_proforma(path, pages):
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfgen import canvas
+        
+        pdf = canvas.Canvas(path, pagesize=A4)
+        for page in range(pages):
+            pdf.drawString(50, 800, f"PROFORMA INVOICE - Acme Supplies Ltd - page {page + 1}")
+            for line in range(50):
+                item = page * 50 + line
+                pdf.drawString(50, 770 - line * 14, f"Item {item}  Office chair ergonomic  2 x 150.00 = 300.00")
+            pdf.showPage()
+        pdf.save()
+        return path
+    
+    @staticmethod
+    def make_zip_bomb(path, size_mb):
+        """
+        A DOCX whose document.xml is `size_mb` of paragraphs and compresses
+        to a small fraction of that.
+        """
+        paragraph = '<w:p><w:r><w:t>Office chair ergonomic 2 x 150.00</w:t></w:r></w:p>'
+        chunk = (paragraph * (1024 * 1024 // len(paragraph))).encode()
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            with archive.open(DOCUMENT_PART, 'w', force_zip64=True) as document:
+                document.write(DOCUMENT_START.encode())
+                for _ in range(size_mb):
+                    document.write(chunk)
+                document.write(DOCUMENT_END.encode())
+        return path
+    
+    @staticmethod
+    def make_xml_bomb(path):
+        # "Billion laughs": nine levels of entities, each ten of the one below
+        entities = ['<!ENTITY lol0 "lol">'] + [
+            f'<!ENTITY lol{level} "{f"&lol{level - 1};" * 10}">' for level in range(1, 10)
+        ]
+        document = (
+            f'<?xml version="1.0"?><!DOCTYPE w:document [{"".join(entities)}]>'
+            f'<w:document xmlns:w="{W_NAMESPACE}"><w:body>'
+            '<w:p><w:r><w:t>&lol9;</w:t></w:r></w:p>'
+            f'{DOCUMENT_END}'
+        )
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr(DOCUMENT_PART, document)
+        return path
+    
+    def make_corrupt_pdf(self, path):
+        # A real PDF cut in half, with the rest replaced by noise
+        self.make_proforma(path, pages=20)
+        with open(path, 'r+b') as pdf:
+            size = os.path.getsize(path)
+            pdf.seek(size // 2)
+            pdf.write(os.urandom(size - size // 2))
+        return path
+    
+    @staticmethod
+    def make_oversized_image(path, side):
+        # Mostly blank, so the PNG is small but decodes to side * side bytes
+        from PIL import Image, ImageDraw
+        
+        image = Image.new('L', (side, side), 255)
+        ImageDraw.Draw(image).text((100, 100), 'PROFORMA INVOICE  Total 300.00', fill=0)
+        image.save(path)
+        return path
@@ -0,0 +1,141 @@
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+from django.core.management.base import BaseCommand
+from apps.documents.processors.proforma_processor import ProformaProcessor
+from apps.purchases.storage import DeduplicatingFileSystemStorage
+
+READ_SIZE = 64 * 1024
+
+
+def bytes_written():
+    """
+    Bytes this process has passed to write() so far, or None where
+    /proc/self/io is not available.
+    """
+    try:
+        with open('/proc/self/io') as io_stats:
+            for line in io_stats:
+                if line.startswith('wchar:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure bytes written and peak memory from receiving an upload to storing it, reading the '
+        'document once as the extractors do, for the previous re-spooling path and the current one. '
+        'Parsing itself is the same in both and is left out.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes-mb',
+            default='1,8,20',
+            help='Comma-separated upload sizes; sizes over FILE_UPLOAD_MAX_MEMORY_SIZE arrive as temp files'
+        )
+        parser.add_argument('--runs', type=int, default=3, help='Runs per size and path; the fastest is reported')
+    
+    def handle(self, *args, **options):
+        from django.conf import settings
+        
+        workdir = tempfile.mkdtemp(prefix='upload_benchmark_')
+        try:
+            storage = DeduplicatingFileSystemStorage(location=os.path.join(workdir, 'media'))
+            
+            for size_mb in [float(size) for size in options['sizes_mb'].split(',')]:
+                size = int(size_mb * 1024 * 1024)
+                on_disk = size > settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+                
+                for name, pipeline in (('previous', self.previous_pipeline), ('current', self.current_pipeline)):
+                    best = None
+                    for run in range(options['runs']):
+                        # New content every run, so storage never deduplicates it
+                        upload = self.make_upload(os.urandom(size), on_disk, workdir)
+                        result = self.measure(pipeline, upload, storage, f"run{run}_{name}.pdf")
+                        upload.close()
+                        if best is None or result[0] < best[0]:
+                            best = result
+                    
+                    seconds, written, peak = best
+                    self.stdout.write(
+                        f"{size_mb:g}MB {'temp file' if on_disk else 'in memory'} upload, {name} path: "
+                        f"{seconds * 1000:.1f}ms, "
+                        f"{'n/a' if written is None else f'{written / size:.2f}x the upload'} written, "
+                        f"{peak / (1024 * 1024):.1f}MB peak traced memory"
+                    )
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    
+    def make_upload(self, content, on_disk, workdir):
+        if not on_disk:
+            return SimpleUploadedFile('proforma.pdf', content, content_type='application/pdf')
+        
+        # As Django's TemporaryFileUploadHandler leaves it, in the same
+        # filesystem as the storage so the final save can be a rename
+        upload = TemporaryUploadedFile('proforma.pdf', 'application/pdf', len(content), None)
+        upload.file.close()
+        upload.file = tempfile.NamedTemporaryFile(suffix='.upload.pdf', dir=workdir)
+        upload.file.write(content)
+        upload.file.flush()
+        upload.seek(0)
+        return upload
+    
+    def measure(self, pipeline, upload, storage, name):
+        written_before = bytes_written()
+        tracemalloc.start()
+        started = time.perf_counter()
+        
+        stored_name = pipeline(upload, storage, name)
+        
+        seconds = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        written_after = bytes_written()
+        
+        storage.delete(stored_name)
+        written = None if written_before is None else written_after - written_before
+        return seconds, written, peak
+    
+    @staticmethod
+    def read_source(source):
+        if isinstance(source, str):
+            with open(source, 'rb') as f:
+                while f.read(READ_SIZE):
+                    pass
+        else:
+            source.seek(0)
+            while source.read(READ_SIZE):
+                pass
+    
+    def previous_pipeline(self, upload, storage, name):
+        """
+        The upload is copied into a NamedTemporaryFile for the extractors,
+        then saved to storage.
+        """
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
+            for chunk in upload.chunks():
+                tmp_file.write(chunk)
+            tmp_path = tmp_file.name
+        try:
+            self.read_source(tmp_path)
+        finally:
+            os.unlink(tmp_path)
+        
+        upload.seek(0)
+        return storage.save(name, upload)
+    
+    def current_pipeline(self, upload, storage, name):
+        """
+        The extractors read the upload where Django holds it, then it is
+        saved to storage.
+        """
+        self.read_source(ProformaProcessor.upload_source(upload))
+        
+        upload.seek(0)
+        return storage.save(name, upload)
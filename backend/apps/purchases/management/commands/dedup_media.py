@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from apps.purchases.storage import deduplicate, document_storage
+
+
+class Command(BaseCommand):
+    help = 'Replace duplicate files under MEDIA_ROOT with hard links to one content-addressed blob'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would be reclaimed without changing any files'
+        )
+    
+    def handle(self, *args, **options):
+        report = deduplicate(document_storage, dry_run=options['dry_run'])
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {report['files']} files, linked {report['linked']} duplicates, "
+            f"reclaimed {report['bytes_reclaimed'] / (1024 * 1024):.1f}MB"
+            + (' (dry run)' if options['dry_run'] else '')
+        ))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from apps.purchases.storage import collect_garbage, document_storage
+
+
+class Command(BaseCommand):
+    help = 'Delete stored document names no row references and blobs nothing links to'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-seconds',
+            type=int,
+            default=3600,
+            help='Leave files changed more recently than this alone'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would be deleted without deleting anything'
+        )
+    
+    def handle(self, *args, **options):
+        report = collect_garbage(
+            document_storage,
+            grace_seconds=options['grace_seconds'],
+            dry_run=options['dry_run']
+        )
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Removed {report['unreferenced_names']} unreferenced names and {report['blobs']} blobs, "
+            f"reclaimed {report['bytes_reclaimed'] / (1024 * 1024):.1f}MB"
+            + (' (dry run)' if options['dry_run'] else '')
+        ))
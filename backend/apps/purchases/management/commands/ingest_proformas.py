@@ -0,0 +1,70 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from apps.users.models import User
+from apps.purchases.ingestion import BulkProformaIngestor
+from apps.purchases.serializers import BulkProformaDefaultsSerializer
+
+
+class Command(BaseCommand):
+    help = 'Create purchase requests from proforma files, directories or zip archives'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='Proforma files, zip archives or directories')
+        parser.add_argument('--user', required=True, help='Username of the staff member the requests belong to')
+        parser.add_argument('--workers', type=int, default=None, help='Number of concurrent extractions')
+        parser.add_argument('--business-justification', default='')
+        parser.add_argument('--urgency', default='')
+        parser.add_argument('--cost-center', default='')
+        parser.add_argument('--project-code', default='')
+    
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' does not exist")
+        
+        if not user.is_staff_role:
+            raise CommandError("Only staff users can create purchase requests.")
+        
+        defaults_serializer = BulkProformaDefaultsSerializer(data={
+            key: value for key, value in {
+                'business_justification': options['business_justification'],
+                'urgency': options['urgency'],
+                'cost_center': options['cost_center'],
+                'project_code': options['project_code'],
+            }.items() if value
+        })
+        if not defaults_serializer.is_valid():
+            raise CommandError(defaults_serializer.errors)
+        
+        with BulkProformaIngestor(user, defaults=defaults_serializer.validated_data, max_workers=options['workers']) as ingestor:
+            for path in self._expand_paths(options['paths']):
+                with open(path, 'rb') as fileobj:
+                    ingestor.add_file(path, fileobj)
+            report = ingestor.run()
+        
+        for entry in report:
+            if entry["created"]:
+                self.stdout.write(f"{entry['file']}: created request #{entry['request_id']}")
+                for warning in entry.get("duplicate_warnings", []):
+                    self.stdout.write(self.style.WARNING(f"  {warning['message']}"))
+            elif entry.get("retryable"):
+                self.stdout.write(self.style.WARNING(f"{entry['file']}: {entry['error']}"))
+            elif entry.get("missing_fields"):
+                self.stdout.write(f"{entry['file']}: missing {', '.join(entry['missing_fields'])}")
+            else:
+                self.stdout.write(f"{entry['file']}: {entry['error']}")
+        
+        created = sum(1 for entry in report if entry["created"])
+        self.stdout.write(self.style.SUCCESS(f"Created {created} of {len(report)} requests"))
+    
+    def _expand_paths(self, paths):
+        for path in paths:
+            if os.path.isdir(path):
+                for root, _, filenames in os.walk(path):
+                    for filename in sorted(filenames):
+                        yield os.path.join(root, filename)
+            elif os.path.isfile(path):
+                yield path
+            else:
+                raise CommandError(f"No such file or directory: {path}")
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from apps.purchases.staging import purge_expired
+
+
+class Command(BaseCommand):
+    help = 'Delete expired staged uploads and orphaned files in the staging area'
+    
+    def handle(self, *args, **options):
+        removed = purge_expired()
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} staged files'))
@@ -0,0 +1,204 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Prefetch
+
+
+# Pool processes import this module before django.setup() has run, so
+# models are only imported inside functions.
+def _init_worker():
+    import django
+    django.setup()
+
+
+def _extract_receipt(task):
+    """
+    Runs in a pool process: extract one receipt file. Only the extraction
+    happens here; the database is left to the command process.
+    """
+    purchase_request_id, path, file_name = task
+    from apps.documents.processors.receipt_validator import ReceiptValidator
+    
+    try:
+        return purchase_request_id, ReceiptValidator()._extract_receipt_data(path, file_name)
+    except Exception as e:
+        return purchase_request_id, {"error": f"Receipt extraction failed: {str(e)}"}
+
+
+class Command(BaseCommand):
+    help = 'Re-validate stored receipts against their purchase orders in batches'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help='Number of requests validated and written per batch'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Extraction processes (0 extracts in this process)'
+        )
+        parser.add_argument(
+            '--after-id',
+            type=int,
+            default=0,
+            help='Resume after this purchase request id, as printed after each batch'
+        )
+        parser.add_argument(
+            '--re-extract',
+            action='store_true',
+            help='Extract every receipt again instead of reusing the last successful extraction'
+        )
+        parser.add_argument('--amount-tolerance', type=float, help='Overrides RECEIPT_AMOUNT_TOLERANCE')
+        parser.add_argument('--amount-high-tolerance', type=float, help='Overrides RECEIPT_AMOUNT_HIGH_TOLERANCE')
+        parser.add_argument('--quantity-tolerance', type=float, help='Overrides RECEIPT_ITEM_QUANTITY_TOLERANCE')
+        parser.add_argument('--price-tolerance', type=float, help='Overrides RECEIPT_ITEM_PRICE_TOLERANCE')
+    
+    def handle(self, *args, **options):
+        from apps.documents.processors.receipt_validator import ReceiptValidator
+        
+        validator = ReceiptValidator(
+            amount_tolerance=options['amount_tolerance'],
+            amount_high_tolerance=options['amount_high_tolerance'],
+            quantity_tolerance=options['quantity_tolerance'],
+            price_tolerance=options['price_tolerance']
+        )
+        totals = {"validated": 0, "reused": 0, "extracted": 0, "invalid": 0, "errors": 0}
+        
+        executor = None
+        if options['workers'] > 0:
+            # forkserver: workers never inherit this process's database connection
+            executor = ProcessPoolExecutor(
+                max_workers=options['workers'],
+                mp_context=get_context('forkserver'),
+                initializer=_init_worker
+            )
+        
+        last_id = options['after_id']
+        try:
+            while True:
+                batch = self.get_batch(last_id, options['batch_size'])
+                if not batch:
+                    break
+                
+                self.validate_batch(batch, validator, executor, options['re_extract'], totals)
+                last_id = batch[-1].id
+                self.stdout.write(
+                    f"Validated {totals['validated']} receipts; resume with --after-id {last_id}"
+                )
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Re-validated {totals['validated']} receipts ({totals['reused']} from stored extractions, "
+            f"{totals['extracted']} extracted): {totals['invalid']} invalid, {totals['errors']} errors"
+        ))
+    
+    def get_batch(self, last_id, batch_size):
+        from apps.purchases.models import PurchaseRequest, ReceiptValidation
+        
+        return list(
+            PurchaseRequest.objects.filter(id__gt=last_id, purchase_order_doc__isnull=False)
+            .exclude(receipt='')
+            .exclude(receipt__isnull=True)
+            .select_related('purchase_order_doc')
+            .prefetch_related(
+                'line_items',
+                Prefetch(
+                    'receipt_validations',
+                    queryset=ReceiptValidation.objects.filter(is_latest=True),
+                    to_attr='latest_validations'
+                )
+            )
+            .order_by('id')[:batch_size]
+        )
+    
+    def validate_batch(self, batch, validator, executor, re_extract, totals):
+        from apps.purchases.models import LineItem
+        
+        receipt_data = {}
+        to_extract = []
+        for purchase_request in batch:
+            stored = None if re_extract else self.stored_receipt_data(purchase_request)
+            if stored is None:
+                to_extract.append((purchase_request.id, purchase_request.receipt.path, purchase_request.receipt.name))
+            else:
+                receipt_data[purchase_request.id] = stored
+        
+        if executor:
+            extracted = dict(executor.map(_extract_receipt, to_extract))
+        else:
+            extracted = dict(map(_extract_receipt, to_extract))
+        receipt_data.update(extracted)
+        totals["reused"] += len(batch) - len(to_extract)
+        totals["extracted"] += len(to_extract)
+        
+        results = []
+        receipt_lines = []
+        for purchase_request in batch:
+            data = receipt_data[purchase_request.id]
+            if data.get('error'):
+                result = {"valid": False, "error": data['error']}
+                totals["errors"] += 1
+            else:
+                result = validator._compare_po_receipt(validator._get_po_data(purchase_request), data)
+                if purchase_request.id in extracted:
+                    receipt_lines.extend(LineItem.build(purchase_request, LineItem.Source.RECEIPT, data.get('items')))
+            results.append((purchase_request, result))
+            totals["invalid"] += not result.get('valid')
+        
+        self.write_batch(results, receipt_lines, [
+            purchase_request_id for purchase_request_id, data in extracted.items() if not data.get('error')
+        ])
+        totals["validated"] += len(batch)
+    
+    def write_batch(self, results, receipt_lines, extracted_ids):
+        """
+        Store a batch of runs with one insert per table, replacing the
+        receipt lines of re-extracted requests.
+        """
+        from apps.purchases.models import LineItem, ReceiptValidation, ReceiptDiscrepancy
+        
+        validations = [ReceiptValidation.build(purchase_request, result) for purchase_request, result in results]
+        
+        with transaction.atomic():
+            ReceiptValidation.clear_latest([purchase_request.id for purchase_request, _ in results])
+            ReceiptValidation.objects.bulk_create(validations)
+            ReceiptDiscrepancy.objects.bulk_create([
+                discrepancy
+                for validation, (_, result) in zip(validations, results)
+                for discrepancy in ReceiptDiscrepancy.build(validation, result.get('discrepancies'))
+            ])
+            
+            LineItem.objects.filter(
+                purchase_request_id__in=extracted_ids,
+                source=LineItem.Source.RECEIPT
+            ).delete()
+            LineItem.objects.bulk_create(receipt_lines)
+    
+    def stored_receipt_data(self, purchase_request):
+        """
+        The receipt data of the latest successful validation, or None when
+        the receipt has to be extracted.
+        """
+        from apps.purchases.models import LineItem
+        
+        latest = purchase_request.latest_validations[0] if purchase_request.latest_validations else None
+        if latest is None or latest.error:
+            return None
+        
+        return {
+            "vendor_name": latest.receipt_vendor_name or None,
+            "total_amount": float(latest.receipt_total_amount) if latest.receipt_total_amount is not None else None,
+            "items": [
+                line_item.as_dict()
+                for line_item in purchase_request.line_items.all()
+                if line_item.source == LineItem.Source.RECEIPT
+            ],
+        }
@@ -0,0 +1,101 @@
+import os
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.purchases.models import PurchaseOrder, PurchaseRequest
+
+
+class Command(BaseCommand):
+    help = 'Move existing request and PO documents into the sharded upload layout in batches'
+    
+    FILE_FIELDS = [
+        (PurchaseRequest, ['proforma', 'quotation_comparison', 'specification_sheet', 'purchase_order', 'receipt']),
+        (PurchaseOrder, ['po_document']),
+    ]
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of rows moved per batch'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0,
+            help='Seconds to pause between batches to limit I/O load'
+        )
+    
+    def handle(self, *args, **options):
+        moved = 0
+        
+        for model, field_names in self.FILE_FIELDS:
+            for field_name in field_names:
+                field = model._meta.get_field(field_name)
+                last_id = 0
+                
+                while True:
+                    rows = list(
+                        model.objects.filter(id__gt=last_id)
+                        .exclude(**{field_name: ''})
+                        .exclude(**{f"{field_name}__isnull": True})
+                        .order_by('id')
+                        .values_list('id', field_name, 'created_at')[:options['batch_size']]
+                    )
+                    if not rows:
+                        break
+                    last_id = rows[-1][0]
+                    
+                    moved += self.move_batch(model, field, rows)
+                    if options['sleep']:
+                        time.sleep(options['sleep'])
+        
+        self.stdout.write(self.style.SUCCESS(f'Moved {moved} files into the sharded layout'))
+    
+    def move_batch(self, model, field, rows):
+        """
+        Link each file at its new name, repoint the row only if it still holds
+        the old name, and unlink old names once no row refers to them. Readers
+        find the file under either name throughout.
+        """
+        storage = field.storage
+        updates = []
+        
+        for pk, old_name, created_at in rows:
+            if field.upload_to.is_sharded(old_name) or not storage.exists(old_name):
+                continue
+            
+            instance = model(id=pk, created_at=created_at)
+            new_name = storage.get_available_name(
+                field.generate_filename(instance, os.path.basename(old_name)),
+                max_length=field.max_length
+            )
+            new_path = storage.path(new_name)
+            os.makedirs(os.path.dirname(new_path), exist_ok=True)
+            os.link(storage.path(old_name), new_path)
+            updates.append((pk, old_name, new_name))
+        
+        moved = 0
+        old_names = set()
+        with transaction.atomic():
+            for pk, old_name, new_name in updates:
+                if model.objects.filter(id=pk, **{field.name: old_name}).update(**{field.name: new_name}):
+                    moved += 1
+                    old_names.add(old_name)
+                else:
+                    storage.delete(new_name)
+        
+        for old_name in old_names - self.referenced(old_names):
+            storage.delete(old_name)
+        
+        return moved
+    
+    def referenced(self, names):
+        referenced = set()
+        for model, field_names in self.FILE_FIELDS:
+            for field_name in field_names:
+                referenced.update(
+                    model.objects.filter(**{f"{field_name}__in": names}).values_list(field_name, flat=True)
+                )
+        return referenced
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.purchases.models import PurchaseRequest, PurchaseOrder
+from apps.purchases.vendors import resolve_vendor_ids
+
+
+class Command(BaseCommand):
+    help = 'Link requests and purchase orders to vendor master records, creating vendors for new names'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows resolved and updated per batch'
+        )
+    
+    def handle(self, *args, **options):
+        for model in (PurchaseRequest, PurchaseOrder):
+            linked = self.link(model, options['batch_size'])
+            self.stdout.write(f"Linked {linked} {model._meta.verbose_name_plural} to vendors")
+        
+        self.stdout.write(self.style.SUCCESS("Vendor links are up to date"))
+    
+    def link(self, model, batch_size):
+        """
+        Walk unlinked rows by id, resolving each batch's names in one lookup.
+        """
+        linked = 0
+        last_id = 0
+        while True:
+            batch = list(
+                model.objects.filter(id__gt=last_id, vendor__isnull=True)
+                .exclude(vendor_name='')
+                .only('id', 'vendor_name')
+                .order_by('id')[:batch_size]
+            )
+            if not batch:
+                return linked
+            last_id = batch[-1].id
+            
+            with transaction.atomic():
+                vendor_ids = resolve_vendor_ids({row.vendor_name for row in batch}, create=True)
+                for row in batch:
+                    row.vendor_id = vendor_ids.get(row.vendor_name)
+                resolved = [row for row in batch if row.vendor_id]
+                model.objects.bulk_update(resolved, ['vendor'])
+            linked += len(resolved)
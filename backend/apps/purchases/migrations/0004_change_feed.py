@@ -0,0 +1,50 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('purchases', '0003_purchaseorder_po_data_file'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletedPurchaseRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('request_id', models.BigIntegerField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected')], max_length=20)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'purchase_request_tombstones',
+                'ordering': ['-deleted_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='approval',
+            index=models.Index(fields=['created_at'], name='approvals_created_223946_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['updated_at'], name='purchase_or_updated_3993ba_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaserequest',
+            index=models.Index(fields=['updated_at'], name='purchase_re_updated_e174aa_idx'),
+        ),
+        migrations.AddField(
+            model_name='deletedpurchaserequest',
+            name='created_by',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='deletedpurchaserequest',
+            index=models.Index(fields=['deleted_at'], name='purchase_re_deleted_644b42_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchases', '0005_staged_uploads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stagedupload',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='stagedupload',
+            name='received',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='stagedupload',
+            name='sha256',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='stagedupload',
+            name='size',
+            field=models.PositiveBigIntegerField(blank=True, help_text='Expected size in bytes', null=True),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:52
+
+import apps.purchases.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchases', '0006_resumable_uploads'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='purchaseorder',
+            name='po_document',
+            field=models.FileField(blank=True, help_text='Generated PO document', null=True, storage=apps.purchases.storage.DeduplicatingFileSystemStorage(), upload_to='purchase_orders/'),
+        ),
+        migrations.AlterField(
+            model_name='purchaserequest',
+            name='proforma',
+            field=models.FileField(blank=True, null=True, storage=apps.purchases.storage.DeduplicatingFileSystemStorage(), upload_to='proformas/'),
+        ),
+        migrations.AlterField(
+            model_name='purchaserequest',
+            name='purchase_order',
+            field=models.FileField(blank=True, null=True, storage=apps.purchases.storage.DeduplicatingFileSystemStorage(), upload_to='purchase_orders/'),
+        ),
+        migrations.AlterField(
+            model_name='purchaserequest',
+            name='quotation_comparison',
+            field=models.FileField(blank=True, null=True, storage=apps.purchases.storage.DeduplicatingFileSystemStorage(), upload_to='quotations/'),
+        ),
+        migrations.AlterField(
+            model_name='purchaserequest',
+            name='receipt',
+            field=models.FileField(blank=True, null=True, storage=apps.purchases.storage.DeduplicatingFileSystemStorage(), upload_to='receipts/'),
+        ),
+        migrations.AlterField(
+            model_name='purchaserequest',
+            name='specification_sheet',
+            field=models.FileField(blank=True, null=True, storage=apps.purchases.storage.DeduplicatingFileSystemStorage(), upload_to='specifications/'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchases', '0008_sharded_upload_paths'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purchaserequest',
+            name='quotation_data',
+            field=models.JSONField(blank=True, help_text='Vendors and prices extracted from the quotation comparison', null=True),
+        ),
+        migrations.AddField(
+            model_name='purchaserequest',
+            name='specification_data',
+            field=models.JSONField(blank=True, help_text='Text and specifications extracted from the specification sheet', null=True),
+        ),
+    ]
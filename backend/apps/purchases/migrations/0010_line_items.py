@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchases', '0009_attachment_data'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LineItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('request', 'Request'), ('purchase_order', 'Purchase Order'), ('receipt', 'Receipt')], max_length=20)),
+                ('position', models.PositiveIntegerField()),
+                ('description', models.CharField(max_length=500)),
+                ('quantity', models.DecimalField(decimal_places=3, default=1, max_digits=12)),
+                ('unit_price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('total_price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('purchase_request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='line_items', to='purchases.purchaserequest')),
+            ],
+            options={
+                'db_table': 'line_items',
+                'ordering': ['purchase_request_id', 'source', 'position'],
+                'indexes': [models.Index(fields=['purchase_request', 'source', 'position'], name='line_items_purchas_306a4e_idx')],
+            },
+        ),
+    ]
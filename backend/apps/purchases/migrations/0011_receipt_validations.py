@@ -0,0 +1,75 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchases', '0010_line_items'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReceiptValidation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('valid', models.BooleanField()),
+                ('error', models.TextField(blank=True)),
+                ('po_number', models.CharField(blank=True, max_length=50)),
+                ('receipt_vendor_name', models.CharField(blank=True, max_length=200)),
+                ('receipt_total_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('item_matching', models.JSONField(blank=True, null=True)),
+                ('is_latest', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('purchase_request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='receipt_validations', to='purchases.purchaserequest')),
+            ],
+            options={
+                'db_table': 'receipt_validations',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ReceiptDiscrepancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(max_length=50)),
+                ('severity', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High')], max_length=10)),
+                ('po_value', models.TextField(blank=True)),
+                ('receipt_value', models.TextField(blank=True)),
+                ('message', models.TextField()),
+                ('created_at', models.DateTimeField()),
+                ('purchase_request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='purchases.purchaserequest')),
+                ('validation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='discrepancies', to='purchases.receiptvalidation')),
+            ],
+            options={
+                'db_table': 'receipt_discrepancies',
+                'ordering': ['-created_at', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='receiptvalidation',
+            index=models.Index(fields=['purchase_request', 'is_latest'], name='receipt_val_purchas_8092aa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='receiptvalidation',
+            index=models.Index(fields=['valid', 'created_at'], name='receipt_val_valid_a3ac2c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='receiptvalidation',
+            index=models.Index(fields=['created_at'], name='receipt_val_created_13a14b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='receiptdiscrepancy',
+            index=models.Index(fields=['severity', 'created_at'], name='receipt_dis_severit_3ca2f1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='receiptdiscrepancy',
+            index=models.Index(fields=['field', 'created_at'], name='receipt_dis_field_a02b54_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='receiptdiscrepancy',
+            index=models.Index(fields=['created_at'], name='receipt_dis_created_05b87e_idx'),
+        ),
+    ]
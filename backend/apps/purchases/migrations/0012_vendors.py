@@ -0,0 +1,55 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:16
+
+from django.contrib.postgres.operations import TrigramExtension
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchases', '0011_receipt_validations'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.CreateModel(
+            name='Vendor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('normalized_name', models.CharField(max_length=200, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'vendors',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='purchaseorder',
+            name='vendor',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='purchase_orders', to='purchases.vendor'),
+        ),
+        migrations.AddField(
+            model_name='purchaserequest',
+            name='vendor',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='purchase_requests', to='purchases.vendor'),
+        ),
+        migrations.CreateModel(
+            name='VendorAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('normalized_name', models.CharField(max_length=200, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='purchases.vendor')),
+            ],
+            options={
+                'db_table': 'vendor_aliases',
+                'ordering': ['normalized_name'],
+                'indexes': [models.Index(fields=['normalized_name'], name='vendor_alias_prefix_idx', opclasses=['varchar_pattern_ops']), django.contrib.postgres.indexes.GinIndex(fields=['normalized_name'], name='vendor_alias_trgm_idx', opclasses=['gin_trgm_ops'])],
+            },
+        ),
+    ]
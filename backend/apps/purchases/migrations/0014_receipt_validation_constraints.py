@@ -0,0 +1,44 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:40
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def repair_receipt_validations(apps, schema_editor):
+    # Runs that raced each other could both be latest; keep the newest
+    ReceiptValidation = apps.get_model('purchases', 'ReceiptValidation')
+    ReceiptDiscrepancy = apps.get_model('purchases', 'ReceiptDiscrepancy')
+    
+    duplicated = (
+        ReceiptValidation.objects.filter(is_latest=True)
+        .values('purchase_request_id')
+        .annotate(newest_id=Max('id'), count=models.Count('id'))
+        .filter(count__gt=1)
+    )
+    for row in duplicated:
+        ReceiptValidation.objects.filter(
+            purchase_request_id=row['purchase_request_id'],
+            is_latest=True,
+            id__lt=row['newest_id']
+        ).update(is_latest=False)
+    
+    ReceiptDiscrepancy.objects.exclude(severity__in=['low', 'medium', 'high']).update(severity='medium')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchases', '0013_duplicate_detection'),
+    ]
+
+    operations = [
+        migrations.RunPython(repair_receipt_validations, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='receiptdiscrepancy',
+            constraint=models.CheckConstraint(check=models.Q(('severity__in', ['low', 'medium', 'high'])), name='receipt_discrepancy_severity_valid'),
+        ),
+        migrations.AddConstraint(
+            model_name='receiptvalidation',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_latest', True)), fields=('purchase_request',), name='receipt_validation_one_latest'),
+        ),
+    ]
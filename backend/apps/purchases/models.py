@@ -1,5 +1,50 @@
+from decimal import Decimal, InvalidOperation
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.conf import settings
+from .storage import ShardedUploadTo, document_storage
+
+
+class Vendor(models.Model):
+    """
+    Vendor master record. Every spelling seen for the vendor is a
+    VendorAlias, keyed by its normalized name; see vendors.py.
+    """
+    name = models.CharField(max_length=200)
+    normalized_name = models.CharField(max_length=200, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'vendors'
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+
+
+class VendorAlias(models.Model):
+    vendor = models.ForeignKey(
+        Vendor,
+        on_delete=models.CASCADE,
+        related_name='aliases'
+    )
+    name = models.CharField(max_length=200)
+    normalized_name = models.CharField(max_length=200, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'vendor_aliases'
+        ordering = ['normalized_name']
+        indexes = [
+            # Prefix lookups for short autocomplete queries
+            models.Index(fields=['normalized_name'], name='vendor_alias_prefix_idx', opclasses=['varchar_pattern_ops']),
+            # Similarity and substring lookups
+            GinIndex(fields=['normalized_name'], name='vendor_alias_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} -> {self.vendor}"
 
 
 class PurchaseRequest(models.Model):
@@ -21,6 +66,13 @@ class PurchaseRequest(models.Model):
     urgency = models.CharField(max_length=20, choices=Urgency.choices, default=Urgency.NORMAL)
     
     vendor_name = models.CharField(max_length=200, blank=True)
+    vendor = models.ForeignKey(
+        Vendor,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='purchase_requests'
+    )
     vendor_contact = models.CharField(max_length=200, blank=True)
     vendor_address = models.TextField(blank=True)
     
@@ -35,11 +87,52 @@ class PurchaseRequest(models.Model):
     
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='created_requests')
     
-    proforma = models.FileField(upload_to='proformas/', null=True, blank=True)
-    quotation_comparison = models.FileField(upload_to='quotations/', null=True, blank=True)
-    specification_sheet = models.FileField(upload_to='specifications/', null=True, blank=True)
-    purchase_order = models.FileField(upload_to='purchase_orders/', null=True, blank=True)
-    receipt = models.FileField(upload_to='receipts/', null=True, blank=True)
+    proforma = models.FileField(
+        upload_to=ShardedUploadTo('proformas'),
+        storage=document_storage,
+        null=True,
+        blank=True
+    )
+    quotation_comparison = models.FileField(
+        upload_to=ShardedUploadTo('quotations'),
+        storage=document_storage,
+        null=True,
+        blank=True
+    )
+    specification_sheet = models.FileField(
+        upload_to=ShardedUploadTo('specifications'),
+        storage=document_storage,
+        null=True,
+        blank=True
+    )
+    quotation_data = models.JSONField(
+        null=True,
+        blank=True,
+        help_text="Vendors and prices extracted from the quotation comparison"
+    )
+    specification_data = models.JSONField(
+        null=True,
+        blank=True,
+        help_text="Text and specifications extracted from the specification sheet"
+    )
+    
+    # Near-duplicate detection keys, see duplicates.py
+    amount_bucket = models.IntegerField(null=True, blank=True)
+    text_signature = ArrayField(models.BigIntegerField(), default=list, blank=True)
+    signature_bands = ArrayField(models.BigIntegerField(), default=list, blank=True)
+    
+    purchase_order = models.FileField(
+        upload_to=ShardedUploadTo('purchase_orders'),
+        storage=document_storage,
+        null=True,
+        blank=True
+    )
+    receipt = models.FileField(
+        upload_to=ShardedUploadTo('receipts'),
+        storage=document_storage,
+        null=True,
+        blank=True
+    )
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -51,7 +144,9 @@ class PurchaseRequest(models.Model):
             models.Index(fields=['status']),
             models.Index(fields=['created_by']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['updated_at']),
             models.Index(fields=['urgency']),
+            models.Index(fields=['vendor', 'amount_bucket', 'created_at'], name='request_duplicate_idx'),
         ]
     
     def __str__(self):
@@ -78,6 +173,9 @@ class Approval(models.Model):
         db_table = 'approvals'
         ordering = ['-created_at']
         unique_together = ['purchase_request', 'approval_level']
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
     
     def __str__(self):
         action = "Approved" if self.approved else "Rejected"
@@ -95,12 +193,20 @@ class PurchaseOrder(models.Model):
     terms = models.TextField(blank=True, help_text="Payment and delivery terms")
     
     vendor_name = models.CharField(max_length=200)
+    vendor = models.ForeignKey(
+        Vendor,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='purchase_orders'
+    )
     vendor_contact = models.CharField(max_length=200, blank=True)
     vendor_address = models.TextField(blank=True)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
     
     po_document = models.FileField(
-        upload_to='purchase_orders/',
+        upload_to=ShardedUploadTo('purchase_orders'),
+        storage=document_storage,
         null=True,
         blank=True,
         help_text="Generated PO document"
@@ -117,6 +223,9 @@ class PurchaseOrder(models.Model):
     class Meta:
         db_table = 'purchase_orders'
         ordering = ['-issue_date']
+        indexes = [
+            models.Index(fields=['updated_at']),
+        ]
     
     def __str__(self):
         return f"PO-{self.po_number} - {self.vendor_name} - ${self.total_amount}"
@@ -137,4 +246,315 @@ class PurchaseOrder(models.Model):
         else:
             new_num = 1
             
-        return f"PO-{date_part}-{new_num:04d}"
\ No newline at end of file
+        return f"PO-{date_part}-{new_num:04d}"
+
+
+class LineItem(models.Model):
+    """
+    One line of a proforma, purchase order or receipt, stored once when the
+    document is extracted so later stages can read items without parsing
+    the document or a JSON blob again.
+    """
+    class Source(models.TextChoices):
+        REQUEST = 'request', 'Request'
+        PURCHASE_ORDER = 'purchase_order', 'Purchase Order'
+        RECEIPT = 'receipt', 'Receipt'
+    
+    purchase_request = models.ForeignKey(
+        PurchaseRequest,
+        on_delete=models.CASCADE,
+        related_name='line_items'
+    )
+    source = models.CharField(max_length=20, choices=Source.choices)
+    position = models.PositiveIntegerField()
+    description = models.CharField(max_length=500)
+    quantity = models.DecimalField(max_digits=12, decimal_places=3, default=1)
+    unit_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    total_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    
+    class Meta:
+        db_table = 'line_items'
+        ordering = ['purchase_request_id', 'source', 'position']
+        indexes = [
+            models.Index(fields=['purchase_request', 'source', 'position']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_source_display()} #{self.purchase_request_id} line {self.position}: {self.description}"
+    
+    @classmethod
+    def build(cls, purchase_request, source, items):
+        """
+        Unsaved rows for the `items` list of an extraction result. Entries
+        without a description are skipped; unreadable numbers are left empty.
+        """
+        line_items = []
+        for item in items or []:
+            if not isinstance(item, dict) or not str(item.get('description') or '').strip():
+                continue
+            
+            quantity = _to_decimal(item.get('quantity'), 3)
+            unit_price = _to_decimal(item.get('unit_price'), 2)
+            total_price = _to_decimal(item.get('total_price'), 2)
+            if quantity is None or quantity <= 0:
+                quantity = Decimal(1)
+            if total_price is None and unit_price is not None:
+                total_price = (unit_price * quantity).quantize(Decimal('0.01'))
+            
+            line_items.append(cls(
+                purchase_request=purchase_request,
+                source=source,
+                position=len(line_items) + 1,
+                description=str(item['description']).strip()[:500],
+                quantity=quantity,
+                unit_price=unit_price,
+                total_price=total_price
+            ))
+        return line_items
+    
+    @classmethod
+    def replace(cls, purchase_request, source, items):
+        """
+        Store `items` as the request's lines for `source`, replacing any
+        earlier ones, with a single insert.
+        """
+        from django.db import transaction
+        
+        line_items = cls.build(purchase_request, source, items)
+        with transaction.atomic():
+            cls.objects.filter(purchase_request=purchase_request, source=source).delete()
+            cls.objects.bulk_create(line_items)
+        return line_items
+    
+    def as_dict(self):
+        return {
+            'description': self.description,
+            'quantity': float(self.quantity),
+            'unit_price': float(self.unit_price) if self.unit_price is not None else None,
+            'total_price': float(self.total_price) if self.total_price is not None else None,
+        }
+
+
+class ReceiptValidation(models.Model):
+    """
+    One run of receipt validation against the purchase order. Only the
+    newest run per request has `is_latest` set.
+    """
+    purchase_request = models.ForeignKey(
+        PurchaseRequest,
+        on_delete=models.CASCADE,
+        related_name='receipt_validations'
+    )
+    valid = models.BooleanField()
+    error = models.TextField(blank=True)
+    po_number = models.CharField(max_length=50, blank=True)
+    receipt_vendor_name = models.CharField(max_length=200, blank=True)
+    receipt_total_amount = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    item_matching = models.JSONField(null=True, blank=True)
+    is_latest = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'receipt_validations'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['purchase_request', 'is_latest']),
+            models.Index(fields=['valid', 'created_at']),
+            models.Index(fields=['created_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['purchase_request'],
+                condition=models.Q(is_latest=True),
+                name='receipt_validation_one_latest'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"Receipt validation #{self.id} for request #{self.purchase_request_id}"
+    
+    @classmethod
+    def build(cls, purchase_request, result):
+        """
+        Unsaved run for a validate_receipt() result.
+        """
+        receipt_data = result.get('receipt_data') or {}
+        return cls(
+            purchase_request=purchase_request,
+            valid=bool(result.get('valid')),
+            error=result.get('error') or '',
+            po_number=(result.get('po_data') or {}).get('po_number') or '',
+            receipt_vendor_name=str(receipt_data.get('vendor_name') or '')[:200],
+            receipt_total_amount=_to_decimal(receipt_data.get('total_amount'), 2),
+            item_matching=result.get('item_matching')
+        )
+    
+    @classmethod
+    def record(cls, purchase_request, result):
+        """
+        Store a validate_receipt() result and its discrepancies, and make it
+        the request's latest run.
+        """
+        from django.db import transaction
+        
+        validation = cls.build(purchase_request, result)
+        with transaction.atomic():
+            cls.clear_latest([purchase_request.id])
+            validation.save()
+            ReceiptDiscrepancy.objects.bulk_create(
+                ReceiptDiscrepancy.build(validation, result.get('discrepancies'))
+            )
+        return validation
+    
+    @classmethod
+    def clear_latest(cls, purchase_request_ids):
+        """
+        Lock the requests and unset their latest run, ahead of inserting new
+        ones. Must run in a transaction; concurrent runs for one request wait
+        on the lock instead of both ending up latest.
+        """
+        list(
+            PurchaseRequest.objects.select_for_update()
+            .filter(id__in=purchase_request_ids)
+            .order_by('id')
+            .values_list('id', flat=True)
+        )
+        cls.objects.filter(purchase_request_id__in=purchase_request_ids, is_latest=True).update(is_latest=False)
+
+
+class ReceiptDiscrepancy(models.Model):
+    """
+    A discrepancy found by a receipt validation run, kept as a row so audit
+    queries by severity, field and date are index lookups.
+    """
+    class Severity(models.TextChoices):
+        LOW = 'low', 'Low'
+        MEDIUM = 'medium', 'Medium'
+        HIGH = 'high', 'High'
+    
+    validation = models.ForeignKey(
+        ReceiptValidation,
+        on_delete=models.CASCADE,
+        related_name='discrepancies'
+    )
+    purchase_request = models.ForeignKey(
+        PurchaseRequest,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    field = models.CharField(max_length=50)
+    severity = models.CharField(max_length=10, choices=Severity.choices)
+    po_value = models.TextField(blank=True)
+    receipt_value = models.TextField(blank=True)
+    message = models.TextField()
+    # Copied from the validation run so date filters need no join
+    created_at = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'receipt_discrepancies'
+        ordering = ['-created_at', 'id']
+        indexes = [
+            models.Index(fields=['severity', 'created_at']),
+            models.Index(fields=['field', 'created_at']),
+            models.Index(fields=['created_at']),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(severity__in=['low', 'medium', 'high']),
+                name='receipt_discrepancy_severity_valid'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_severity_display()} {self.field} discrepancy on request #{self.purchase_request_id}"
+    
+    @classmethod
+    def build(cls, validation, discrepancies):
+        return [
+            cls(
+                validation=validation,
+                purchase_request_id=validation.purchase_request_id,
+                field=str(discrepancy.get('field') or '')[:50],
+                severity=(
+                    discrepancy['severity'] if discrepancy.get('severity') in cls.Severity.values
+                    else cls.Severity.MEDIUM
+                ),
+                po_value='' if discrepancy.get('po_value') is None else str(discrepancy['po_value']),
+                receipt_value='' if discrepancy.get('receipt_value') is None else str(discrepancy['receipt_value']),
+                message=discrepancy.get('message') or '',
+                created_at=validation.created_at
+            )
+            for discrepancy in discrepancies or []
+        ]
+
+
+def _to_decimal(value, places):
+    if value is None or value == '':
+        return None
+    try:
+        number = Decimal(str(value).replace(',', '').replace('$', '').strip())
+    except InvalidOperation:
+        return None
+    # Outside what the 12-digit columns can hold
+    if not number.is_finite() or abs(number) >= 10 ** (12 - places):
+        return None
+    return number.quantize(Decimal(1).scaleb(-places))
+
+
+class DeletedPurchaseRequest(models.Model):
+    """
+    Tombstone left behind when a purchase request is deleted, so incremental
+    sync clients can drop it from their copy.
+    """
+    request_id = models.BigIntegerField()
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    status = models.CharField(max_length=20, choices=PurchaseRequest.Status.choices)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'purchase_request_tombstones'
+        ordering = ['-deleted_at']
+        indexes = [
+            models.Index(fields=['deleted_at']),
+        ]
+    
+    def __str__(self):
+        return f"Deleted request #{self.request_id}"
+
+
+class StagedUpload(models.Model):
+    """
+    A document uploaded ahead of the request that uses it. The bytes are
+    written to STAGED_UPLOAD_ROOT/<key> (by nginx in production) and the
+    create and receipt endpoints claim the file by key.
+    
+    Resumable uploads append chunks to a side file, tracking the byte count
+    in `received`, and only move it to the key path once finalized.
+    """
+    key = models.CharField(max_length=64, unique=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='staged_uploads'
+    )
+    file_name = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(null=True, blank=True, help_text="Expected size in bytes")
+    received = models.PositiveBigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'staged_uploads'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['expires_at']),
+        ]
+    
+    def __str__(self):
+        return f"Staged upload {self.key} ({self.file_name})"
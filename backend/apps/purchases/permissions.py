@@ -31,5 +31,5 @@ class IsOwnerOrApprover(permissions.BasePermission):
     """
     def has_object_permission(self, request, view, obj):
         if request.user.is_staff_role:
-            return obj.created_by == request.user
+            return obj.created_by_id == request.user.id
         return request.user.is_approver or request.user.is_finance
\ No newline at end of file
@@ -1,5 +1,34 @@
+from django.urls import reverse
 from rest_framework import serializers
-from .models import PurchaseRequest, Approval
+from .models import (
+    PurchaseRequest, Approval, PurchaseOrder, DeletedPurchaseRequest, StagedUpload, LineItem,
+    ReceiptDiscrepancy, Vendor
+)
+from .vendors import resolve_vendor
+from .duplicates import set_duplicate_keys, duplicate_warnings
+
+
+class DocumentURLMixin:
+    """
+    Represent stored files by their permission-checked download URL,
+    /api/requests/{id}/documents/{field}/, rather than a media URL.
+    """
+    document_fields = ()
+    
+    def get_document_request_id(self, instance):
+        return instance.pk
+    
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        request = self.context.get('request')
+        for field in self.document_fields:
+            if data.get(field):
+                url = reverse('purchase-request-document', kwargs={
+                    'pk': self.get_document_request_id(instance),
+                    'field': field,
+                })
+                data[field] = request.build_absolute_uri(url) if request else url
+        return data
 
 
 class ApprovalSerializer(serializers.ModelSerializer):
@@ -15,7 +44,9 @@ class ApprovalSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class PurchaseRequestSerializer(serializers.ModelSerializer):
+class PurchaseRequestSerializer(DocumentURLMixin, serializers.ModelSerializer):
+    document_fields = ('proforma', 'purchase_order', 'receipt', 'quotation_comparison', 'specification_sheet')
+    
     created_by_name = serializers.CharField(source='created_by.username', read_only=True)
     approvals = ApprovalSerializer(many=True, read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
@@ -25,35 +56,236 @@ class PurchaseRequestSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'title', 'description', 'amount', 'status', 'status_display',
             'created_by', 'created_by_name', 'proforma', 'purchase_order', 'receipt',
-            'urgency', 'vendor_name', 'vendor_contact', 'requested_delivery_date',
+            'urgency', 'vendor_name', 'vendor', 'vendor_contact', 'requested_delivery_date',
             'cost_center', 'gl_account', 'budget_code', 'project_code',
             'business_justification', 'quotation_comparison', 'specification_sheet',
-            'approvals', 'created_at', 'updated_at'
+            'quotation_data', 'specification_data', 'approvals', 'created_at', 'updated_at'
         ]
+        # The proforma is only set on create, where its line items are
+        # extracted; replacing it here would leave the old items behind
         read_only_fields = [
-            'id', 'status', 'created_by', 'created_by_name', 
-            'purchase_order', 'created_at', 'updated_at'
+            'id', 'status', 'created_by', 'created_by_name', 'proforma',
+            'purchase_order', 'vendor', 'quotation_data', 'specification_data',
+            'created_at', 'updated_at'
+        ]
+    
+    def update(self, instance, validated_data):
+        if 'vendor_name' in validated_data:
+            validated_data['vendor_id'] = resolve_vendor(validated_data['vendor_name'], create=True)
+        instance = super().update(instance, validated_data)
+        
+        if {'amount', 'description'} & set(validated_data):
+            set_duplicate_keys(instance, [
+                line_item.as_dict()
+                for line_item in instance.line_items.all()
+                if line_item.source == LineItem.Source.REQUEST
+            ])
+            instance.save(update_fields=['amount_bucket', 'text_signature', 'signature_bands'])
+        return instance
+
+
+class ApprovalChangeSerializer(ApprovalSerializer):
+    class Meta(ApprovalSerializer.Meta):
+        fields = ApprovalSerializer.Meta.fields + ['purchase_request']
+
+
+class PurchaseOrderSerializer(DocumentURLMixin, serializers.ModelSerializer):
+    document_fields = ('po_document',)
+    
+    def get_document_request_id(self, instance):
+        return instance.purchase_request_id
+    
+    class Meta:
+        model = PurchaseOrder
+        fields = [
+            'id', 'purchase_request', 'po_number', 'issue_date', 'terms',
+            'vendor_name', 'vendor', 'vendor_contact', 'vendor_address', 'total_amount',
+            'po_document', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
+class DeletedPurchaseRequestSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='request_id', read_only=True)
+    
+    class Meta:
+        model = DeletedPurchaseRequest
+        fields = ['id', 'deleted_at']
+        read_only_fields = fields
+
+
+class ReceiptDiscrepancySerializer(serializers.ModelSerializer):
+    request_title = serializers.CharField(source='purchase_request.title', read_only=True)
+    po_number = serializers.CharField(source='validation.po_number', read_only=True)
+    valid = serializers.BooleanField(source='validation.valid', read_only=True)
+    is_latest = serializers.BooleanField(source='validation.is_latest', read_only=True)
+    
+    class Meta:
+        model = ReceiptDiscrepancy
+        fields = [
+            'id', 'validation', 'purchase_request', 'request_title', 'po_number',
+            'valid', 'is_latest', 'field', 'severity', 'po_value', 'receipt_value',
+            'message', 'created_at'
+        ]
+        read_only_fields = fields
+
+
+class VendorSerializer(serializers.ModelSerializer):
+    matched_name = serializers.CharField(read_only=True)
+    
+    class Meta:
+        model = Vendor
+        fields = ['id', 'name', 'matched_name']
+        read_only_fields = fields
+
+
+class StagedUploadSerializer(serializers.ModelSerializer):
+    ALLOWED_EXTENSIONS = ['.pdf', '.jpg', '.jpeg', '.png', '.doc', '.docx', '.txt']
+    
+    upload_url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = StagedUpload
+        fields = [
+            'key', 'file_name', 'size', 'received', 'sha256',
+            'completed_at', 'upload_url', 'expires_at'
+        ]
+        read_only_fields = ['key', 'received', 'sha256', 'completed_at', 'upload_url', 'expires_at']
+    
+    def get_upload_url(self, obj):
+        from .staging import sign_key
+        
+        path = reverse('staged-upload-staging', kwargs={'key': obj.key})
+        return self.context['request'].build_absolute_uri(f"{path}?token={sign_key(obj.key)}")
+    
+    def validate_file_name(self, value):
+        import os
+        file_extension = os.path.splitext(value)[1].lower()
+        
+        if file_extension not in self.ALLOWED_EXTENSIONS:
+            raise serializers.ValidationError(
+                f"Unsupported file format. Please upload: {', '.join(self.ALLOWED_EXTENSIONS)}"
+            )
+        return value
+    
+    def validate_size(self, value):
+        from django.conf import settings
+        if value is not None and value > settings.STAGED_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f"Files are limited to {settings.STAGED_UPLOAD_MAX_SIZE // (1024 * 1024)}MB."
+            )
+        return value
+
+
+class StagedUploadFinalizeSerializer(serializers.Serializer):
+    sha256 = serializers.RegexField(r'^[0-9a-fA-F]{64}$', help_text="Hex SHA-256 of the whole file")
+
+
+class BulkDecisionItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    approved = serializers.BooleanField()
+    comments = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+class BulkDecisionSerializer(serializers.Serializer):
+    MAX_DECISIONS = 500
+    
+    decisions = BulkDecisionItemSerializer(many=True, allow_empty=False)
+    
+    def validate_decisions(self, value):
+        if len(value) > self.MAX_DECISIONS:
+            raise serializers.ValidationError(
+                f"At most {self.MAX_DECISIONS} decisions can be submitted at once."
+            )
+        
+        ids = [decision['id'] for decision in value]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError("Each request can only appear once.")
+        return value
+
+
+class BulkProformaDefaultsSerializer(serializers.ModelSerializer):
+    """
+    Fields applied to every request created by a bulk proforma upload
+    """
+    class Meta:
+        model = PurchaseRequest
+        fields = [
+            'title', 'description', 'urgency', 'business_justification',
+            'requested_delivery_date', 'cost_center', 'gl_account',
+            'budget_code', 'project_code'
         ]
+        extra_kwargs = {field: {'required': False} for field in fields}
+    
+    def validate_requested_delivery_date(self, value):
+        from django.utils import timezone
+        if value and value < timezone.now().date():
+            raise serializers.ValidationError("Delivery date cannot be in the past.")
+        return value
 
 
-class PurchaseRequestCreateSerializer(serializers.ModelSerializer):
+class PurchaseRequestCreateSerializer(DocumentURLMixin, serializers.ModelSerializer):
+    document_fields = ('proforma', 'quotation_comparison', 'specification_sheet')
+    
+    # Extracted proforma field -> PurchaseRequest field
+    EXTRACTED_FIELD_MAPPING = {
+        'vendor_name': 'vendor_name',
+        'vendor_contact': 'vendor_contact', 
+        'total_amount': 'amount',
+        'title': 'title',
+        'description': 'description',
+    }
+    
+    # Fields that must be present after merging a proforma's extracted data
+    PROFORMA_REQUIRED_FIELDS = {
+        'title': 'Title',
+        'description': 'Description',
+        'amount': 'Amount',
+        'vendor_name': 'Vendor name',
+        'business_justification': 'Business justification'
+    }
+    
+    proforma_key = serializers.CharField(
+        write_only=True,
+        required=False,
+        help_text="Key of a proforma staged through /api/uploads/, instead of uploading it inline"
+    )
+    duplicate_warnings = serializers.ListField(
+        child=serializers.DictField(),
+        read_only=True,
+        help_text="Recent requests for the same vendor and a similar amount and description"
+    )
+    
     class Meta:
         model = PurchaseRequest
         fields = [
             'title', 'description', 'amount', 'urgency',
             'vendor_name', 'vendor_contact', 'requested_delivery_date',
             'cost_center', 'gl_account', 'budget_code', 'project_code',
-            'business_justification', 'proforma', 'quotation_comparison', 'specification_sheet'
+            'business_justification', 'proforma', 'proforma_key',
+            'quotation_comparison', 'specification_sheet',
+            'quotation_data', 'specification_data', 'vendor', 'duplicate_warnings'
         ]
         extra_kwargs = {
+            'vendor': {'read_only': True},
+            'quotation_data': {'read_only': True},
+            'specification_data': {'read_only': True},
             'title': {'required': False},
             'description': {'required': False},
             'amount': {'required': False},
             'vendor_name': {'required': False},
             'business_justification': {'required': False},
         }
-
+    
     def validate(self, attrs):
+        proforma_key = attrs.pop('proforma_key', None)
+        if proforma_key and not attrs.get('proforma'):
+            from .staging import open_staged
+            staged_file = open_staged(proforma_key, self.context['request'].user)
+            if not staged_file:
+                raise serializers.ValidationError({"proforma_key": "No staged upload found for this key."})
+            attrs['proforma'] = self.validate_proforma(staged_file)
+        
         proforma = attrs.get('proforma')
         has_manual_data = bool(attrs.get('title') and attrs.get('amount') and attrs.get('vendor_name'))
         
@@ -73,26 +305,36 @@ class PurchaseRequestCreateSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError({"business_justification": "Business justification is required when proforma is not provided."})
         
         return attrs
-
+    
     def validate_amount(self, value):
         if value <= 0:
             raise serializers.ValidationError("Amount must be greater than 0.")
         return value
-
+    
     def validate_requested_delivery_date(self, value):
         from django.utils import timezone
         if value and value < timezone.now().date():
             raise serializers.ValidationError("Delivery date cannot be in the past.")
         return value
-
+    
     def create(self, validated_data):
         proforma_file = validated_data.pop('proforma', None)
-        validated_data['created_by'] = self.context['request'].user
+        validated_data['created_by_id'] = self.context['request'].user.id
         
         missing_fields = []
         
+        extracted = self._extract_attachments(
+            proforma_file,
+            validated_data.get('quotation_comparison'),
+            validated_data.get('specification_sheet')
+        )
+        if extracted.get('quotation'):
+            validated_data['quotation_data'] = extracted['quotation']
+        if extracted.get('specification'):
+            validated_data['specification_data'] = extracted['specification']
+        
         if proforma_file:
-            extracted_data = self._extract_proforma_data(proforma_file)
+            extracted_data = extracted['proforma']
             
             if extracted_data.get('error'):
                 raise serializers.ValidationError({
@@ -101,15 +343,7 @@ class PurchaseRequestCreateSerializer(serializers.ModelSerializer):
             else:
                 validated_data = self._merge_data(validated_data, extracted_data)
                 
-                required_fields = {
-                    'title': 'Title',
-                    'description': 'Description',
-                    'amount': 'Amount',
-                    'vendor_name': 'Vendor name',
-                    'business_justification': 'Business justification'
-                }
-                
-                for field, label in required_fields.items():
+                for field, label in self.PROFORMA_REQUIRED_FIELDS.items():
                     if not validated_data.get(field):
                         missing_fields.append(label)
                 
@@ -123,51 +357,84 @@ class PurchaseRequestCreateSerializer(serializers.ModelSerializer):
         if not validated_data.get('amount'):
             raise serializers.ValidationError({"amount": "Amount is required. Please provide it manually."})
         
-        purchase_request = PurchaseRequest.objects.create(**validated_data)
+        validated_data['vendor_id'] = resolve_vendor(validated_data.get('vendor_name'), create=True)
+        items = extracted['proforma'].get('items') if proforma_file else None
+        purchase_request = PurchaseRequest(**validated_data)
+        set_duplicate_keys(purchase_request, items)
+        purchase_request.save()
         
         if proforma_file:
             purchase_request.proforma = proforma_file
             purchase_request.save()
+            LineItem.objects.bulk_create(
+                LineItem.build(purchase_request, LineItem.Source.REQUEST, items)
+            )
+            
+            from .staging import StagedFile, release
+            if isinstance(proforma_file, StagedFile):
+                release(proforma_file)
         
+        purchase_request.duplicate_warnings = duplicate_warnings(purchase_request)
         return purchase_request
     
+    def _extract_attachments(self, proforma_file, quotation_file, specification_file):
+        """
+        Extract every attached document at once, so creating a request takes
+        as long as the slowest document rather than all of them in turn.
+        Quotation and specification failures are logged and left out.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        from apps.documents.processors.attachment_processor import QuotationProcessor, SpecificationProcessor
+        
+        jobs = {}
+        if proforma_file:
+            jobs['proforma'] = (self._extract_proforma_data, proforma_file)
+        if quotation_file:
+            jobs['quotation'] = (self._extract_attachment_data(QuotationProcessor), quotation_file)
+        if specification_file:
+            jobs['specification'] = (self._extract_attachment_data(SpecificationProcessor), specification_file)
+        
+        if len(jobs) <= 1:
+            extracted = {name: extract(document) for name, (extract, document) in jobs.items()}
+        else:
+            with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+                futures = {name: executor.submit(extract, document) for name, (extract, document) in jobs.items()}
+                extracted = {name: future.result() for name, future in futures.items()}
+        
+        for name in ('quotation', 'specification'):
+            if extracted.get(name, {}).get('error'):
+                print(f"{name.capitalize()} extraction error: {extracted.pop(name)['error']}")
+        
+        return extracted
+    
+    def _extract_attachment_data(self, processor_class):
+        def extract(document):
+            from apps.documents.processors.proforma_processor import ProformaProcessor
+            try:
+                return processor_class().extract_data(ProformaProcessor.upload_source(document), document.name)
+            except Exception as e:
+                return {'error': str(e)}
+        return extract
+    
     def _extract_proforma_data(self, proforma_file):
         try:
             from apps.documents.processors.proforma_processor import ProformaProcessor
-            import tempfile
             import os
             
             processor = ProformaProcessor()
             
-            file_extension = os.path.splitext(proforma_file.name)[1].lower()
-            if not file_extension:
-                file_extension = '.pdf'
-            
-            with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as tmp_file:
-                for chunk in proforma_file.chunks():
-                    tmp_file.write(chunk)
-                tmp_path = tmp_file.name
-            
-            extracted_data = processor.extract_data(tmp_path)
-            
-            os.unlink(tmp_path)
+            file_name = proforma_file.name
+            if not os.path.splitext(file_name)[1]:
+                file_name += '.pdf'
             
-            return extracted_data
+            return processor.extract_data(ProformaProcessor.upload_source(proforma_file), file_name)
             
         except Exception as e:
             print(f"Proforma extraction error: {e}")
             return {'error': str(e)}
-
+    
     def _merge_data(self, manual_data, extracted_data):
-        field_mapping = {
-            'vendor_name': 'vendor_name',
-            'vendor_contact': 'vendor_contact', 
-            'total_amount': 'amount',
-            'title': 'title',
-            'description': 'description',
-        }
-        
-        for extracted_field, model_field in field_mapping.items():
+        for extracted_field, model_field in self.EXTRACTED_FIELD_MAPPING.items():
             if extracted_data.get(extracted_field):
                 if not manual_data.get(model_field):
                     manual_data[model_field] = extracted_data[extracted_field]
@@ -180,21 +447,11 @@ class PurchaseRequestCreateSerializer(serializers.ModelSerializer):
             
             processor = ProformaProcessor()
             
-            import tempfile
-            import os
-            
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-                for chunk in proforma_file.chunks():
-                    tmp_file.write(chunk)
-                tmp_path = tmp_file.name
-            
-            extracted_data = processor.extract_data(tmp_path)
+            extracted_data = processor.extract_data(ProformaProcessor.upload_source(proforma_file), 'proforma.pdf')
             
             if not extracted_data.get('error'):
                 self._update_from_extracted_data(purchase_request, extracted_data)
             
-            os.unlink(tmp_path)
-            
         except Exception as e:
             print(f"Proforma processing error: {e}")
     
@@ -203,7 +460,8 @@ class PurchaseRequestCreateSerializer(serializers.ModelSerializer):
         
         if extracted_data.get('vendor_name') and not purchase_request.vendor_name:
             purchase_request.vendor_name = extracted_data['vendor_name']
-            update_fields.append('vendor_name')
+            purchase_request.vendor_id = resolve_vendor(purchase_request.vendor_name, create=True)
+            update_fields.extend(['vendor_name', 'vendor'])
         
         if extracted_data.get('vendor_contact') and not purchase_request.vendor_contact:
             purchase_request.vendor_contact = extracted_data['vendor_contact']
@@ -217,7 +475,7 @@ class PurchaseRequestCreateSerializer(serializers.ModelSerializer):
         
         if update_fields:
             purchase_request.save(update_fields=update_fields)
-
+    
     def validate_proforma(self, value):
         import os
         allowed_extensions = ['.pdf', '.doc', '.docx', '.txt']
@@ -1,15 +1,253 @@
 import json
 import io
+from dataclasses import dataclass
+from typing import Optional
 from django.conf import settings
 from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils import timezone
+from django.utils.html import escape
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
 from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
-from .models import PurchaseRequest, PurchaseOrder
+from .models import PurchaseRequest, PurchaseOrder, Approval, LineItem
+from . import cache as list_cache
+
+
+@dataclass
+class ApprovalResult:
+    """
+    Outcome of recording a single approval decision
+    """
+    purchase_request: Optional[PurchaseRequest] = None
+    approval: Optional[Approval] = None
+    status_changed: bool = False
+    error_code: Optional[str] = None
+    error: Optional[str] = None
+    
+    @property
+    def fully_approved(self):
+        return self.status_changed and self.purchase_request.status == PurchaseRequest.Status.APPROVED
+
+
+class ApprovalWorkflow:
+    """
+    Service to record approval decisions as one locked state transition
+    """
+    NOT_FOUND = 'not_found'
+    FORBIDDEN = 'forbidden'
+    ALREADY_PROCESSED = 'already_processed'
+    LEVEL_DECIDED = 'level_decided'
+    
+    REQUIRED_APPROVALS = 2
+    
+    @staticmethod
+    def _decision_annotations(user, approval_level):
+        """
+        What the locking query needs to validate a decision: whether this
+        user or this level already decided, and how many approvals exist.
+        """
+        existing = Approval.objects.filter(purchase_request=OuterRef('pk'))
+        approved_count = existing.filter(approved=True).order_by().values(
+            'purchase_request'
+        ).annotate(count=Count('id')).values('count')
+        
+        return {
+            'decided_by_user': Exists(existing.filter(approver_id=user.id)),
+            'level_decided': Exists(existing.filter(approval_level=approval_level)),
+            'approved_count': Coalesce(Subquery(approved_count), 0),
+        }
+    
+    @staticmethod
+    def record_decision(queryset, purchase_request_id, user, approved, comments=''):
+        """
+        Lock the request, insert the approval if this user and level haven't
+        decided yet, and update the status when the decision completes it.
+        
+        `queryset` scopes which requests the user may act on. The existing
+        decisions are read by the locking query itself. Concurrent decisions
+        on the same request wait on the row lock, so the approval count they
+        see is always current.
+        """
+        approval_level = user.get_approval_level()
+        if not approval_level:
+            return ApprovalResult(
+                error_code=ApprovalWorkflow.FORBIDDEN,
+                error="You don't have permission to approve this request."
+            )
+        
+        with transaction.atomic():
+            purchase_request = queryset.select_for_update(of=('self',)).select_related(
+                'created_by'
+            ).filter(id=purchase_request_id).annotate(
+                **ApprovalWorkflow._decision_annotations(user, approval_level)
+            ).first()
+            
+            if purchase_request is None:
+                return ApprovalResult(error_code=ApprovalWorkflow.NOT_FOUND, error="Not found.")
+            
+            if purchase_request.status != PurchaseRequest.Status.PENDING:
+                return ApprovalResult(
+                    purchase_request=purchase_request,
+                    error_code=ApprovalWorkflow.ALREADY_PROCESSED,
+                    error="This request has already been processed."
+                )
+            
+            if purchase_request.decided_by_user:
+                return ApprovalResult(
+                    purchase_request=purchase_request,
+                    error_code=ApprovalWorkflow.FORBIDDEN,
+                    error="You don't have permission to approve this request."
+                )
+            
+            if purchase_request.level_decided:
+                return ApprovalResult(
+                    purchase_request=purchase_request,
+                    error_code=ApprovalWorkflow.LEVEL_DECIDED,
+                    error=f"This request has already been reviewed at level {approval_level}."
+                )
+            
+            approval = Approval.objects.create(
+                purchase_request=purchase_request,
+                approver_id=user.id,
+                approval_level=approval_level,
+                approved=approved,
+                comments=comments
+            )
+            
+            new_status = None
+            if not approved:
+                new_status = PurchaseRequest.Status.REJECTED
+            else:
+                if purchase_request.approved_count + 1 >= ApprovalWorkflow.REQUIRED_APPROVALS:
+                    new_status = PurchaseRequest.Status.APPROVED
+            
+            if new_status:
+                purchase_request.status = new_status
+                purchase_request.save(update_fields=['status', 'updated_at'])
+            
+            list_cache.invalidate_request(purchase_request)
+        
+        return ApprovalResult(
+            purchase_request=purchase_request,
+            approval=approval,
+            status_changed=new_status is not None
+        )
+    
+    @staticmethod
+    def record_decisions(queryset, user, decisions):
+        """
+        Record many decisions at once. One locking query fetches every request
+        along with what it needs for validation, the approvals are inserted
+        with bulk_create and statuses change in one UPDATE per new status.
+        
+        `decisions` is a list of dicts with id, approved and comments.
+        Returns a dict mapping request id to ApprovalResult.
+        """
+        approval_level = user.get_approval_level()
+        if not approval_level:
+            return {
+                decision['id']: ApprovalResult(
+                    error_code=ApprovalWorkflow.FORBIDDEN,
+                    error="You don't have permission to approve this request."
+                )
+                for decision in decisions
+            }
+        
+        results = {}
+        new_approvals = []
+        status_updates = {
+            PurchaseRequest.Status.APPROVED: [],
+            PurchaseRequest.Status.REJECTED: [],
+        }
+        
+        with transaction.atomic():
+            # Locking in id order keeps overlapping batches from deadlocking.
+            purchase_requests = {
+                purchase_request.id: purchase_request
+                for purchase_request in queryset.select_for_update(of=('self',)).select_related(
+                    'created_by'
+                ).filter(
+                    id__in=[decision['id'] for decision in decisions]
+                ).annotate(
+                    **ApprovalWorkflow._decision_annotations(user, approval_level)
+                ).order_by('id')
+            }
+            
+            for decision in decisions:
+                purchase_request = purchase_requests.get(decision['id'])
+                
+                if purchase_request is None:
+                    results[decision['id']] = ApprovalResult(
+                        error_code=ApprovalWorkflow.NOT_FOUND,
+                        error="Not found."
+                    )
+                elif purchase_request.status != PurchaseRequest.Status.PENDING:
+                    results[decision['id']] = ApprovalResult(
+                        purchase_request=purchase_request,
+                        error_code=ApprovalWorkflow.ALREADY_PROCESSED,
+                        error="This request has already been processed."
+                    )
+                elif purchase_request.decided_by_user:
+                    results[decision['id']] = ApprovalResult(
+                        purchase_request=purchase_request,
+                        error_code=ApprovalWorkflow.FORBIDDEN,
+                        error="You don't have permission to approve this request."
+                    )
+                elif purchase_request.level_decided:
+                    results[decision['id']] = ApprovalResult(
+                        purchase_request=purchase_request,
+                        error_code=ApprovalWorkflow.LEVEL_DECIDED,
+                        error=f"This request has already been reviewed at level {approval_level}."
+                    )
+                else:
+                    approval = Approval(
+                        purchase_request=purchase_request,
+                        approver_id=user.id,
+                        approval_level=approval_level,
+                        approved=decision['approved'],
+                        comments=decision.get('comments', '')
+                    )
+                    new_approvals.append(approval)
+                    
+                    new_status = None
+                    if not decision['approved']:
+                        new_status = PurchaseRequest.Status.REJECTED
+                    elif purchase_request.approved_count + 1 >= ApprovalWorkflow.REQUIRED_APPROVALS:
+                        new_status = PurchaseRequest.Status.APPROVED
+                    
+                    if new_status:
+                        purchase_request.status = new_status
+                        status_updates[new_status].append(purchase_request.id)
+                    
+                    results[decision['id']] = ApprovalResult(
+                        purchase_request=purchase_request,
+                        approval=approval,
+                        status_changed=new_status is not None
+                    )
+            
+            Approval.objects.bulk_create(new_approvals)
+            
+            now = timezone.now()
+            for new_status, purchase_request_ids in status_updates.items():
+                if purchase_request_ids:
+                    PurchaseRequest.objects.filter(id__in=purchase_request_ids).update(
+                        status=new_status,
+                        updated_at=now
+                    )
+            
+            list_cache.invalidate_scopes(
+                scope
+                for approval in new_approvals
+                for scope in list_cache.get_request_scopes(approval.purchase_request)
+            )
+        
+        return results
 
 
 class PurchaseOrderGenerator:
@@ -24,7 +262,37 @@ class PurchaseOrderGenerator:
         """
         try:
             purchase_request = PurchaseRequest.objects.get(id=purchase_request_id)
-            
+        except PurchaseRequest.DoesNotExist:
+            return None, "Purchase request not found"
+        
+        return PurchaseOrderGenerator._generate_for_request(purchase_request)
+    
+    @staticmethod
+    def generate_pos(purchase_request_ids):
+        """
+        Generate purchase orders for a batch of approved requests, loading the
+        requests, requesters, approvals and existing POs up front.
+        Returns a dict mapping request id to (purchase_order, message).
+        """
+        results = {
+            purchase_request_id: (None, "Purchase request not found")
+            for purchase_request_id in purchase_request_ids
+        }
+        
+        purchase_requests = PurchaseRequest.objects.filter(
+            id__in=purchase_request_ids
+        ).select_related(
+            'created_by', 'purchase_order_doc'
+        ).prefetch_related('approvals__approver', 'line_items')
+        
+        for purchase_request in purchase_requests:
+            results[purchase_request.id] = PurchaseOrderGenerator._generate_for_request(purchase_request)
+        
+        return results
+    
+    @staticmethod
+    def _generate_for_request(purchase_request):
+        try:
             # Check if request is fully approved
             if not PurchaseOrderGenerator._is_fully_approved(purchase_request):
                 return None, "Request is not fully approved"
@@ -40,6 +308,7 @@ class PurchaseOrderGenerator:
             purchase_order = PurchaseOrder.objects.create(
                 purchase_request=purchase_request,
                 vendor_name=po_data['vendor_name'],
+                vendor_id=purchase_request.vendor_id,
                 vendor_contact=po_data['vendor_contact'],
                 vendor_address=po_data['vendor_address'],
                 total_amount=po_data['total_amount'],
@@ -47,6 +316,11 @@ class PurchaseOrderGenerator:
                 po_data_file=po_data
             )
             
+            # The PO carries the request's lines as its own rows
+            LineItem.objects.bulk_create(
+                LineItem.build(purchase_request, LineItem.Source.PURCHASE_ORDER, po_data['items'])
+            )
+            
             # Generate PDF with PO number
             po_pdf_file = PurchaseOrderGenerator._create_po_pdf(po_data, purchase_order.po_number)
             
@@ -57,11 +331,10 @@ class PurchaseOrderGenerator:
             # Also store PO document in purchase request for easy access
             purchase_request.purchase_order = po_pdf_file
             purchase_request.save()
+            list_cache.invalidate_request(purchase_request)
             
             return purchase_order, "PO data generated successfully"
             
-        except PurchaseRequest.DoesNotExist:
-            return None, "Purchase request not found"
         except Exception as e:
             return None, f"PO generation failed: {str(e)}"
     
@@ -70,27 +343,37 @@ class PurchaseOrderGenerator:
         """
         Check if all required approval levels have approved (both Level 1 and Level 2)
         """
-        # Check that both approval levels have approved
-        level_1_approved = purchase_request.approvals.filter(
-            approval_level=1,
-            approved=True
-        ).exists()
-        
-        level_2_approved = purchase_request.approvals.filter(
-            approval_level=2,
-            approved=True
-        ).exists()
+        # Check that both approval levels have approved. Reads the approvals
+        # through .all() so a prefetched batch needs no extra query.
+        approved_levels = {
+            approval.approval_level
+            for approval in purchase_request.approvals.all()
+            if approval.approved
+        }
         
-        return level_1_approved and level_2_approved
+        return {1, 2} <= approved_levels
     
     @staticmethod
     def _extract_po_data(purchase_request):
         """
         Extract comprehensive PO data from purchase request
         """
+        # Line items of the PO once it exists, otherwise of the request.
+        # Read through .all() so a prefetched batch needs no extra query.
+        source = (
+            LineItem.Source.PURCHASE_ORDER
+            if hasattr(purchase_request, 'purchase_order_doc')
+            else LineItem.Source.REQUEST
+        )
+        items = [
+            line_item.as_dict()
+            for line_item in purchase_request.line_items.all()
+            if line_item.source == source
+        ]
+        
         # Get all approvals with details
         approvals_data = []
-        for approval in purchase_request.approvals.all().order_by('approval_level'):
+        for approval in sorted(purchase_request.approvals.all(), key=lambda a: a.approval_level):
             approvals_data.append({
                 'level': approval.approval_level,
                 'approver_name': approval.approver.get_full_name() or approval.approver.username,
@@ -123,6 +406,8 @@ class PurchaseOrderGenerator:
             # Business context
             'business_justification': purchase_request.business_justification,
             
+            'items': items,
+            
             # Requester information
             'created_by': {
                 'name': purchase_request.created_by.get_full_name() or purchase_request.created_by.username,
@@ -244,6 +529,33 @@ class PurchaseOrderGenerator:
         elements.append(request_table)
         elements.append(Spacer(1, 20))
         
+        # Line Items
+        if po_data.get('items'):
+            elements.append(Paragraph("Line Items", heading_style))
+            item_data = [['#', 'Description', 'Qty', 'Unit Price', 'Total']]
+            for position, item in enumerate(po_data['items'], start=1):
+                item_data.append([
+                    str(position),
+                    Paragraph(escape(item['description']), styles['Normal']),
+                    f"{item['quantity']:g}",
+                    f"${item['unit_price']:.2f}" if item['unit_price'] is not None else '',
+                    f"${item['total_price']:.2f}" if item['total_price'] is not None else ''
+                ])
+            
+            item_table = Table(item_data, colWidths=[0.4*inch, 3*inch, 0.6*inch, 1*inch, 1*inch], repeatRows=1)
+            item_table.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1a237e')),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, -1), 9),
+                ('ALIGN', (2, 0), (-1, -1), 'RIGHT'),
+                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+                ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f5f5f5')]),
+            ]))
+            elements.append(item_table)
+            elements.append(Spacer(1, 20))
+        
         # Financial Information
         elements.append(Paragraph("Financial Information", heading_style))
         financial_data = [
@@ -0,0 +1,244 @@
+import hashlib
+import os
+import re
+import shutil
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.core import signing
+from django.core.files import File
+from django.utils import timezone
+from .models import StagedUpload
+
+
+KEY_RE = re.compile(r'^[0-9a-f]{32}(?:\.[a-z0-9]{1,10})?$')
+SIGNER_SALT = 'purchases.staged-upload'
+CHUNK_SIZE = 64 * 1024
+CHUNKS_SUFFIX = '.chunks'
+SPOOL_SUFFIX = '.spool'
+
+
+class StagedFile(File):
+    """
+    A staged upload opened for a FileField. Exposing temporary_file_path()
+    lets FileSystemStorage move it into place instead of copying it, and
+    lets the document processors read it straight from disk.
+    """
+    
+    def __init__(self, file, name, key):
+        super().__init__(file, name)
+        self.key = key
+    
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def staged_path(key):
+    if not KEY_RE.match(key):
+        raise ValueError("Invalid upload key.")
+    return os.path.join(settings.STAGED_UPLOAD_ROOT, key)
+
+
+def create_upload(user, file_name, size=None):
+    extension = os.path.splitext(file_name)[1].lower()
+    return StagedUpload.objects.create(
+        key=uuid.uuid4().hex + extension,
+        created_by_id=user.id,
+        file_name=os.path.basename(file_name),
+        size=size,
+        expires_at=timezone.now() + timedelta(seconds=settings.STAGED_UPLOAD_MAX_AGE)
+    )
+
+
+def sign_key(key):
+    return signing.TimestampSigner(salt=SIGNER_SALT).sign(key)
+
+
+def check_token(key, token):
+    """
+    True when the token was issued for this key within
+    STAGED_UPLOAD_URL_MAX_AGE seconds.
+    """
+    try:
+        signed_key = signing.TimestampSigner(salt=SIGNER_SALT).unsign(
+            token, max_age=settings.STAGED_UPLOAD_URL_MAX_AGE
+        )
+    except signing.BadSignature:
+        return False
+    return signed_key == key and bool(KEY_RE.match(key))
+
+
+def receive(key, stream):
+    """
+    Write a request body to the staging area. This is the development
+    fallback; behind nginx the PUT never reaches Django.
+    """
+    path = staged_path(key)
+    partial_path = f"{path}.part"
+    os.makedirs(settings.STAGED_UPLOAD_ROOT, exist_ok=True)
+    
+    received = 0
+    try:
+        with open(partial_path, 'wb') as destination:
+            while stream is not None:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                received += len(chunk)
+                if received > settings.STAGED_UPLOAD_MAX_SIZE:
+                    raise ValueError("Upload exceeds the maximum size.")
+                destination.write(chunk)
+        os.replace(partial_path, path)
+    finally:
+        if os.path.exists(partial_path):
+            os.unlink(partial_path)
+    
+    return received
+
+
+def spool_chunk(staged, offset, stream):
+    """
+    Read a chunk request body into a temporary file before any row lock is
+    taken, so a slow client holds no lock. Returns the spool path for
+    append_chunk(); the caller removes it. Leftovers from a crash carry no
+    live key and are removed by purge_expired().
+    """
+    limit = staged.size if staged.size is not None else settings.STAGED_UPLOAD_MAX_SIZE
+    spool_path = f"{staged_path(staged.key)}.{uuid.uuid4().hex}{SPOOL_SUFFIX}"
+    os.makedirs(settings.STAGED_UPLOAD_ROOT, exist_ok=True)
+    
+    received = offset
+    try:
+        with open(spool_path, 'wb') as spool:
+            while stream is not None:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                received += len(chunk)
+                if received > limit:
+                    raise ValueError("Upload exceeds the expected size.")
+                spool.write(chunk)
+    except BaseException:
+        os.unlink(spool_path)
+        raise
+    
+    return spool_path
+
+
+def append_chunk(staged, spool_path):
+    """
+    Append a chunk spooled by spool_chunk() to a resumable upload at
+    `staged.received` and save the new byte count. The caller must hold a
+    row lock on `staged`. Anything a failed earlier request left past
+    `received` is discarded.
+    """
+    limit = staged.size if staged.size is not None else settings.STAGED_UPLOAD_MAX_SIZE
+    received = staged.received + os.path.getsize(spool_path)
+    if received > limit:
+        raise ValueError("Upload exceeds the expected size.")
+    
+    chunks_path = staged_path(staged.key) + CHUNKS_SUFFIX
+    mode = 'r+b' if os.path.exists(chunks_path) else 'wb'
+    with open(chunks_path, mode) as destination, open(spool_path, 'rb') as spool:
+        destination.truncate(staged.received)
+        destination.seek(staged.received)
+        shutil.copyfileobj(spool, destination, CHUNK_SIZE)
+    
+    staged.received = received
+    staged.save(update_fields=['received'])
+    return received
+
+
+def finalize_chunks(staged, checksum):
+    """
+    Verify a resumable upload against the client's SHA-256 and make it
+    claimable. A mismatch throws the received bytes away so the client can
+    start over. The caller must hold a row lock on `staged`.
+    """
+    chunks_path = staged_path(staged.key) + CHUNKS_SUFFIX
+    
+    if staged.size is not None and staged.received != staged.size:
+        raise ValueError(f"Upload is incomplete: received {staged.received} of {staged.size} bytes.")
+    if not os.path.exists(chunks_path):
+        raise ValueError("No data has been uploaded.")
+    
+    digest = hashlib.sha256()
+    with open(chunks_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    
+    if digest.hexdigest() != checksum.lower():
+        os.unlink(chunks_path)
+        staged.received = 0
+        staged.save(update_fields=['received'])
+        raise ValueError("Checksum mismatch. Upload the file again.")
+    
+    os.replace(chunks_path, staged_path(staged.key))
+    staged.sha256 = digest.hexdigest()
+    staged.completed_at = timezone.now()
+    staged.save(update_fields=['sha256', 'completed_at'])
+
+
+def open_staged(key, user):
+    """
+    Return a StagedFile for an unexpired upload the user staged, or None if
+    there is no such upload or its bytes have not arrived.
+    """
+    if not KEY_RE.match(key or ''):
+        return None
+    
+    staged = StagedUpload.objects.filter(
+        key=key,
+        created_by_id=user.id,
+        expires_at__gt=timezone.now()
+    ).first()
+    if not staged:
+        return None
+    
+    try:
+        return StagedFile(open(staged_path(key), 'rb'), name=staged.file_name, key=key)
+    except FileNotFoundError:
+        return None
+
+
+def release(staged_file):
+    """
+    Forget a staged upload once its file has been saved to a FileField.
+    """
+    staged_file.close()
+    path = staged_path(staged_file.key)
+    for leftover in (path, path + CHUNKS_SUFFIX):
+        if os.path.exists(leftover):
+            os.unlink(leftover)
+    StagedUpload.objects.filter(key=staged_file.key).delete()
+
+
+def purge_expired():
+    """
+    Delete expired staged uploads and any staged files without a live
+    record. Returns the number of files removed.
+    """
+    now = timezone.now()
+    StagedUpload.objects.filter(expires_at__lte=now).delete()
+    
+    if not os.path.isdir(settings.STAGED_UPLOAD_ROOT):
+        return 0
+    
+    live_keys = set(StagedUpload.objects.values_list('key', flat=True))
+    cutoff = now.timestamp() - settings.STAGED_UPLOAD_URL_MAX_AGE
+    removed = 0
+    
+    with os.scandir(settings.STAGED_UPLOAD_ROOT) as entries:
+        for entry in entries:
+            key = entry.name
+            if key.endswith(CHUNKS_SUFFIX):
+                key = key[:-len(CHUNKS_SUFFIX)]
+            if not entry.is_file() or key in live_keys:
+                continue
+            # Leave files that may still be mid-upload
+            if entry.stat().st_mtime > cutoff:
+                continue
+            os.unlink(entry.path)
+            removed += 1
+    
+    return removed
@@ -0,0 +1,223 @@
+import hashlib
+import os
+import re
+import tempfile
+import time
+import uuid
+from django.apps import apps
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+
+BLOB_DIR = 'blobs'
+# Directories under MEDIA_ROOT that hold no FileField names
+UNMANAGED_DIRS = {BLOB_DIR, 'staging'}
+CHUNK_SIZE = 64 * 1024
+
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@deconstructible
+class ShardedUploadTo:
+    """
+    upload_to callable that fans files out as
+    <prefix>/<year>/<month>/<xx>/<filename>, where xx is a random hex pair,
+    so no directory grows past a few hundred entries.
+    """
+    
+    def __init__(self, prefix):
+        self.prefix = prefix
+    
+    def __call__(self, instance, filename):
+        created_at = getattr(instance, 'created_at', None) or timezone.now()
+        return '/'.join([
+            self.prefix,
+            created_at.strftime('%Y'),
+            created_at.strftime('%m'),
+            uuid.uuid4().hex[:2],
+            os.path.basename(filename),
+        ])
+    
+    def is_sharded(self, name):
+        return bool(re.match(rf'^{re.escape(self.prefix)}/\d{{4}}/\d{{2}}/[0-9a-f]{{2}}/[^/]+$', name))
+    
+    def __eq__(self, other):
+        return isinstance(other, ShardedUploadTo) and self.prefix == other.prefix
+
+
+@deconstructible
+class DeduplicatingFileSystemStorage(FileSystemStorage):
+    """
+    FileSystemStorage that keeps one copy of each distinct file.
+    
+    Content is stored once as blobs/<aa>/<bb>/<sha256>, and every saved name
+    is a hard link to its blob. Names, URLs and nginx serving work exactly as
+    before, while the blob's link count says how many names still reference
+    it; see collect_garbage() and deduplicate().
+    """
+    
+    def blob_path(self, content_hash):
+        return self.path(os.path.join(BLOB_DIR, content_hash[:2], content_hash[2:4], content_hash))
+    
+    def _save(self, name, content):
+        blob_dir = self.path(BLOB_DIR)
+        os.makedirs(blob_dir, exist_ok=True)
+        
+        if hasattr(content, 'temporary_file_path'):
+            source_path = content.temporary_file_path()
+            content_hash = _hash_file(source_path)
+            spooled = False
+        else:
+            digest = hashlib.sha256()
+            fd, source_path = tempfile.mkstemp(dir=blob_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as spool:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    spool.write(chunk)
+            content_hash = digest.hexdigest()
+            spooled = True
+        
+        blob_path = self.blob_path(content_hash)
+        try:
+            while True:
+                if not os.path.exists(blob_path):
+                    os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                    file_move_safe(source_path, blob_path, allow_overwrite=True)
+                    spooled = False
+                    if self.file_permissions_mode is not None:
+                        os.chmod(blob_path, self.file_permissions_mode)
+                
+                full_path = self.path(name)
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                try:
+                    os.link(blob_path, full_path)
+                    break
+                except FileExistsError:
+                    name = self.get_available_name(name)
+                except FileNotFoundError:
+                    # Garbage collection removed the blob in between; store it
+                    # again from the source (unless it was moved into place).
+                    if not os.path.exists(source_path):
+                        raise
+        finally:
+            if spooled and os.path.exists(source_path):
+                os.unlink(source_path)
+        
+        return str(name).replace('\\', '/')
+
+
+def _managed_files(storage):
+    """
+    Yield (name, path) for every file under MEDIA_ROOT that can be a
+    FileField name.
+    """
+    root = storage.path('')
+    for dirpath, dirnames, filenames in os.walk(root):
+        if dirpath == root:
+            dirnames[:] = [d for d in dirnames if d not in UNMANAGED_DIRS]
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            yield os.path.relpath(path, root).replace(os.sep, '/'), path
+
+
+def _referenced_names():
+    names = set()
+    for model in apps.get_models():
+        file_fields = [f.name for f in model._meta.concrete_fields if isinstance(f, models.FileField)]
+        for field in file_fields:
+            names.update(
+                model._default_manager.exclude(**{field: ''}).exclude(**{f"{field}__isnull": True})
+                .values_list(field, flat=True).iterator()
+            )
+    return names
+
+
+def deduplicate(storage, dry_run=False):
+    """
+    Replace duplicate files in the media tree with hard links to a single
+    blob. Returns counts and the number of bytes reclaimed.
+    """
+    report = {"files": 0, "linked": 0, "bytes_reclaimed": 0}
+    # Files that would have become blobs, so a dry run still finds duplicates
+    first_seen = {}
+    
+    for name, path in _managed_files(storage):
+        report["files"] += 1
+        stat = os.stat(path)
+        blob_path = storage.blob_path(_hash_file(path))
+        blob_path = first_seen.get(blob_path, blob_path) if dry_run else blob_path
+        
+        if not os.path.exists(blob_path):
+            if dry_run:
+                first_seen[blob_path] = path
+            else:
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                os.link(path, blob_path)
+            continue
+        
+        if os.path.samefile(path, blob_path):
+            continue
+        
+        report["linked"] += 1
+        if stat.st_nlink == 1:
+            report["bytes_reclaimed"] += stat.st_size
+        
+        if not dry_run:
+            temp_path = f"{path}.dedup"
+            os.link(blob_path, temp_path)
+            os.replace(temp_path, path)
+    
+    return report
+
+
+def collect_garbage(storage, grace_seconds=3600, dry_run=False):
+    """
+    Remove blob links whose name no FileField references any more, then
+    blobs nothing links to. Files younger than grace_seconds are left alone
+    so in-flight saves are not raced.
+    """
+    cutoff = time.time() - grace_seconds
+    report = {"unreferenced_names": 0, "blobs": 0, "bytes_reclaimed": 0}
+    referenced = _referenced_names()
+    
+    # Collect first: unlinking a name updates the ctime of its other links
+    unreferenced = []
+    for name, path in _managed_files(storage):
+        stat = os.stat(path)
+        # Only names created by this storage (links to a blob) are removed
+        if name in referenced or stat.st_nlink < 2 or stat.st_ctime > cutoff:
+            continue
+        unreferenced.append(path)
+    
+    report["unreferenced_names"] = len(unreferenced)
+    if not dry_run:
+        for path in unreferenced:
+            os.unlink(path)
+    
+    blob_root = storage.path(BLOB_DIR)
+    for dirpath, dirnames, filenames in os.walk(blob_root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            stat = os.stat(path)
+            if stat.st_nlink > 1 or stat.st_mtime > cutoff:
+                continue
+            report["blobs"] += 1
+            report["bytes_reclaimed"] += stat.st_size
+            if not dry_run:
+                os.unlink(path)
+    
+    return report
+
+
+document_storage = DeduplicatingFileSystemStorage()
@@ -0,0 +1,93 @@
+import threading
+from unittest import skipUnless
+from django.db import connection
+from django.test import TransactionTestCase
+from apps.users.models import User
+from apps.purchases.models import PurchaseRequest, Approval
+from apps.purchases.services import ApprovalWorkflow
+
+
+@skipUnless(connection.vendor == 'postgresql', "Row locks need PostgreSQL")
+class ConcurrentApprovalTests(TransactionTestCase):
+    """
+    Decisions made at the same moment from separate connections, as two
+    gunicorn workers would.
+    """
+    
+    def setUp(self):
+        self.approver_l1 = self.create_user('approver_l1', User.Role.APPROVER_LEVEL_1)
+        self.other_approver_l1 = self.create_user('other_approver_l1', User.Role.APPROVER_LEVEL_1)
+        self.approver_l2 = self.create_user('approver_l2', User.Role.APPROVER_LEVEL_2)
+        self.staff = self.create_user('staff', User.Role.STAFF, manager=self.approver_l1)
+        self.purchase_request = PurchaseRequest.objects.create(
+            title='Office chairs',
+            amount='300.00',
+            created_by=self.staff
+        )
+    
+    def create_user(self, username, role, manager=None):
+        return User.objects.create_user(
+            username=username,
+            password='test123',
+            email=f'{username}@example.com',
+            role=role,
+            manager=manager
+        )
+    
+    def decide_concurrently(self, decisions):
+        """
+        Run record_decision for each (user, approved) pair in its own thread,
+        released together. Returns the results in the same order.
+        """
+        barrier = threading.Barrier(len(decisions))
+        results = [None] * len(decisions)
+        
+        def decide(index, user, approved):
+            try:
+                barrier.wait()
+                results[index] = ApprovalWorkflow.record_decision(
+                    PurchaseRequest.objects.all(), self.purchase_request.id, user, approved
+                )
+            finally:
+                connection.close()
+        
+        threads = [
+            threading.Thread(target=decide, args=(index, user, approved))
+            for index, (user, approved) in enumerate(decisions)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+    
+    def test_both_levels_approving_at_once_approves_request(self):
+        results = self.decide_concurrently([(self.approver_l1, True), (self.approver_l2, True)])
+        
+        self.assertEqual([result.error_code for result in results], [None, None])
+        self.assertEqual(sum(result.fully_approved for result in results), 1)
+        self.purchase_request.refresh_from_db()
+        self.assertEqual(self.purchase_request.status, PurchaseRequest.Status.APPROVED)
+        self.assertEqual(Approval.objects.filter(purchase_request=self.purchase_request).count(), 2)
+    
+    def test_same_level_deciding_at_once_records_one_decision(self):
+        results = self.decide_concurrently([(self.approver_l1, True), (self.other_approver_l1, True)])
+        
+        self.assertEqual(
+            sorted(str(result.error_code) for result in results),
+            sorted([str(None), ApprovalWorkflow.LEVEL_DECIDED])
+        )
+        self.purchase_request.refresh_from_db()
+        self.assertEqual(self.purchase_request.status, PurchaseRequest.Status.PENDING)
+        self.assertEqual(Approval.objects.filter(purchase_request=self.purchase_request).count(), 1)
+    
+    def test_approval_and_rejection_at_once_leave_consistent_status(self):
+        results = self.decide_concurrently([(self.approver_l1, True), (self.approver_l2, False)])
+        
+        # Whichever goes first, the request ends up rejected; an approval
+        # arriving after the rejection is refused rather than recorded
+        recorded = [result for result in results if result.error_code is None]
+        self.assertIn(len(recorded), (1, 2))
+        self.purchase_request.refresh_from_db()
+        self.assertEqual(self.purchase_request.status, PurchaseRequest.Status.REJECTED)
+        self.assertEqual(Approval.objects.filter(purchase_request=self.purchase_request).count(), len(recorded))
@@ -1,9 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .api import PurchaseRequestViewSet
+from .api import PurchaseRequestViewSet, StagedUploadViewSet, ReceiptDiscrepancyViewSet, VendorViewSet
 
 router = DefaultRouter()
 router.register(r'requests', PurchaseRequestViewSet, basename='purchase-request')
+router.register(r'uploads', StagedUploadViewSet, basename='staged-upload')
+router.register(r'receipt-discrepancies', ReceiptDiscrepancyViewSet, basename='receipt-discrepancy')
+router.register(r'vendors', VendorViewSet, basename='vendor')
 
 urlpatterns = [
     path('api/', include(router.urls)),
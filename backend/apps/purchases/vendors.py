@@ -0,0 +1,145 @@
+import re
+import unicodedata
+from django.conf import settings
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from .models import Vendor, VendorAlias
+
+
+WORD_RE = re.compile(r'\w+')
+
+# Dropped from the end of a name, so "Acme Supplies Ltd." and
+# "ACME SUPPLIES LIMITED" share a key
+LEGAL_SUFFIXES = {
+    'ltd', 'limited', 'inc', 'incorporated', 'llc', 'llp', 'lp', 'plc', 'co', 'corp', 'corporation',
+    'company', 'gmbh', 'ag', 'kg', 'sa', 'sarl', 'srl', 'spa', 'bv', 'nv', 'pty', 'pte', 'oy', 'ab',
+}
+
+# Prefix matching only below this length; trigrams need three characters
+MIN_TRIGRAM_QUERY = 3
+
+
+def normalize_vendor_name(name):
+    """
+    Key under which spellings of one vendor name compare equal: casefolded,
+    accents and punctuation removed, "&" read as "and", leading "the" and
+    trailing legal suffixes dropped.
+    """
+    text = unicodedata.normalize('NFKD', str(name or '')).casefold().replace('&', ' and ')
+    text = ''.join(character for character in text if not unicodedata.combining(character))
+    words = WORD_RE.findall(text.replace('_', ' '))
+    
+    if len(words) > 1 and words[0] == 'the':
+        words = words[1:]
+    while len(words) > 1 and (words[-1] in LEGAL_SUFFIXES or words[-1] == 'and'):
+        words.pop()
+    
+    return ' '.join(words)[:200]
+
+
+def resolve_vendor_ids(names, create=False):
+    """
+    Map vendor names to vendor ids with one indexed lookup of their keys.
+    
+    Names that are not known yet map to None, or with `create` are attached
+    to the most similar known vendor (see VENDOR_MATCH_SIMILARITY) or
+    become new vendors.
+    """
+    keys = {name: normalize_vendor_name(name) for name in names if name}
+    keys = {name: key for name, key in keys.items() if key}
+    if not keys:
+        return {}
+    
+    vendor_ids = dict(
+        VendorAlias.objects.filter(normalized_name__in=set(keys.values()))
+        .values_list('normalized_name', 'vendor_id')
+    )
+    
+    if create:
+        for name, key in keys.items():
+            if key not in vendor_ids:
+                vendor_ids[key] = _add_vendor_name(name, key)
+    
+    return {name: vendor_ids.get(key) for name, key in keys.items()}
+
+
+def resolve_vendor(name, create=False):
+    return resolve_vendor_ids([name], create=create).get(name)
+
+
+def same_vendor(name, other_name):
+    """
+    Whether two spellings name the same vendor: equal keys, or aliases of
+    one vendor.
+    """
+    key, other_key = normalize_vendor_name(name), normalize_vendor_name(other_name)
+    if not key or not other_key:
+        return False
+    if key == other_key:
+        return True
+    
+    vendor_ids = resolve_vendor_ids([name, other_name])
+    return vendor_ids.get(name) is not None and vendor_ids.get(name) == vendor_ids.get(other_name)
+
+
+def search_vendors(query, limit=10):
+    """
+    Vendors for an autocomplete box, best match first, each with the
+    spelling that matched as `matched_name`. Short queries match name
+    prefixes; longer ones also match misspellings through the trigram index.
+    """
+    key = normalize_vendor_name(query)
+    if not key:
+        return []
+    
+    aliases = VendorAlias.objects.select_related('vendor')
+    if len(key) < MIN_TRIGRAM_QUERY:
+        aliases = aliases.filter(normalized_name__startswith=key).order_by('normalized_name')
+    else:
+        aliases = aliases.filter(
+            Q(normalized_name__startswith=key) | Q(normalized_name__trigram_similar=key)
+        ).annotate(
+            similarity=TrigramSimilarity('normalized_name', key)
+        ).order_by('-similarity', 'normalized_name')
+    
+    # Several aliases of one vendor can match; keep the best one
+    vendors = {}
+    for alias in aliases[:limit * 3]:
+        if alias.vendor_id not in vendors:
+            alias.vendor.matched_name = alias.name
+            vendors[alias.vendor_id] = alias.vendor
+            if len(vendors) == limit:
+                break
+    return list(vendors.values())
+
+
+def _closest_alias(key):
+    if settings.VENDOR_MATCH_SIMILARITY >= 1:
+        return None
+    
+    return (
+        VendorAlias.objects.filter(normalized_name__trigram_similar=key)
+        .annotate(similarity=TrigramSimilarity('normalized_name', key))
+        .filter(similarity__gte=settings.VENDOR_MATCH_SIMILARITY)
+        .order_by('-similarity')
+        .first()
+    )
+
+
+def _add_vendor_name(name, key):
+    name = str(name).strip()[:200]
+    
+    try:
+        # Savepoint, so a concurrent insert of the same key leaves the
+        # caller's transaction usable
+        with transaction.atomic():
+            closest = _closest_alias(key)
+            if closest:
+                vendor_id = closest.vendor_id
+            else:
+                vendor_id = Vendor.objects.create(name=name, normalized_name=key).id
+            VendorAlias.objects.create(vendor_id=vendor_id, name=name, normalized_name=key)
+            return vendor_id
+    except IntegrityError:
+        return VendorAlias.objects.filter(normalized_name=key).values_list('vendor_id', flat=True).first()
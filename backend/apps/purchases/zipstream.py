@@ -0,0 +1,59 @@
+import zipfile
+from django.utils import timezone
+
+
+class _ZipOutput:
+    """
+    Write-only sink for ZipFile. It has tell() but no seek(), so ZipFile
+    writes in streaming mode (data descriptors after each entry), and the
+    bytes written so far can be drained after every chunk.
+    """
+    
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+    
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+    
+    def tell(self):
+        return self._offset
+    
+    def flush(self):
+        pass
+    
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(entries, chunk_size=64 * 1024):
+    """
+    Yield a zip archive of the given (arcname, FieldFile) pairs piece by
+    piece. Entries are stored uncompressed and only one chunk of one file is
+    held in memory at a time.
+    """
+    output = _ZipOutput()
+    date_time = timezone.now().timetuple()[:6]
+    
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for arcname, field_file in entries:
+            info = zipfile.ZipInfo(arcname, date_time=date_time)
+            info.compress_type = zipfile.ZIP_STORED
+            info.file_size = field_file.size
+            
+            field_file.open('rb')
+            try:
+                with archive.open(info, 'w') as destination:
+                    for chunk in field_file.chunks(chunk_size):
+                        destination.write(chunk)
+                        yield output.drain()
+            finally:
+                field_file.close()
+            
+            yield output.drain()
+    
+    yield output.drain()
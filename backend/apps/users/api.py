@@ -2,10 +2,10 @@ from rest_framework import status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import login
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiResponse
 from .models import User
+from .tokens import UserRefreshToken
 from .serializers import (
     UserSerializer, 
     UserRegistrationSerializer, 
@@ -59,7 +59,7 @@ class AuthViewSet(GenericViewSet):
         
         user = serializer.save()
         
-        refresh = RefreshToken.for_user(user)
+        refresh = UserRefreshToken.for_user(user)
         
         return Response({
             'user': UserSerializer(user).data,
@@ -75,7 +75,7 @@ class AuthViewSet(GenericViewSet):
         
         user = serializer.validated_data['user']
         
-        refresh = RefreshToken.for_user(user)
+        refresh = UserRefreshToken.for_user(user)
         
         return Response({
             'user': UserSerializer(user).data,
@@ -89,7 +89,7 @@ class AuthViewSet(GenericViewSet):
         try:
             refresh_token = request.data.get('refresh')
             if refresh_token:
-                token = RefreshToken(refresh_token)
+                token = UserRefreshToken(refresh_token)
                 token.blacklist()
             
             return Response({
@@ -121,13 +121,18 @@ class UserViewSet(GenericViewSet):
     
     @action(detail=False, methods=['get', 'put', 'patch'])
     def me(self, request):
+        user = request.user
+        if not isinstance(user, User):
+            # Stateless JWT mode resolves a claims-only user; load the row.
+            user = self.get_queryset().get()
+        
         if request.method == 'GET':
-            serializer = self.get_serializer(request.user)
+            serializer = self.get_serializer(user)
             return Response(serializer.data)
         
         elif request.method in ['PUT', 'PATCH']:
             serializer = self.get_serializer(
-                request.user, 
+                user, 
                 data=request.data, 
                 partial=request.method == 'PATCH'
             )
@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from apps.purchases.cache import is_shared_cache
+from .models import User
+from .tokens import (
+    ROLE_CLAIM,
+    MANAGER_ID_CLAIM,
+    IS_ACTIVE_CLAIM,
+    AUTH_VERSION_CLAIM,
+    get_cached_auth_version,
+    add_cached_auth_version,
+)
+
+
+class ClaimsUser(TokenUser):
+    """
+    Lightweight user built from access token claims, exposing the same role
+    helpers as User so permissions and queryset scoping work unchanged.
+    """
+    Role = User.Role
+    
+    is_staff_role = User.is_staff_role
+    is_approver_level_1 = User.is_approver_level_1
+    is_approver_level_2 = User.is_approver_level_2
+    is_finance = User.is_finance
+    is_approver = User.is_approver
+    get_approval_level = User.get_approval_level
+    can_approve_request = User.can_approve_request
+    
+    @cached_property
+    def role(self):
+        return self.token[ROLE_CLAIM]
+    
+    @cached_property
+    def manager_id(self):
+        return self.token.get(MANAGER_ID_CLAIM)
+    
+    @cached_property
+    def is_active(self):
+        return self.token.get(IS_ACTIVE_CLAIM, True)
+    
+    @cached_property
+    def auth_version(self):
+        return self.token[AUTH_VERSION_CLAIM]
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that, when JWT_STATELESS_USER is on, resolves the
+    request user from the token claims instead of loading the User row.
+    
+    The token's auth_version claim must match the user's current version,
+    which is read from the cache. On a cache miss or a stale version the user
+    is loaded from the database as usual. User.save() stores a new version in
+    the cache when it commits, so the cache must be shared by all workers;
+    with a per-process cache the user is always loaded from the database.
+    """
+    
+    def get_user(self, validated_token):
+        if not settings.JWT_STATELESS_USER or AUTH_VERSION_CLAIM not in validated_token \
+                or not is_shared_cache():
+            return super().get_user(validated_token)
+        
+        user = ClaimsUser(validated_token)
+        current_version = get_cached_auth_version(user.id)
+        
+        if current_version is None or current_version != user.auth_version:
+            db_user = super().get_user(validated_token)
+            if current_version is None:
+                add_cached_auth_version(db_user.id, db_user.auth_version)
+            return db_user
+        
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        
+        return user
@@ -0,0 +1,139 @@
+"""
+In-process membership filter in front of the simplejwt token blacklist.
+
+A Bloom filter holds the jti of every blacklisted token this process has
+seen. A background thread loads it and then pulls rows blacklisted since
+the last one it saw (a primary key range scan) every
+TOKEN_BLACKLIST_FILTER_SYNC_INTERVAL seconds, so requests never read the
+table to maintain it. Until the first load finishes every jti is checked
+against the table.
+
+A positive answer is confirmed against the blacklist table, which also
+covers false positives and rows removed by compaction. A negative answer
+can lag other workers' blacklisting by one interval; refreshes stay safe
+because with BLACKLIST_AFTER_ROTATION the blacklist insert made on
+rotation is the final check (see UserTokenRefreshSerializer).
+"""
+import hashlib
+import math
+import os
+import threading
+import time
+from django.conf import settings
+from django.db import close_old_connections
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+    
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+    
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+    
+    def __contains__(self, key):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+
+class BlacklistFilter:
+    def __init__(self, capacity, sync_interval):
+        self.capacity = capacity
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._pid = None
+        self.bloom = None
+        self.last_id = 0
+        # Rows loaded from the table; jtis added locally are counted when
+        # they are synced, not twice
+        self.count = 0
+    
+    def _start(self):
+        """
+        Start the sync thread once per process. Gunicorn forks workers after
+        import, and threads don't survive a fork, so this runs on first use.
+        """
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._pid = pid
+            self.bloom = None
+            threading.Thread(target=self._run, name='blacklist-filter', daemon=True).start()
+    
+    def _run(self):
+        while True:
+            try:
+                self._sync()
+            except Exception as e:
+                print(f"Blacklist filter sync error: {e}")
+            finally:
+                close_old_connections()
+            time.sleep(self.sync_interval)
+    
+    def _sync(self):
+        if self.bloom is None or self.count > self.capacity:
+            # Cold start, or saturated: build a new filter from the rows left
+            # after compaction. Requests keep using the old one meanwhile.
+            bloom, last_id, count = BloomFilter(self.capacity), 0, 0
+        else:
+            bloom, last_id, count = self.bloom, self.last_id, self.count
+        
+        rows = BlacklistedToken.objects.filter(
+            id__gt=last_id
+        ).order_by('id').values_list('id', 'token__jti')
+        
+        batch = []
+        for row in rows.iterator(chunk_size=10000):
+            batch.append(row)
+            if len(batch) == 10000:
+                last_id, count = self._add_rows(bloom, batch, last_id, count)
+                batch = []
+        last_id, count = self._add_rows(bloom, batch, last_id, count)
+        
+        with self._lock:
+            self.bloom, self.last_id, self.count = bloom, last_id, count
+    
+    def _add_rows(self, bloom, rows, last_id, count):
+        with self._lock:
+            for row_id, jti in rows:
+                bloom.add(jti)
+                last_id = row_id
+        return last_id, count + len(rows)
+    
+    def might_contain(self, jti):
+        self._start()
+        bloom = self.bloom
+        return bloom is None or jti in bloom
+    
+    def add(self, jti):
+        with self._lock:
+            if self.bloom is not None:
+                self.bloom.add(jti)
+
+
+blacklist_filter = BlacklistFilter(
+    settings.TOKEN_BLACKLIST_FILTER_CAPACITY,
+    settings.TOKEN_BLACKLIST_FILTER_SYNC_INTERVAL
+)
+
+
+def is_blacklisted(jti):
+    if not blacklist_filter.might_contain(jti):
+        return False
+    return BlacklistedToken.objects.filter(token__jti=jti).exists()
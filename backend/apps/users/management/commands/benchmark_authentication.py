@@ -0,0 +1,87 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from apps.purchases.api import PurchaseRequestViewSet
+from apps.purchases.cache import is_shared_cache
+from apps.users.authentication import StatelessJWTAuthentication
+from apps.users.models import User
+from apps.users.tokens import UserRefreshToken
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare per-request latency and queries of StatelessJWTAuthentication (JWT_STATELESS_USER on) '
+        'with simplejwt\'s JWTAuthentication, on the request list endpoint and for authentication alone'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help='Username the requests are authenticated as')
+        parser.add_argument('--requests', type=int, default=1000, help='Requests timed per authentication class')
+    
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' does not exist")
+        
+        if not is_shared_cache():
+            self.stdout.write(self.style.WARNING(
+                'CACHE_BACKEND is per-process, so StatelessJWTAuthentication loads the user from the '
+                'database and both classes should measure the same'
+            ))
+        
+        refresh = UserRefreshToken.for_user(user)
+        authorization = f"Bearer {refresh.access_token}"
+        try:
+            with override_settings(JWT_STATELESS_USER=True):
+                for authentication_class in (JWTAuthentication, StatelessJWTAuthentication):
+                    self.measure(authentication_class, authorization, options['requests'])
+        finally:
+            OutstandingToken.objects.filter(jti=refresh[api_settings.JTI_CLAIM]).delete()
+    
+    def measure(self, authentication_class, authorization, count):
+        factory = APIRequestFactory()
+        view = PurchaseRequestViewSet.as_view({'get': 'list'}, authentication_classes=[authentication_class])
+        authenticator = authentication_class()
+        
+        def request():
+            return factory.get('/api/requests/', HTTP_AUTHORIZATION=authorization)
+        
+        # The first request caches the auth version and the list response
+        response = view(request())
+        if response.status_code != 200:
+            raise CommandError(f"Request failed with status {response.status_code}")
+        
+        for label, call in (
+            ('authentication', lambda: authenticator.authenticate(request())[0].role),
+            ('GET /api/requests/', lambda: view(request())),
+        ):
+            latencies, queries = self.time_calls(call, count)
+            self.stdout.write(
+                f"{authentication_class.__name__}, {label}: "
+                f"mean {statistics.mean(latencies) * 1e6:.0f}us, p50 {statistics.median(latencies) * 1e6:.0f}us, "
+                f"{queries / count:.1f} queries per request"
+            )
+    
+    @staticmethod
+    def time_calls(call, count):
+        queries = 0
+        
+        def count_query(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+        
+        latencies = []
+        with connection.execute_wrapper(count_query):
+            for _ in range(count):
+                started = time.perf_counter()
+                call()
+                latencies.append(time.perf_counter() - started)
+        return latencies, queries
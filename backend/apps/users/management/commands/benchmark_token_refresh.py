@@ -0,0 +1,168 @@
+import statistics
+import time
+import uuid
+from datetime import timedelta
+from unittest import mock
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.views import TokenRefreshView
+from apps.users.blacklist import blacklist_filter
+from apps.users.models import User
+from apps.users.serializers import UserTokenRefreshSerializer
+from apps.users.tokens import UserRefreshToken
+
+JTI_PREFIX = 'benchmark-'
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure /api/token/refresh/ throughput with many outstanding and blacklisted tokens, checking the '
+        'blacklist through the in-process filter and with a direct query'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help='Username whose refresh token is rotated')
+        parser.add_argument(
+            '--outstanding',
+            type=int,
+            default=1000000,
+            help='Synthetic outstanding tokens to insert first; they are deleted afterwards'
+        )
+        parser.add_argument(
+            '--blacklisted-share',
+            type=float,
+            default=0.9,
+            help='Share of the synthetic tokens that are blacklisted, as rotation leaves most of them'
+        )
+        parser.add_argument('--refreshes', type=int, default=2000, help='Refreshes timed per mode')
+        parser.add_argument('--batch-size', type=int, default=10000, help='Rows per insert and delete statement')
+    
+    def handle(self, *args, **options):
+        if not (api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION):
+            raise CommandError('The filter is only used with ROTATE_REFRESH_TOKENS and BLACKLIST_AFTER_ROTATION')
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' does not exist")
+        
+        seeded = None
+        # jti of every token the timed refreshes issue or blacklist
+        issued = []
+        try:
+            if options['outstanding']:
+                seeded = self.seed(options['outstanding'], options['blacklisted_share'], options['batch_size'])
+            self.stdout.write(
+                f"{OutstandingToken.objects.count():,} outstanding and "
+                f"{BlacklistedToken.objects.count():,} blacklisted tokens"
+            )
+            
+            started = time.perf_counter()
+            self.wait_for_filter()
+            self.stdout.write(
+                f"Filter loaded {blacklist_filter.count:,} blacklisted tokens in {time.perf_counter() - started:.2f}s"
+            )
+            
+            # simplejwt's own check: one blacklist query per refresh
+            with mock.patch.object(UserRefreshToken, 'check_blacklist', RefreshToken.check_blacklist):
+                self.measure('direct blacklist query', user, options['refreshes'], issued)
+                self.measure_checks('direct blacklist query', options['refreshes'])
+            self.measure('blacklist filter', user, options['refreshes'], issued)
+            self.measure_checks('blacklist filter', options['refreshes'])
+        finally:
+            self.stdout.write('Deleting the benchmark tokens')
+            if seeded:
+                self.delete_range(*seeded, options['batch_size'], jti__startswith=JTI_PREFIX)
+            for start in range(0, len(issued), options['batch_size']):
+                OutstandingToken.objects.filter(jti__in=issued[start:start + options['batch_size']]).delete()
+    
+    def seed(self, count, blacklisted_share, batch_size):
+        """
+        Insert `count` outstanding tokens, the given share of them
+        blacklisted. Returns the first and last outstanding token id.
+        """
+        expires_at = timezone.now() + timedelta(days=1)
+        first_id = last_id = None
+        
+        for start in range(0, count, batch_size):
+            with transaction.atomic():
+                tokens = OutstandingToken.objects.bulk_create([
+                    OutstandingToken(jti=f"{JTI_PREFIX}{uuid.uuid4().hex}", token='', expires_at=expires_at)
+                    for _ in range(min(batch_size, count - start))
+                ])
+                # Spread evenly: token i is blacklisted when i * share crosses an integer
+                BlacklistedToken.objects.bulk_create([
+                    BlacklistedToken(token=token)
+                    for index, token in enumerate(tokens, start)
+                    if int((index + 1) * blacklisted_share) > int(index * blacklisted_share)
+                ])
+            first_id = tokens[0].id if first_id is None else first_id
+            last_id = tokens[-1].id
+        
+        self.stdout.write(f"Inserted {count:,} outstanding tokens")
+        return first_id, last_id
+    
+    @staticmethod
+    def delete_range(first_id, last_id, batch_size, **filters):
+        # Primary key ranges, as compact_token_blacklist does, rather than
+        # one delete that collects every row
+        for start in range(first_id, last_id + 1, batch_size):
+            with transaction.atomic():
+                OutstandingToken.objects.filter(id__gte=start, id__lt=start + batch_size, **filters).delete()
+    
+    @staticmethod
+    def wait_for_filter():
+        blacklist_filter.might_contain('')
+        expected = BlacklistedToken.objects.count()
+        while blacklist_filter.bloom is None or blacklist_filter.count < expected:
+            time.sleep(0.1)
+    
+    def measure_checks(self, label, count):
+        """
+        The blacklist check alone, for tokens that are not blacklisted (the
+        usual case). Tokens built without a string get a new jti and are
+        not verified.
+        """
+        tokens = [UserRefreshToken() for _ in range(count)]
+        started = time.perf_counter()
+        for token in tokens:
+            token.check_blacklist()
+        self.stdout.write(f"{label}, check only: {(time.perf_counter() - started) / count * 1e6:.0f}us per check")
+    
+    def measure(self, label, user, refreshes, issued):
+        view = TokenRefreshView.as_view(serializer_class=UserTokenRefreshSerializer)
+        factory = APIRequestFactory()
+        token = UserRefreshToken.for_user(user)
+        
+        queries = 0
+        
+        def count_query(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+        
+        latencies = []
+        with connection.execute_wrapper(count_query):
+            for _ in range(refreshes):
+                issued.append(token[api_settings.JTI_CLAIM])
+                request = factory.post('/api/token/refresh/', {'refresh': str(token)}, format='json')
+                started = time.perf_counter()
+                response = view(request)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    raise CommandError(f"Refresh failed with status {response.status_code}: {response.data}")
+                # Only read for its jti; verifying would check the blacklist again
+                token = UserRefreshToken(response.data['refresh'], verify=False)
+        issued.append(token[api_settings.JTI_CLAIM])
+        
+        latencies.sort()
+        self.stdout.write(
+            f"{label}: {refreshes / sum(latencies):,.0f} refreshes/s, "
+            f"p50 {statistics.median(latencies) * 1000:.2f}ms, "
+            f"p99 {latencies[min(refreshes - 1, int(refreshes * 0.99))] * 1000:.2f}ms, "
+            f"{queries / refreshes:.1f} queries per refresh"
+        )
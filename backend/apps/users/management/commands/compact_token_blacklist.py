@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+class Command(BaseCommand):
+    help = 'Delete expired outstanding and blacklisted refresh tokens in primary key batches'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Number of token ids covered by each delete statement'
+        )
+    
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        now = timezone.now()
+        
+        # expires_at is not indexed, so walk the table in primary key ranges
+        # instead of issuing one delete that scans and locks everything.
+        bounds = OutstandingToken.objects.aggregate(low=Min('id'), high=Max('id'))
+        deleted_outstanding = 0
+        deleted_blacklisted = 0
+        
+        start = bounds['low']
+        while start is not None and start <= bounds['high']:
+            end = start + batch_size
+            with transaction.atomic():
+                _, per_model = OutstandingToken.objects.filter(
+                    id__gte=start,
+                    id__lt=end,
+                    expires_at__lt=now
+                ).delete()
+            deleted_outstanding += per_model.get(OutstandingToken._meta.label, 0)
+            deleted_blacklisted += per_model.get(BlacklistedToken._meta.label, 0)
+            start = end
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted_outstanding} expired outstanding tokens '
+            f'({deleted_blacklisted} blacklisted)'
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='auth_version',
+            field=models.PositiveIntegerField(default=1, help_text='Bumped when role, manager or active flag change, invalidating token claims'),
+        ),
+    ]
@@ -1,5 +1,5 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
 
 
 class User(AbstractUser):
@@ -45,6 +45,11 @@ class User(AbstractUser):
         help_text="Designates whether this user should be treated as active."
     )
     
+    auth_version = models.PositiveIntegerField(
+        default=1,
+        help_text="Bumped when role, manager or active flag change, invalidating token claims"
+    )
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -55,9 +60,45 @@ class User(AbstractUser):
             models.Index(fields=['manager']),
         ]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._saved_auth_claims = self._get_auth_claims()
+    
     def __str__(self):
         return f"{self.username} ({self.get_role_display()})"
 
+    def save(self, *args, **kwargs):
+        from .tokens import set_cached_auth_version  # Avoid circular import
+        
+        claims_changed = self.pk and self._get_auth_claims() != self._saved_auth_claims
+        if claims_changed:
+            self.auth_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'auth_version'}
+        
+        super().save(*args, **kwargs)
+        self._saved_auth_claims = self._get_auth_claims()
+        
+        if claims_changed:
+            user_id, version = self.pk, self.auth_version
+            transaction.on_commit(lambda: set_cached_auth_version(user_id, version))
+    
+    def delete(self, *args, **kwargs):
+        from .tokens import clear_cached_auth_version  # Avoid circular import
+        
+        user_id = self.pk
+        result = super().delete(*args, **kwargs)
+        transaction.on_commit(lambda: clear_cached_auth_version(user_id))
+        return result
+    
+    def _get_auth_claims(self):
+        return (
+            self.__dict__.get('role'),
+            self.__dict__.get('manager_id'),
+            self.__dict__.get('is_active'),
+        )
+    
     @property
     def is_staff_role(self):
         return self.role == self.Role.STAFF
@@ -95,7 +136,7 @@ class User(AbstractUser):
         from apps.purchases.models import Approval  # Avoid circular import
         existing_approval = Approval.objects.filter(
             purchase_request=purchase_request,
-            approver=self
+            approver_id=self.id
         ).exists()
 
         if existing_approval:
@@ -1,7 +1,12 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 from .models import User, UserProfile
+from .tokens import UserRefreshToken
 
 
 class UserProfileSerializer(serializers.ModelSerializer):
@@ -88,4 +93,40 @@ class UserLoginSerializer(serializers.Serializer):
             attrs['user'] = user
             return attrs
         
-        raise serializers.ValidationError('Both username and password are required.')
\ No newline at end of file
+        raise serializers.ValidationError('Both username and password are required.')
+
+
+class UserTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh serializer that checks the blacklist through the in-process filter
+    and treats the rotation insert itself as the final check, so two
+    concurrent refreshes of the same token can't both succeed.
+    
+    The role, manager and auth version claims are reissued from the current
+    user, so refreshed tokens never carry claims the user no longer has.
+    """
+    
+    def validate(self, attrs):
+        refresh = UserRefreshToken(attrs['refresh'])
+        
+        user = User.objects.filter(
+            **{api_settings.USER_ID_FIELD: refresh[api_settings.USER_ID_CLAIM]}
+        ).first()
+        if user is None or not user.is_active:
+            raise AuthenticationFailed(_('No active account found for the given token'), code='user_inactive')
+        refresh.set_user_claims(user)
+        
+        data = {'access': str(refresh.access_token)}
+        
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                blacklisted_token, created = refresh.blacklist()
+                if not created:
+                    raise TokenError(_('Token is blacklisted'))
+            
+            refresh.set_jti()
+            refresh.set_exp()
+            
+            data['refresh'] = str(refresh)
+        
+        return data
@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from .blacklist import blacklist_filter, is_blacklisted
+
+
+ROLE_CLAIM = 'role'
+MANAGER_ID_CLAIM = 'manager_id'
+IS_ACTIVE_CLAIM = 'is_active'
+AUTH_VERSION_CLAIM = 'auth_version'
+
+
+class UserRefreshToken(RefreshToken):
+    """
+    Refresh token that also carries the claims needed to authorize a request
+    without loading the user. Access tokens derived from it copy these claims;
+    /api/token/refresh/ reissues them from the current user first.
+    """
+    
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.set_user_claims(user)
+        return token
+    
+    def set_user_claims(self, user):
+        self[ROLE_CLAIM] = user.role
+        self[MANAGER_ID_CLAIM] = user.manager_id
+        self[IS_ACTIVE_CLAIM] = user.is_active
+        self[AUTH_VERSION_CLAIM] = user.auth_version
+    
+    def check_blacklist(self):
+        # The filter can lag blacklisting done by other workers; that is only
+        # safe while the rotation insert is the final check
+        if not (api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION):
+            return super().check_blacklist()
+        if is_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_('Token is blacklisted'))
+    
+    def blacklist(self):
+        blacklisted_token, created = super().blacklist()
+        blacklist_filter.add(self.payload[api_settings.JTI_CLAIM])
+        return blacklisted_token, created
+
+
+def _auth_version_key(user_id):
+    return f'users:auth_version:{user_id}'
+
+
+def get_cached_auth_version(user_id):
+    return cache.get(_auth_version_key(user_id))
+
+
+def add_cached_auth_version(user_id, version):
+    """
+    Cache a version read from the database unless one is already cached, so
+    a slow read can't overwrite the newer version a concurrent save stored.
+    """
+    cache.add(_auth_version_key(user_id), version, settings.JWT_AUTH_VERSION_CACHE_TIMEOUT)
+
+
+def set_cached_auth_version(user_id, version):
+    cache.set(_auth_version_key(user_id), version, settings.JWT_AUTH_VERSION_CACHE_TIMEOUT)
+
+
+def clear_cached_auth_version(user_id):
+    cache.delete(_auth_version_key(user_id))
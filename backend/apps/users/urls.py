@@ -2,6 +2,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenRefreshView
 from .api import AuthViewSet, UserViewSet
+from .serializers import UserTokenRefreshSerializer
 
 router = DefaultRouter()
 router.register(r'auth', AuthViewSet, basename='auth')
@@ -9,5 +10,5 @@ router.register(r'users', UserViewSet, basename='users')
 
 urlpatterns = [
     path('api/', include(router.urls)),
-    path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/token/refresh/', TokenRefreshView.as_view(serializer_class=UserTokenRefreshSerializer), name='token_refresh'),
 ]
\ No newline at end of file
@@ -38,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third party apps
     'rest_framework',
@@ -103,6 +104,27 @@ DATABASES = {
 }
 
 
+# Cache
+# Local memory by default, which is per process: list and summary responses
+# are then not cached at all (see apps/purchases/cache.py). Deployments with
+# several workers use a shared backend, e.g. FileBasedCache with
+# CACHE_LOCATION set to a directory all workers use (as docker-compose does).
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='procure-to-pay'),
+    }
+}
+
+# Seconds a cached purchase request list or summary response is kept
+PURCHASE_LIST_CACHE_TIMEOUT = config('PURCHASE_LIST_CACHE_TIMEOUT', default=300, cast=int)
+
+# Seconds the change feed stays behind the clock, so rows written by
+# transactions still committing are not skipped by the cursor. Must exceed
+# the longest write transaction (bulk ingestion stores files inside one).
+CHANGE_FEED_SAFETY_LAG = config('CHANGE_FEED_SAFETY_LAG', default=30, cast=int)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -144,6 +166,20 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Internal nginx location that maps onto MEDIA_ROOT. When set, document
+# downloads return X-Accel-Redirect and nginx sends the file; leave empty to
+# stream files from Django (development).
+DOCUMENT_ACCEL_REDIRECT_PREFIX = config('DOCUMENT_ACCEL_REDIRECT_PREFIX', default='')
+
+# Staged uploads. nginx writes PUT bodies here (it must be on the same
+# filesystem as MEDIA_ROOT so claiming a file is a rename). Signed upload URLs
+# are valid for STAGED_UPLOAD_URL_MAX_AGE seconds; unclaimed files are purged
+# after STAGED_UPLOAD_MAX_AGE seconds.
+STAGED_UPLOAD_ROOT = MEDIA_ROOT / 'staging'
+STAGED_UPLOAD_URL_MAX_AGE = config('STAGED_UPLOAD_URL_MAX_AGE', default=900, cast=int)
+STAGED_UPLOAD_MAX_AGE = config('STAGED_UPLOAD_MAX_AGE', default=86400, cast=int)
+STAGED_UPLOAD_MAX_SIZE = 100 * 1024 * 1024  # 100MB, matches the nginx staging location
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -152,7 +188,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -188,6 +224,20 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
 }
 
+# Resolve the request user from token claims (role, manager, active flag)
+# instead of loading the User row on every request. Each user's current
+# auth_version is cached for this many seconds. Needs a shared CACHE_BACKEND
+# so version bumps reach every worker; with the per-process default the user
+# is still loaded from the database.
+JWT_STATELESS_USER = config('JWT_STATELESS_USER', default=False, cast=bool)
+JWT_AUTH_VERSION_CACHE_TIMEOUT = config('JWT_AUTH_VERSION_CACHE_TIMEOUT', default=60, cast=int)
+
+# Expected number of live blacklisted refresh tokens. Sizes the in-process
+# Bloom filter checked before the blacklist table (~1.2MB per million).
+TOKEN_BLACKLIST_FILTER_CAPACITY = config('TOKEN_BLACKLIST_FILTER_CAPACITY', default=1000000, cast=int)
+# Seconds between the filter's background pulls of newly blacklisted tokens
+TOKEN_BLACKLIST_FILTER_SYNC_INTERVAL = config('TOKEN_BLACKLIST_FILTER_SYNC_INTERVAL', default=5, cast=float)
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = config(
     'CORS_ALLOWED_ORIGINS',
@@ -205,6 +255,47 @@ CORS_ALLOW_CREDENTIALS = True
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 
+# Bulk proforma ingestion
+# Extraction threads per batch, capped at DOCUMENT_PARSER_WORKERS
+PROFORMA_INGEST_WORKERS = config('PROFORMA_INGEST_WORKERS', default=4, cast=int)
+# Seconds the bulk endpoint starts new extractions for; later documents are
+# reported as retryable. Leaves room for the last ones to finish within
+# nginx's 60s proxy_read_timeout.
+PROFORMA_INGEST_TIME_LIMIT = config('PROFORMA_INGEST_TIME_LIMIT', default=25, cast=int)
+PROFORMA_INGEST_MAX_FILES = 200
+PROFORMA_INGEST_MAX_FILE_SIZE = 20 * 1024 * 1024  # 20MB, matches nginx client_max_body_size
+
+# Document text extraction runs in a pool of recyclable subprocesses with
+# address space and CPU limits, so a malformed file cannot hang or exhaust a
+# web worker. Each document gets DOCUMENT_PARSER_TIMEOUT seconds; whatever
+# was parsed by then is used. Set DOCUMENT_PARSER_WORKERS=0 to parse in-process.
+DOCUMENT_PARSER_WORKERS = config('DOCUMENT_PARSER_WORKERS', default=2, cast=int)
+DOCUMENT_PARSER_TIMEOUT = config('DOCUMENT_PARSER_TIMEOUT', default=30, cast=int)
+DOCUMENT_PARSER_MEMORY_LIMIT_MB = config('DOCUMENT_PARSER_MEMORY_LIMIT_MB', default=1024, cast=int)
+DOCUMENT_PARSER_CPU_SECONDS = config('DOCUMENT_PARSER_CPU_SECONDS', default=30, cast=int)
+DOCUMENT_PARSER_MAX_TASKS = config('DOCUMENT_PARSER_MAX_TASKS', default=100, cast=int)
+
+# Threads used to OCR image bands and scanned PDF pages (0 = one per CPU)
+OCR_WORKERS = config('OCR_WORKERS', default=0, cast=int)
+
+# Receipt validation: relative differences from the PO that are reported.
+# Total amounts beyond the high tolerance are high severity.
+RECEIPT_AMOUNT_TOLERANCE = config('RECEIPT_AMOUNT_TOLERANCE', default=0.10, cast=float)
+RECEIPT_AMOUNT_HIGH_TOLERANCE = config('RECEIPT_AMOUNT_HIGH_TOLERANCE', default=0.20, cast=float)
+RECEIPT_ITEM_QUANTITY_TOLERANCE = config('RECEIPT_ITEM_QUANTITY_TOLERANCE', default=0.0, cast=float)
+RECEIPT_ITEM_PRICE_TOLERANCE = config('RECEIPT_ITEM_PRICE_TOLERANCE', default=0.01, cast=float)
+
+# Vendor master: a new spelling at least this trigram-similar to a known
+# vendor's name becomes an alias of that vendor (1 disables fuzzy matching)
+VENDOR_MATCH_SIMILARITY = config('VENDOR_MATCH_SIMILARITY', default=0.8, cast=float)
+
+# Requests created with a likely duplicate get a warning: same vendor, amount
+# within DUPLICATE_AMOUNT_TOLERANCE (at most 0.10), estimated description
+# similarity of at least DUPLICATE_TEXT_SIMILARITY, within the window
+DUPLICATE_WINDOW_DAYS = config('DUPLICATE_WINDOW_DAYS', default=30, cast=int)
+DUPLICATE_AMOUNT_TOLERANCE = config('DUPLICATE_AMOUNT_TOLERANCE', default=0.05, cast=float)
+DUPLICATE_TEXT_SIMILARITY = config('DUPLICATE_TEXT_SIMILARITY', default=0.6, cast=float)
+
 # OpenAI API configuration
 OPENAI_API_KEY = config('OPENAI_API_KEY', default=None)
 
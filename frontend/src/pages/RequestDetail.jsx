@@ -94,6 +94,19 @@ const RequestDetail = () => {
     setReceiptFile(null);
   };
 
+  const openDocument = async (url) => {
+    // Document downloads need the access token, so they are fetched and
+    // shown from a blob URL rather than linked to directly
+    const documentWindow = window.open('', '_blank');
+    try {
+      const response = await purchaseAPI.getDocument(url);
+      documentWindow.location.href = URL.createObjectURL(response.data);
+    } catch (err) {
+      documentWindow.close();
+      setError(err.response?.status === 404 ? 'Document not found' : 'Failed to open document');
+    }
+  };
+
   const handleReceiptFileChange = (e) => {
     setReceiptFile(e.target.files[0]);
   };
@@ -436,64 +449,59 @@ const RequestDetail = () => {
               <h2 className="text-lg font-semibold text-gray-900 mb-4">Documents</h2>
               <div className="space-y-3">
                 {request.proforma ? (
-                  <a
-                    href={request.proforma}
-                    target="_blank"
-                    rel="noopener noreferrer"
-                    className="flex items-center p-3 border border-gray-200 rounded-lg hover:bg-gray-50"
+                  <button
+                    type="button"
+                    onClick={() => openDocument(request.proforma)}
+                    className="w-full flex items-center p-3 border border-gray-200 rounded-lg hover:bg-gray-50"
                   >
                     <FileText className="h-5 w-5 text-blue-500 mr-3" />
                     <span className="text-gray-700">Proforma Invoice</span>
                     <Download className="h-4 w-4 text-gray-400 ml-auto" />
-                  </a>
+                  </button>
                 ) : null}
                 {request.quotation_comparison ? (
-                  <a
-                    href={request.quotation_comparison}
-                    target="_blank"
-                    rel="noopener noreferrer"
-                    className="flex items-center p-3 border border-gray-200 rounded-lg hover:bg-gray-50"
+                  <button
+                    type="button"
+                    onClick={() => openDocument(request.quotation_comparison)}
+                    className="w-full flex items-center p-3 border border-gray-200 rounded-lg hover:bg-gray-50"
                   >
                     <FileText className="h-5 w-5 text-green-500 mr-3" />
                     <span className="text-gray-700">Quotation Comparison</span>
                     <Download className="h-4 w-4 text-gray-400 ml-auto" />
-                  </a>
+                  </button>
                 ) : null}
                 {request.specification_sheet ? (
-                  <a
-                    href={request.specification_sheet}
-                    target="_blank"
-                    rel="noopener noreferrer"
-                    className="flex items-center p-3 border border-gray-200 rounded-lg hover:bg-gray-50"
+                  <button
+                    type="button"
+                    onClick={() => openDocument(request.specification_sheet)}
+                    className="w-full flex items-center p-3 border border-gray-200 rounded-lg hover:bg-gray-50"
                   >
                     <FileText className="h-5 w-5 text-purple-500 mr-3" />
                     <span className="text-gray-700">Specification Sheet</span>
                     <Download className="h-4 w-4 text-gray-400 ml-auto" />
-                  </a>
+                  </button>
                 ) : null}
                 {request.purchase_order ? (
-                  <a
-                    href={request.purchase_order}
-                    target="_blank"
-                    rel="noopener noreferrer"
-                    className="flex items-center p-3 border border-gray-200 rounded-lg hover:bg-gray-50"
+                  <button
+                    type="button"
+                    onClick={() => openDocument(request.purchase_order)}
+                    className="w-full flex items-center p-3 border border-gray-200 rounded-lg hover:bg-gray-50"
                   >
                     <FileText className="h-5 w-5 text-indigo-500 mr-3" />
                     <span className="text-gray-700">Purchase Order</span>
                     <Download className="h-4 w-4 text-gray-400 ml-auto" />
-                  </a>
+                  </button>
                 ) : null}
                 {request.receipt ? (
-                  <a
-                    href={request.receipt}
-                    target="_blank"
-                    rel="noopener noreferrer"
-                    className="flex items-center p-3 border border-gray-200 rounded-lg hover:bg-gray-50"
+                  <button
+                    type="button"
+                    onClick={() => openDocument(request.receipt)}
+                    className="w-full flex items-center p-3 border border-gray-200 rounded-lg hover:bg-gray-50"
                   >
                     <Receipt className="h-5 w-5 text-emerald-500 mr-3" />
                     <span className="text-gray-700">Receipt</span>
                     <Download className="h-4 w-4 text-gray-400 ml-auto" />
-                  </a>
+                  </button>
                 ) : null}
                 {!request.proforma && !request.quotation_comparison && !request.specification_sheet && !request.purchase_order && !request.receipt && (
                   <p className="text-gray-500 text-sm">No documents attached.</p>
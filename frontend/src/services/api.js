@@ -67,6 +67,7 @@ export const purchaseAPI = {
     });
   },
   getPurchaseOrder: (id) => api.get(`/requests/${id}/purchase_order/`),
+  getDocument: (url) => api.get(url, { responseType: 'blob' }),
 };
 
 export default api;
\ No newline at end of file